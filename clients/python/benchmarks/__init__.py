@@ -0,0 +1,3 @@
+"""
+Benchmarks for the Lightfeed Python client (not part of the installed package)
+"""
@@ -0,0 +1,104 @@
+"""
+Import-time benchmark for the Lightfeed Python client
+
+Times each statement in fresh interpreters, so nothing is cached in
+``sys.modules``, and reports the median together with the heavy
+dependencies the statement pulled in. Interpreter startup is excluded.
+With ``--max-ms`` the run fails when ``import lightfeed`` exceeds the
+budget, which makes it usable as a regression guard in CI.
+
+Usage (from ``clients/python``)::
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 20 --max-ms 50
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+
+# Statements timed by default, from the bare package to a client's first request
+STATEMENTS = {
+    "package": "import lightfeed",
+    "models": "from lightfeed.models import LightfeedConfig, Record",
+    "client": "from lightfeed import LightfeedClient; LightfeedClient({'apiKey': 'key'})",
+    "async_client": "from lightfeed import AsyncLightfeedClient",
+    "first_request": (
+        "from lightfeed import LightfeedClient; "
+        "LightfeedClient({'apiKey': 'key'})._get_session()"
+    ),
+}
+
+# Dependencies worth knowing about when they are loaded
+HEAVY_MODULES = ("requests", "urllib3", "httpx", "asyncio", "multiprocessing", "msgspec", "orjson", "sqlite3", "pyarrow")
+
+_CHILD = """
+import sys, time
+started = time.perf_counter()
+exec({statement!r})
+seconds = time.perf_counter() - started
+heavy = {heavy!r}
+import json
+print(json.dumps([seconds, [name for name in heavy if name in sys.modules]]))
+"""
+
+
+def measure(statement: str, runs: int = 5) -> Dict[str, Any]:
+    """
+    Times a statement in fresh interpreters
+
+    Args:
+        statement: Python source to time
+        runs: Number of interpreters to start
+
+    Returns:
+        The median and best time in milliseconds and the heavy modules loaded
+    """
+    times: List[float] = []
+    loaded: List[str] = []
+    source = _CHILD.format(statement=statement, heavy=HEAVY_MODULES)
+    for _ in range(max(1, runs)):
+        output = subprocess.run([sys.executable, "-c", source], check=True, capture_output=True, text=True).stdout
+        seconds, loaded = json.loads(output.strip().splitlines()[-1])
+        times.append(seconds * 1000)
+    return {
+        "median_ms": round(statistics.median(times), 1),
+        "best_ms": round(min(times), 1),
+        "loaded": loaded,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the import time of the Lightfeed Python client")
+    parser.add_argument("-s", "--statement", action="append", choices=sorted(STATEMENTS), help="Statement to time (repeatable, default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per statement")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median of 'import lightfeed' exceeds this")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.statement or list(STATEMENTS):
+        results.append(dict({"statement": name}, **measure(STATEMENTS[name], args.runs)))
+
+    width = max(len(r["statement"]) for r in results)
+    print(f"{'statement'.ljust(width)}  median_ms  best_ms  loaded")
+    for r in results:
+        print(f"{r['statement'].ljust(width)}  {r['median_ms']:>9.1f}  {r['best_ms']:>7.1f}  {', '.join(r['loaded']) or '-'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_ms is not None:
+        package = measure(STATEMENTS["package"], args.runs)
+        if package["median_ms"] > args.max_ms:
+            print(f"import lightfeed took {package['median_ms']} ms, over the {args.max_ms} ms budget", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
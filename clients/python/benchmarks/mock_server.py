@@ -0,0 +1,346 @@
+"""
+Local stand-in for the Lightfeed API used by the benchmarks
+
+Serves ``GET /v1/databases/{id}/records`` and ``POST .../records/search``
+and ``POST .../records/filter`` over a generated database, with cursor
+pagination, synced-time ranges, configurable latency and payload size,
+optional 429 injection (periodic or beyond a concurrency capacity) and optional gzip/zstd/br response compression.
+"""
+
+import bisect
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Tuple, Type
+from urllib.parse import parse_qs, urlparse
+
+from lightfeed.compression import available_encodings, compress, decompress
+from lightfeed.export import format_timestamp
+from lightfeed.filtering import compile_filter
+
+
+# First synced_at timestamp of the generated database
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+MAX_LIMIT = 500
+
+_INDUSTRIES = ("Technology", "Finance", "Healthcare", "Retail", "Energy")
+
+
+def _record(record_id: int, step: timedelta, payload_size: int) -> Dict[str, Any]:
+    synced_at = format_timestamp(BASE_TIME + step * record_id)
+    return {
+        "id": record_id,
+        "data": {
+            "name": f"Company {record_id}",
+            "industry": _INDUSTRIES[record_id % len(_INDUSTRIES)],
+            "employees": (record_id * 37) % 5000,
+            "founded": 1990 + record_id % 35,
+            "description": ("lorem ipsum dolor sit amet " * (payload_size // 27 + 1))[:payload_size],
+        },
+        "timestamps": {"created_at": synced_at, "changed_at": synced_at, "synced_at": synced_at},
+    }
+
+
+def _text_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), "big")
+
+
+def _score(text_hash: int, record_id: int) -> float:
+    """Cheap deterministic pseudo relevance in [0, 1)"""
+    return (((record_id * 2654435761) ^ text_hash) & 0xFFFFFFFF) / 2 ** 32
+
+
+class MockLightfeedServer:
+    """
+    Threaded HTTP server emulating the Lightfeed records API
+
+    Records are generated once and pre-encoded, so the server spends as
+    little time as possible per request and the client dominates the
+    measurements. Use as a context manager or call ``start``/``stop``.
+    """
+
+    def __init__(
+        self,
+        records: int = 10000,
+        payload_size: int = 200,
+        latency: float = 0.0,
+        rate_limit_every: int = 0,
+        retry_after: float = 0.0,
+        slow_every: int = 0,
+        slow_latency: float = 0.0,
+        capacity: int = 0,
+        step: timedelta = timedelta(seconds=1),
+        compress: bool = False,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Creates a server (not yet listening)
+
+        Args:
+            records: Number of records in the database
+            payload_size: Characters of description text per record
+            latency: Seconds added to every response
+            rate_limit_every: Answer every n-th request with 429 (0 disables)
+            retry_after: ``Retry-After`` seconds sent with injected 429s
+            slow_every: Delay every n-th request by ``slow_latency`` (0 disables)
+            slow_latency: Extra seconds taken by the slow requests, emulating a latency tail
+            capacity: Answer requests arriving while this many are in flight with 429 (0 disables)
+            step: Synced-time distance between consecutive records
+            compress: Compress responses with the best encoding the client accepts
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+        """
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.slow_every = slow_every
+        self.slow_latency = slow_latency
+        self.capacity = capacity
+        self.compress = compress
+        self.records = [_record(i, step, payload_size) for i in range(1, records + 1)]
+        self.synced = [r["timestamps"]["synced_at"] for r in self.records]
+        self.encoded = [json.dumps(r, separators=(",", ":")).encode() for r in self.records]
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.slowed = 0
+        self.overloaded = 0
+        self.in_flight = 0
+        self._arrivals = 0
+        self.request_encodings: List[str] = []  # Content-Encoding of every request body received
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLightfeedServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="lightfeed-mock", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockLightfeedServer":
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+    def extra_latency(self) -> float:
+        """Counts an arriving request and returns the extra seconds it should take"""
+        with self._lock:
+            self._arrivals += 1
+            slow = self.slow_every > 0 and self._arrivals % self.slow_every == 0
+            if slow:
+                self.slowed += 1
+        return self.slow_latency if slow else 0.0
+
+    def enter(self) -> bool:
+        """Counts a request as in flight and returns False if it exceeds the capacity"""
+        with self._lock:
+            self.in_flight += 1
+            over = self.capacity > 0 and self.in_flight > self.capacity
+            if over:
+                self.overloaded += 1
+        return not over
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def admit(self) -> bool:
+        """Counts a request and returns False if it should be rate limited"""
+        with self._lock:
+            self.requests += 1
+            limited = self.rate_limit_every > 0 and self.requests % self.rate_limit_every == 0
+            if limited:
+                self.rate_limited += 1
+        return not limited
+
+    def get_records(self, query: Dict[str, str]) -> bytes:
+        lo, hi = self._time_bounds(query.get("start_time"), query.get("end_time"))
+        cursor = query.get("cursor")
+        if cursor:
+            # Cursors are "<synced_at>_<id>"; ids increase with synced_at
+            lo = max(lo, int(cursor.rsplit("_", 1)[1]))
+        limit = _limit(query.get("limit"))
+        end = min(hi, lo + limit)
+        has_more = end < hi
+        next_cursor = f"{self.synced[end - 1]}_{self.records[end - 1]['id']}" if has_more else None
+        return _page(self.encoded[lo:end], limit, next_cursor)
+
+    def search_records(self, body: Dict[str, Any]) -> bytes:
+        search = body.get("search") or {}
+        matches = self._search(
+            search.get("text") or "",
+            float(search.get("threshold") or 0.2),
+            json.dumps(body.get("filter"), sort_keys=True),
+            json.dumps(body.get("time_range"), sort_keys=True),
+        )
+        offset, limit = _offset_page(body)
+        page = []
+        for index, score in matches[offset:offset + limit]:
+            record = dict(self.records[index], relevance_score=score)
+            page.append(json.dumps(record, separators=(",", ":")).encode())
+        end = offset + limit
+        return _page(page, limit, str(end) if end < len(matches) else None)
+
+    def filter_records(self, body: Dict[str, Any]) -> bytes:
+        matches = self._filter(
+            json.dumps(body.get("filter"), sort_keys=True),
+            json.dumps(body.get("time_range"), sort_keys=True),
+        )
+        offset, limit = _offset_page(body)
+        end = offset + limit
+        page = [self.encoded[i] for i in matches[offset:end]]
+        return _page(page, limit, str(end) if end < len(matches) else None)
+
+    @lru_cache(maxsize=256)
+    def _search(self, text: str, threshold: float, filter_json: str, range_json: str) -> List[Tuple[int, float]]:
+        text_hash = _text_hash(text)
+        scored = [(i, _score(text_hash, self.records[i]["id"])) for i in self._filter(filter_json, range_json)]
+        matches = [(i, round(score, 6)) for i, score in scored if score >= threshold]
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+
+    @lru_cache(maxsize=256)
+    def _filter(self, filter_json: str, range_json: str) -> List[int]:
+        time_range = json.loads(range_json) or {}
+        lo, hi = self._time_bounds(time_range.get("start_time"), time_range.get("end_time"))
+        expression = json.loads(filter_json)
+        if not expression:
+            return list(range(lo, hi))
+        predicate = compile_filter(expression)
+        return [i for i in range(lo, hi) if predicate(self.records[i])]
+
+    def _time_bounds(self, start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+        """Returns the index range of records synced within [start, end]"""
+        lo = bisect.bisect_left(self.synced, start) if start else 0
+        hi = bisect.bisect_right(self.synced, end) if end else len(self.synced)
+        return lo, max(lo, hi)
+
+
+def _limit(value: Any) -> int:
+    return max(1, min(MAX_LIMIT, int(value or 100)))
+
+
+def _offset_page(body: Dict[str, Any]) -> Tuple[int, int]:
+    pagination = body.get("pagination") or {}
+    return int(pagination.get("cursor") or 0), _limit(pagination.get("limit"))
+
+
+def _page(encoded: List[bytes], limit: int, next_cursor: Optional[str]) -> bytes:
+    pagination = {"limit": limit, "next_cursor": next_cursor, "has_more": next_cursor is not None}
+    return b"".join([
+        b'{"results":[',
+        b",".join(encoded),
+        b'],"pagination":',
+        json.dumps(pagination).encode(),
+        b"}",
+    ])
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients closing connections early (e.g. cancelled hedged requests) are expected
+        pass
+
+
+def _handler_for(server: MockLightfeedServer) -> Type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Send headers and body in one write, avoiding delayed-ACK stalls on keep-alive connections
+        wbufsize = 1 << 16
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) != 4 or parts[:2] != ["v1", "databases"] or parts[3] != "records":
+                return self._send(404, b'{"message":"Not found"}')
+            if self._check():
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                self._send(200, server.get_records(query))
+
+        def do_POST(self) -> None:
+            parts = urlparse(self.path).path.strip("/").split("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            encoding = self.headers.get("Content-Encoding") or "identity"
+            server.request_encodings.append(encoding)
+            body = json.loads(decompress(self.rfile.read(length), encoding) or b"{}")
+            if len(parts) != 5 or parts[:2] != ["v1", "databases"] or parts[3] != "records":
+                return self._send(404, b'{"message":"Not found"}')
+            if not self._check():
+                return
+            if parts[4] == "search":
+                self._send(200, server.search_records(body))
+            elif parts[4] == "filter":
+                self._send(200, server.filter_records(body))
+            else:
+                self._send(404, b'{"message":"Not found"}')
+
+        def _check(self) -> bool:
+            if not self.headers.get("x-api-key"):
+                self._send(401, b'{"message":"Missing API key"}')
+                return False
+            within_capacity = server.enter()
+            try:
+                latency = server.latency + server.extra_latency()
+                if latency:
+                    time.sleep(latency)
+            finally:
+                server.leave()
+            if not within_capacity:
+                self._send(429, b'{"message":"Server overloaded"}', {"Retry-After": str(server.retry_after)})
+                return False
+            if not server.admit():
+                self._send(429, b'{"message":"Too many requests"}', {"Retry-After": str(server.retry_after)})
+                return False
+            return True
+
+        def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+            encoding = self._encoding() if server.compress else None
+            if encoding is not None:
+                body = compress(body, encoding)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if encoding is not None:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _encoding(self) -> Optional[str]:
+            accepted = [e.split(";")[0].strip() for e in (self.headers.get("Accept-Encoding") or "").split(",")]
+            for encoding in available_encodings():
+                if encoding in accepted:
+                    return encoding
+            return None
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
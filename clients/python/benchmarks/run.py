@@ -0,0 +1,230 @@
+"""
+Benchmark scenarios for the Lightfeed Python client
+
+Runs every scenario against a local ``MockLightfeedServer`` and reports
+records/sec, request latency percentiles and peak RSS. Each scenario runs
+in a fresh subprocess so peak RSS belongs to that scenario alone; the
+mock server lives in the parent process.
+
+Usage (from ``clients/python``)::
+
+    python -m benchmarks.run                      # all scenarios
+    python -m benchmarks.run -s deep_pagination   # one scenario
+    python -m benchmarks.run --latency 0.02 --rate-limit-every 50 --json results.json
+    python -m benchmarks.run --compress           # measure compressed transfer
+    python -m benchmarks.run -s search_fanout --slow-every 20 --slow-latency 0.2 --hedge
+    python -m benchmarks.run -s search_fanout --latency 0.02 --capacity 4 --adaptive
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from lightfeed import LightfeedClient
+from lightfeed.instrumentation import MetricsAggregator
+
+from benchmarks.mock_server import MockLightfeedServer
+
+
+DATABASE_ID = "bench-db"
+
+# Records in the generated database for each scenario
+SCENARIO_RECORDS = {
+    "full_export": 20000,
+    "deep_pagination": 20000,
+    "search_fanout": 5000,
+    "decode_heavy": 5000,
+    "process_export": 20000,
+}
+
+# Characters of description text per record for each scenario
+SCENARIO_PAYLOAD = {
+    "full_export": 200,
+    "deep_pagination": 200,
+    "search_fanout": 200,
+    "decode_heavy": 4000,
+    "process_export": 4000,
+}
+
+SEARCH_QUERIES = 200
+
+
+def full_export(client: LightfeedClient, records: int) -> int:
+    """Exports the whole database with time-sliced parallel paging"""
+    end_time = "2100-01-01T00:00:00.000Z"
+    return sum(1 for _ in client.export_records(DATABASE_ID, start_time="2024-01-01T00:00:00.000Z", end_time=end_time))
+
+
+def deep_pagination(client: LightfeedClient, records: int) -> int:
+    """Follows the cursor chain page by page with small pages"""
+    return sum(1 for _ in client.iter_records(DATABASE_ID, {"limit": 100}))
+
+
+def search_fanout(client: LightfeedClient, records: int) -> int:
+    """Runs a batch of distinct semantic searches concurrently"""
+    queries = [{"search": {"text": f"query {i}"}, "pagination": {"limit": 50}} for i in range(SEARCH_QUERIES)]
+    results = client.search_many(DATABASE_ID, queries)
+    return sum(len(r.response["results"]) for r in results if r.response is not None)
+
+
+def decode_heavy(client: LightfeedClient, records: int) -> int:
+    """Reads large pages of wide records so JSON decoding dominates"""
+    return sum(1 for _ in client.iter_records(DATABASE_ID, {"limit": 500}))
+
+
+def process_export(client: LightfeedClient, records: int) -> int:
+    """Exports wide records to JSONL part files with one worker process per CPU"""
+    with tempfile.TemporaryDirectory() as directory:
+        manifest = client.export_files(DATABASE_ID, directory, start_time="2024-01-01T00:00:00.000Z", end_time="2100-01-01T00:00:00.000Z")
+    return manifest["records"]
+
+
+SCENARIOS: Dict[str, Callable[[LightfeedClient, int], int]] = {
+    "full_export": full_export,
+    "deep_pagination": deep_pagination,
+    "search_fanout": search_fanout,
+    "decode_heavy": decode_heavy,
+    "process_export": process_export,
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Returns the peak resident set size of this process in MiB"""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(name: str, base_url: str, records: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs one scenario in this process
+
+    Args:
+        name: Scenario name
+        base_url: URL of the mock server
+        records: Records in the mock database
+        config: Extra client configuration
+
+    Returns:
+        The measurements
+    """
+    metrics = MetricsAggregator()
+    client_config = dict({"apiKey": "benchmark", "baseUrl": base_url, "hooks": [metrics]}, **config)
+    with LightfeedClient(client_config) as client:
+        started = time.perf_counter()
+        count = SCENARIOS[name](client, records)
+        elapsed = time.perf_counter() - started
+
+    series = list(metrics.snapshot().values())
+    requests = sum(s["requests"] for s in series)
+    # All of a scenario's requests go to one endpoint
+    duration = series[0]["duration"] if series else {"p50": 0.0, "p99": 0.0}
+    decode = series[0]["phases"].get("decode", {}) if series else {}
+    return {
+        "scenario": name,
+        "records": count,
+        "seconds": round(elapsed, 3),
+        "records_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+        "requests": requests,
+        "rate_limited": sum(s["statuses"].get("429", 0) for s in series),
+        "p50_ms": round(duration["p50"] * 1000, 2),
+        "p99_ms": round(duration["p99"] * 1000, 2),
+        "decode_ms_total": round(decode.get("sum", 0.0) * 1000, 2),
+        "mb_in": round(sum(s["bytes_in"] for s in series) / 2 ** 20, 2),
+        "wire_mb_in": round(sum(s["wire_bytes_in"] for s in series) / 2 ** 20, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _run_in_subprocess(name: str, base_url: str, records: int, args: argparse.Namespace) -> Dict[str, Any]:
+    command = [
+        sys.executable, "-m", "benchmarks.run",
+        "--worker", name,
+        "--base-url", base_url,
+        "--records", str(records),
+        "--client-config", json.dumps(_client_config(args)),
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _client_config(args: argparse.Namespace) -> Dict[str, Any]:
+    config: Dict[str, Any] = {"jsonBackend": args.json_backend}
+    if args.rate_limit_every or args.capacity:
+        config["retry"] = {"maxRetries": 5}
+    if args.hedge:
+        config["hedging"] = {}
+    if args.adaptive:
+        config["adaptiveConcurrency"] = {}
+    return config
+
+
+def _print_table(results: List[Dict[str, Any]]) -> None:
+    columns = ["scenario", "records", "seconds", "records_per_sec", "requests", "rate_limited", "p50_ms", "p99_ms", "wire_mb_in", "peak_rss_mb"]
+    rows = [[str(r.get(c)) if not isinstance(r.get(c), float) else f"{r[c]:.1f}" for c in columns] for r in results]
+    widths = [max(len(c), *(len(row[i]) for row in rows)) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Lightfeed Python client against a local mock server")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--records", type=int, help="Override the number of records per scenario")
+    parser.add_argument("--payload-size", type=int, help="Override the description size per record")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of server latency per request")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every n-th request with 429")
+    parser.add_argument("--slow-every", type=int, default=0, help="Delay every n-th request by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="Extra seconds taken by the slow requests")
+    parser.add_argument("--hedge", action="store_true", help="Enable request hedging in the client")
+    parser.add_argument("--capacity", type=int, default=0, help="Answer requests beyond n in flight with 429")
+    parser.add_argument("--adaptive", action="store_true", help="Enable the adaptive concurrency limit in the client")
+    parser.add_argument("--compress", action="store_true", help="Compress responses with the best encoding the client accepts")
+    parser.add_argument("--json-backend", default="auto", help="Client JSON backend")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    # Internal: run a single scenario against an existing server
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--client-config", default="{}", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_scenario(args.worker, args.base_url, args.records, json.loads(args.client_config))
+        print(json.dumps(result))
+        return 0
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        records = args.records or SCENARIO_RECORDS[name]
+        payload_size = args.payload_size or SCENARIO_PAYLOAD[name]
+        server = MockLightfeedServer(
+            records=records,
+            payload_size=payload_size,
+            latency=args.latency,
+            rate_limit_every=args.rate_limit_every,
+            slow_every=args.slow_every,
+            slow_latency=args.slow_latency,
+            capacity=args.capacity,
+            compress=args.compress,
+        )
+        with server:
+            results.append(_run_in_subprocess(name, server.base_url, records, args))
+
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
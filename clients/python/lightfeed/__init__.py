@@ -1,32 +1,41 @@
 """
 Lightfeed API Client Library
 
-This library provides a convenient way to interact with the Lightfeed API to access 
+This library provides a convenient way to interact with the Lightfeed API to access
 your extracted web data programmatically.
+
+The exported names are loaded on first access, so ``import lightfeed`` stays
+cheap: the HTTP libraries are only imported once a client needs them.
 """
 
-from lightfeed.client import LightfeedClient
-from lightfeed.models import (
-    LightfeedConfig,
-    Record,
-    Timestamps,
-    GetRecordsParams,
-    SearchRecordsParams,
-    FilterRecordsParams,
-    TimeRange,
-    SearchParams,
-    Filter,
-    Condition,
-    Operator,
-    ColumnRule,
-    RuleGroup,
-    PaginationParams,
-    RecordsResponse,
-    Pagination,
-)
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from lightfeed.client import LightfeedClient
+    from lightfeed.async_client import AsyncLightfeedClient
+    from lightfeed.models import (
+        LightfeedConfig,
+        Record,
+        Timestamps,
+        GetRecordsParams,
+        SearchRecordsParams,
+        FilterRecordsParams,
+        TimeRange,
+        SearchParams,
+        Filter,
+        Condition,
+        Operator,
+        ColumnRule,
+        RuleGroup,
+        PaginationParams,
+        RecordsResponse,
+        Pagination,
+    )
 
 __all__ = [
     "LightfeedClient",
+    "AsyncLightfeedClient",
     "LightfeedConfig",
     "Record",
     "Timestamps",
@@ -45,4 +54,25 @@ __all__ = [
     "Pagination",
 ]
 
-__version__ = "0.1.0" 
\ No newline at end of file
+__version__ = "0.1.0"
+
+# Module defining each exported name
+_EXPORTS: Dict[str, str] = {
+    "LightfeedClient": "lightfeed.client",
+    "AsyncLightfeedClient": "lightfeed.async_client",
+}
+_EXPORTS.update((name, "lightfeed.models") for name in __all__ if name not in _EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'lightfeed' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    # Cache it so later lookups skip this hook
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
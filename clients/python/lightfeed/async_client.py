@@ -0,0 +1,481 @@
+"""
+Lightfeed asyncio API Client Implementation
+"""
+
+import asyncio
+import time
+from types import TracebackType
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type, cast
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    httpx = None  # type: ignore
+
+from lightfeed.client import (
+    DEFAULT_BASE_URL,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+    error_from_response,
+)
+from lightfeed.models import (
+    LightfeedConfig,
+    Record,
+    RecordsResponse,
+    GetRecordsParams,
+    SearchRecordsParams,
+    FilterRecordsParams,
+    LightfeedError,
+)
+from lightfeed.batch import BatchResult, run_batch_async
+from lightfeed.cache import canonical_key
+from lightfeed.coalesce import AsyncSingleFlight
+from lightfeed.compression import CompressionPolicy, httpx_encodings
+from lightfeed.decoding import get_codec
+from lightfeed.instrumentation import (
+    HttpxPhaseTracer,
+    Instrumentation,
+    RequestEvent,
+    RequestHooks,
+    page_context,
+)
+from lightfeed.retry import RetryPolicy, TokenBucket
+from lightfeed.pagination import (
+    initial_body_cursor,
+    initial_query_cursor,
+    next_cursor,
+    with_body_cursor,
+    with_query_cursor,
+)
+
+
+# Default maximum number of in-flight requests per client
+DEFAULT_MAX_CONCURRENCY = 100
+
+AsyncPageFetcher = Callable[[Optional[str]], Awaitable[RecordsResponse]]
+
+
+class AsyncLightfeedClient:
+    """
+    Lightfeed asyncio API Client
+
+    Non-blocking counterpart of ``LightfeedClient`` built on ``httpx``. All
+    requests share one connection pool and at most ``maxConcurrency`` of
+    them are in flight at once; further calls wait for a free slot.
+
+    Requires the optional ``httpx`` dependency (``pip install lightfeed-sdk[async]``).
+    """
+
+    def __init__(self, config: LightfeedConfig, transport: Optional[Any] = None) -> None:
+        """
+        Creates a new asyncio Lightfeed API client
+
+        Args:
+            config: Client configuration with API key and optional settings
+            transport: Optional httpx transport (e.g. for testing or custom networking)
+
+        Raises:
+            ImportError: If httpx is not installed
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncLightfeedClient requires httpx. "
+                "Install it with: pip install lightfeed-sdk[async]"
+            )
+
+        self.api_key = config["apiKey"]
+        self.base_url = config.get("baseUrl") or DEFAULT_BASE_URL
+        self.timeout = config.get("timeout") or DEFAULT_TIMEOUT
+        self.max_concurrency = config.get("maxConcurrency") or DEFAULT_MAX_CONCURRENCY
+        self.pool_maxsize = config.get("poolMaxsize") or DEFAULT_POOL_MAXSIZE
+        self.keep_alive = config.get("keepAlive", True) is not False
+        self.http2 = bool(config.get("http2", False))
+
+        # Prepare request headers used for all API calls
+        self.headers = {
+            "x-api-key": self.api_key,
+            "Content-Type": "application/json",
+        }
+
+        # Response encodings to accept and optional request body compression
+        self.compression = CompressionPolicy(config.get("compression"), httpx_encodings)
+        self.headers.update(self.compression.headers())
+
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.pool_maxsize if self.keep_alive else 0,
+        )
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            limits=limits,
+            http2=self.http2,
+            transport=transport,
+        )
+
+        # JSON backend used for request bodies and responses
+        self.codec = get_codec(config.get("jsonBackend") or "auto", bool(config.get("typedResponses", False)))
+
+        # Retries and client-side rate limiting are shared by all tasks
+        retry_config = config.get("retry")
+        self.retry_policy = RetryPolicy(retry_config) if retry_config is not None else None
+        rate_limit = config.get("rateLimit")
+        self.rate_limiter = TokenBucket(rate_limit, config.get("rateLimitBurst")) if rate_limit else None
+
+        # Hooks notified about every request attempt
+        self.instrumentation = Instrumentation(config.get("hooks"))
+
+        # Identical concurrent calls share one request unless disabled
+        coalesce = config.get("coalesceRequests", True) is not False
+        self.single_flight: Optional[AsyncSingleFlight] = AsyncSingleFlight() if coalesce else None
+
+        # Created lazily so it binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncLightfeedClient":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Closes the underlying connection pool"""
+        await self._client.aclose()
+
+    def add_hooks(self, hooks: RequestHooks) -> None:
+        """
+        Registers request hooks, e.g. a ``MetricsAggregator``
+
+        Args:
+            hooks: Hooks called for every request attempt
+        """
+        self.instrumentation.add(hooks)
+
+    async def get_records(
+        self, database_id: str, params: Optional[GetRecordsParams] = None
+    ) -> RecordsResponse:
+        """
+        Get all records from a database with optional filters
+
+        Args:
+            database_id: The database ID
+            params: Optional query parameters
+
+        Returns:
+            Records response containing results and pagination information
+
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        url = f"{self.base_url}/v1/databases/{database_id}/records"
+        key = canonical_key("records", database_id, params)
+        event = RequestEvent("records", database_id, "GET", url)
+        return await self._request(event, key, params=params)
+
+    async def search_records(
+        self, database_id: str, params: SearchRecordsParams
+    ) -> RecordsResponse:
+        """
+        Search records using semantic search with optional filters
+
+        Args:
+            database_id: The database ID
+            params: Search parameters including search text, filters, and pagination
+
+        Returns:
+            Records response containing results and pagination information
+
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        url = f"{self.base_url}/v1/databases/{database_id}/records/search"
+        key = canonical_key("search", database_id, params)
+        event = RequestEvent("search", database_id, "POST", url)
+        return await self._request(event, key, content=self.codec.dumps(params))
+
+    async def filter_records(
+        self, database_id: str, params: FilterRecordsParams
+    ) -> RecordsResponse:
+        """
+        Filter records using complex filter expressions
+
+        Args:
+            database_id: The database ID
+            params: Filter parameters including filter rules, time range, and pagination
+
+        Returns:
+            Records response containing results and pagination information
+
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        url = f"{self.base_url}/v1/databases/{database_id}/records/filter"
+        key = canonical_key("filter", database_id, params)
+        event = RequestEvent("filter", database_id, "POST", url)
+        return await self._request(event, key, content=self.codec.dumps(params))
+
+    async def search_many(
+        self,
+        database_id: str,
+        queries: Sequence[SearchRecordsParams],
+        max_concurrency: Optional[int] = None,
+    ) -> List[BatchResult]:
+        """
+        Runs many semantic searches against one database concurrently
+
+        Identical queries are sent once. A failed query is reported in its
+        result (``error``) instead of aborting the rest of the batch.
+
+        Args:
+            database_id: The database ID
+            queries: Search parameters, one per query
+            max_concurrency: Optional lower limit on queries in flight for this batch
+
+        Returns:
+            One ``BatchResult`` per query, in input order
+        """
+        return await run_batch_async(self.search_records, "search", database_id, queries, max_concurrency)
+
+    async def filter_many(
+        self,
+        database_id: str,
+        queries: Sequence[FilterRecordsParams],
+        max_concurrency: Optional[int] = None,
+    ) -> List[BatchResult]:
+        """
+        Runs many filter queries against one database concurrently
+
+        Identical queries are sent once. A failed query is reported in its
+        result (``error``) instead of aborting the rest of the batch.
+
+        Args:
+            database_id: The database ID
+            queries: Filter parameters, one per query
+            max_concurrency: Optional lower limit on queries in flight for this batch
+
+        Returns:
+            One ``BatchResult`` per query, in input order
+        """
+        return await run_batch_async(self.filter_records, "filter", database_id, queries, max_concurrency)
+
+    def iter_records(
+        self, database_id: str, params: Optional[GetRecordsParams] = None
+    ) -> AsyncIterator[Record]:
+        """
+        Asynchronously iterates over all records of a database
+
+        Args:
+            database_id: The database ID
+            params: Optional query parameters (``cursor`` sets the starting page)
+
+        Returns:
+            Async iterator over records
+        """
+        async def fetch(cursor: Optional[str]) -> RecordsResponse:
+            return await self.get_records(database_id, with_query_cursor(params, cursor))
+
+        return _iter_records(fetch, initial_query_cursor(params))
+
+    def iter_search(
+        self, database_id: str, params: SearchRecordsParams
+    ) -> AsyncIterator[Record]:
+        """
+        Asynchronously iterates over all semantic search results
+
+        Args:
+            database_id: The database ID
+            params: Search parameters (``pagination.cursor`` sets the starting page)
+
+        Returns:
+            Async iterator over records
+        """
+        async def fetch(cursor: Optional[str]) -> RecordsResponse:
+            page_params = cast(SearchRecordsParams, with_body_cursor(cast(Dict[str, Any], params), cursor))
+            return await self.search_records(database_id, page_params)
+
+        return _iter_records(fetch, initial_body_cursor(params))
+
+    def iter_filter(
+        self, database_id: str, params: FilterRecordsParams
+    ) -> AsyncIterator[Record]:
+        """
+        Asynchronously iterates over all records matching a filter
+
+        Args:
+            database_id: The database ID
+            params: Filter parameters (``pagination.cursor`` sets the starting page)
+
+        Returns:
+            Async iterator over records
+        """
+        async def fetch(cursor: Optional[str]) -> RecordsResponse:
+            page_params = cast(FilterRecordsParams, with_body_cursor(cast(Dict[str, Any], params), cursor))
+            return await self.filter_records(database_id, page_params)
+
+        return _iter_records(fetch, initial_body_cursor(params))
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _request(
+        self, event: RequestEvent, key: Optional[str] = None, **kwargs: Any
+    ) -> RecordsResponse:
+        """
+        Sends a request, joining an identical one already in flight, and decodes the response
+
+        Callers sharing a request receive the same raw body (or exception)
+        and decode it separately, so they never share mutable results. Only
+        the caller that actually sent the request reports it to the hooks.
+
+        Args:
+            event: Event describing the request (endpoint, database, method, URL)
+            key: Canonical request key, or None to always send
+            **kwargs: Extra arguments passed to httpx (params, content)
+
+        Returns:
+            Decoded records response
+
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        sent = []
+
+        async def send() -> Tuple[bytes, RequestEvent]:
+            sent.append(True)
+            return await self._send(event, **kwargs)
+
+        if key is None or self.single_flight is None:
+            content, last_event = await send()
+        else:
+            content, last_event = await self.single_flight.do(key, send)
+        if not sent:
+            return self._decode(content)
+
+        started = time.perf_counter()
+        try:
+            response = self._decode(content)
+        except LightfeedError as e:
+            self.instrumentation.error(last_event, e)
+            raise
+        last_event.add_phase("decode", time.perf_counter() - started)
+        last_event.records = len(response.get("results") or [])
+        self.instrumentation.response(last_event)
+        return response
+
+    async def _send(self, event: RequestEvent, **kwargs: Any) -> Tuple[bytes, RequestEvent]:
+        """
+        Sends a request once a concurrency slot is free
+
+        Waits for the client-side rate limiter before each attempt and retries
+        failures according to the retry policy, if configured. Backoff delays
+        are spent outside the concurrency limit. Every attempt is reported to
+        the hooks with its own event, including connection phases traced by httpx.
+
+        Args:
+            event: Event describing the request
+            **kwargs: Extra arguments passed to httpx (params, content)
+
+        Returns:
+            Raw response body and the event of the successful attempt
+
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        body = kwargs.get("content")
+        if body:
+            kwargs["content"], encoding = self.compression.compress(body)
+            if encoding is not None:
+                kwargs["headers"] = {"Content-Encoding": encoding}
+        while True:
+            waited = time.perf_counter()
+            await self._wait_for_turn()
+            async with self._get_semaphore():
+                event.add_phase("wait", time.perf_counter() - waited)
+                event.bytes_out = len(body) if body else 0
+                event.wire_bytes_out = len(kwargs["content"]) if body else 0
+                self.instrumentation.request_start(event)
+                error: Optional[LightfeedError] = None
+                try:
+                    response = await self._client.request(
+                        event.method, event.url, extensions={"trace": HttpxPhaseTracer(event)}, **kwargs
+                    )
+                    event.status = response.status_code
+                    event.bytes_in = len(response.content)
+                    event.wire_bytes_in = response.num_bytes_downloaded
+                    response.raise_for_status()
+                    return response.content, event
+                except httpx.HTTPStatusError as e:
+                    delay = self._retry_delay(event.attempt, e.response.status_code, e.response.headers)
+                    error = error_from_response(e.response)
+                except httpx.TransportError as e:
+                    # For network errors, connection issues, etc.
+                    event.timed_out = isinstance(e, httpx.TimeoutException)
+                    delay = self._retry_delay(event.attempt, None)
+                    error = LightfeedError(500, str(e))
+                except httpx.HTTPError as e:
+                    delay = None
+                    error = LightfeedError(500, str(e))
+                self.instrumentation.error(event, error, will_retry=delay is not None)
+                if delay is None:
+                    raise error
+            await asyncio.sleep(delay)
+            event = event.retry()
+
+    def _decode(self, content: bytes) -> RecordsResponse:
+        try:
+            return self.codec.decode_response(content)
+        except self.codec.decode_errors as e:
+            raise LightfeedError(500, f"Invalid response body: {e}")
+
+    async def _wait_for_turn(self) -> None:
+        """Waits out any shared server-requested pause and takes a rate limiter token"""
+        delay = 0.0
+        if self.retry_policy is not None:
+            delay = self.retry_policy.pause_remaining()
+        if self.rate_limiter is not None:
+            delay = max(delay, self.rate_limiter.reserve())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, status: Optional[int], headers: Any = None) -> Optional[float]:
+        if self.retry_policy is None:
+            return None
+        return self.retry_policy.delay_for(attempt, status, headers)
+
+
+async def _iter_records(fetch: AsyncPageFetcher, cursor: Optional[str]) -> AsyncIterator[Record]:
+    """
+    Walks a cursor chain, requesting the next page while the current one is consumed
+
+    Args:
+        fetch: Coroutine function fetching the page at a given cursor
+        cursor: Cursor of the first page
+
+    Returns:
+        Async iterator over records
+    """
+    page_number = 1
+    with page_context(page_number):
+        pending: Optional["asyncio.Future[RecordsResponse]"] = asyncio.ensure_future(fetch(cursor))
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+            page_cursor = next_cursor(page)
+            if page_cursor is not None:
+                page_number += 1
+                # The task copies the context, so its requests see the page number
+                with page_context(page_number):
+                    pending = asyncio.ensure_future(fetch(page_cursor))
+            for record in page.get("results") or []:
+                yield record
+    finally:
+        if pending is not None:
+            pending.cancel()
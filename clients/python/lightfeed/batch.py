@@ -0,0 +1,129 @@
+"""
+Concurrent fan-out of many search or filter queries against one database
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from lightfeed.cache import canonical_key
+from lightfeed.models import LightfeedError, RecordsResponse
+
+
+# Default number of queries sent concurrently by the threaded client
+DEFAULT_BATCH_WORKERS = 10
+
+
+class BatchResult(NamedTuple):
+    """Outcome of one query of a batch; exactly one of response and error is set"""
+
+    params: Any
+    response: Optional[RecordsResponse]
+    error: Optional[LightfeedError]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _unique_queries(endpoint: str, database_id: str, queries: Sequence[Any]) -> Dict[str, Any]:
+    """Maps canonical keys to the first params with that key, in input order"""
+    unique: Dict[str, Any] = {}
+    for params in queries:
+        unique.setdefault(canonical_key(endpoint, database_id, params), params)
+    return unique
+
+
+def _results(
+    endpoint: str,
+    database_id: str,
+    queries: Sequence[Any],
+    outcomes: Dict[str, BatchResult],
+) -> List[BatchResult]:
+    """Expands the outcomes of unique queries back to one result per input query"""
+    results = []
+    for params in queries:
+        outcome = outcomes[canonical_key(endpoint, database_id, params)]
+        results.append(outcome._replace(params=params))
+    return results
+
+
+def run_batch(
+    call: Callable[[str, Any], RecordsResponse],
+    endpoint: str,
+    database_id: str,
+    queries: Sequence[Any],
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+) -> List[BatchResult]:
+    """
+    Runs queries concurrently in a thread pool
+
+    Queries with identical canonical params are sent once and share the
+    result. A failing query is reported in its result instead of aborting
+    the batch.
+
+    Args:
+        call: Client method sending one query, e.g. ``client.search_records``
+        endpoint: Endpoint name used to identify identical queries
+        database_id: The database ID
+        queries: Query parameters, one per query
+        max_workers: Maximum number of queries in flight
+
+    Returns:
+        One result per query, in input order
+    """
+    unique = _unique_queries(endpoint, database_id, queries)
+    if not unique:
+        return []
+
+    def run(params: Any) -> BatchResult:
+        try:
+            return BatchResult(params, call(database_id, params), None)
+        except LightfeedError as e:
+            return BatchResult(params, None, e)
+
+    workers = max(1, min(max_workers, len(unique)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = dict(zip(unique, executor.map(run, unique.values())))
+    return _results(endpoint, database_id, queries, outcomes)
+
+
+async def run_batch_async(
+    call: Callable[[str, Any], Awaitable[RecordsResponse]],
+    endpoint: str,
+    database_id: str,
+    queries: Sequence[Any],
+    max_concurrency: Optional[int] = None,
+) -> List[BatchResult]:
+    """
+    Runs queries concurrently on the event loop
+
+    Asyncio counterpart of ``run_batch``. The client's own concurrency limit
+    still applies; ``max_concurrency`` can lower it for this batch.
+
+    Args:
+        call: Client coroutine sending one query, e.g. ``client.search_records``
+        endpoint: Endpoint name used to identify identical queries
+        database_id: The database ID
+        queries: Query parameters, one per query
+        max_concurrency: Optional limit on queries in flight for this batch
+
+    Returns:
+        One result per query, in input order
+    """
+    # Only the async client needs asyncio; it is already loaded when this runs
+    import asyncio
+
+    unique = _unique_queries(endpoint, database_id, queries)
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def run(params: Any) -> BatchResult:
+        try:
+            if semaphore is None:
+                return BatchResult(params, await call(database_id, params), None)
+            async with semaphore:
+                return BatchResult(params, await call(database_id, params), None)
+        except LightfeedError as e:
+            return BatchResult(params, None, e)
+
+    outcomes = await asyncio.gather(*[run(params) for params in unique.values()])
+    return _results(endpoint, database_id, queries, dict(zip(unique, outcomes)))
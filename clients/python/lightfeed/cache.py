@@ -0,0 +1,343 @@
+"""
+Local response cache for search and filter requests
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# Default cache settings
+DEFAULT_CACHE_TTL = 60.0  # seconds
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MiB
+
+# Stores between two rescans of a disk cache's directory
+DISK_RESCAN_EVERY = 64
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    Normalizes request parameters so equal requests compare equal
+
+    Enum members (``Condition``, ``Operator``) become their values and
+    dictionary keys become strings. Key order is normalized when the result
+    is serialized with ``sort_keys=True``.
+
+    Args:
+        value: Request parameters or any nested part of them
+
+    Returns:
+        A JSON serializable, canonical copy of the value
+    """
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {str(canonicalize(k)): canonicalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(v) for v in value]
+    return value
+
+
+def cache_scope(api_key: str, base_url: str) -> str:
+    """
+    Builds the scope that keeps cached responses of different credentials apart
+
+    Args:
+        api_key: API key the responses were fetched with
+        base_url: Base URL of the API
+
+    Returns:
+        Hex digest of the API key and base URL
+    """
+    return hashlib.sha256(f"{api_key}\n{base_url}".encode("utf-8")).hexdigest()
+
+
+def canonical_key(endpoint: str, database_id: str, params: Any, scope: str = "") -> str:
+    """
+    Builds a stable key identifying a request
+
+    Args:
+        endpoint: Endpoint name (e.g. ``search`` or ``filter``)
+        database_id: The database ID
+        params: Request parameters
+        scope: Scope from ``cache_scope``, so clients with other credentials
+            or another API never share entries
+
+    Returns:
+        Hex digest of the canonical request
+    """
+    payload = json.dumps(
+        [scope, endpoint, database_id, canonicalize(params)],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    Base class for response caches with TTL expiry and LRU eviction
+
+    Entries are raw response bodies, so every hit is decoded into a fresh
+    copy that callers may modify freely. Subclasses implement the abstract
+    storage primitives.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Creates a response cache
+
+        Args:
+            ttl: Seconds a cached response stays valid
+            max_bytes: Upper bound of the serialized size of all entries
+            clock: Wall clock, for testing
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Looks up a cached response body
+
+        Args:
+            key: Request key from ``canonical_key``
+
+        Returns:
+            The cached body, or None on a miss
+        """
+        with self._lock:
+            entry = self._load(key)
+            if entry is not None and entry[0] <= self._clock():
+                self._delete(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, data: bytes) -> None:
+        """
+        Stores a response body, evicting least recently used entries if needed
+
+        Args:
+            key: Request key from ``canonical_key``
+            data: The raw response body
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._store(key, self._clock() + self.ttl, data)
+            self._evict(self.max_bytes)
+
+    def clear(self) -> None:
+        """Removes every entry"""
+        with self._lock:
+            self._evict(0)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns cache counters
+
+        Returns:
+            Hits, misses, number of entries and their total size in bytes
+        """
+        with self._lock:
+            entries, size = self._usage()
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    # Storage primitives, called with the lock held
+
+    @abstractmethod
+    def _load(self, key: str) -> Optional[Tuple[float, bytes]]:
+        """Returns ``(expires_at, data)`` and marks the entry as recently used"""
+
+    @abstractmethod
+    def _store(self, key: str, expires_at: float, data: bytes) -> None:
+        """Stores an entry, replacing any entry with the same key"""
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        """Removes an entry if present"""
+
+    @abstractmethod
+    def _evict(self, max_bytes: int) -> None:
+        """Drops least recently used entries until the total size fits"""
+
+    @abstractmethod
+    def _usage(self) -> Tuple[int, int]:
+        """Returns the number of entries and their total size"""
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process response cache"""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(ttl, max_bytes, clock)
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._size = 0
+
+    def _load(self, key: str) -> Optional[Tuple[float, bytes]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, expires_at: float, data: bytes) -> None:
+        self._delete(key)
+        self._entries[key] = (expires_at, data)
+        self._size += len(data)
+
+    def _delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def _evict(self, max_bytes: int) -> None:
+        while self._size > max_bytes and self._entries:
+            _, (_, data) = self._entries.popitem(last=False)
+            self._size -= len(data)
+
+    def _usage(self) -> Tuple[int, int]:
+        return len(self._entries), self._size
+
+
+class DiskResponseCache(ResponseCache):
+    """
+    Response cache persisted as one file per entry
+
+    The cache survives restarts and can be shared by processes on one host.
+    Recency and sizes are tracked in memory, so storing an entry touches
+    only its own file. Recency is also recorded in the file modification
+    times, and the in-memory index is rebuilt from the directory on start,
+    every ``DISK_RESCAN_EVERY`` stores and for ``stats``, picking up
+    entries written or removed by other processes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Creates a disk response cache
+
+        Args:
+            directory: Directory holding the cache files (created if missing)
+            ttl: Seconds a cached response stays valid
+            max_bytes: Upper bound of the total size of the cache files
+            clock: Wall clock, for testing
+        """
+        super().__init__(ttl, max_bytes, clock)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # File name -> size, least recently used first
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._stores = 0
+        self._rescan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def _load(self, key: str) -> Optional[Tuple[float, bytes]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            header, _, data = content.partition(b"\n")
+            expires_at = float(header)
+            now = self._clock()
+            os.utime(path, (now, now))
+        except (OSError, ValueError):
+            self._forget(key + ".json")
+            return None
+        self._track(key + ".json", len(content))
+        return expires_at, data
+
+    def _store(self, key: str, expires_at: float, data: bytes) -> None:
+        # Write to a temporary file and rename it into place
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        header = repr(expires_at).encode("ascii") + b"\n"
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                f.write(data)
+            now = self._clock()
+            os.utime(tmp_path, (now, now))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._track(key + ".json", len(header) + len(data))
+        self._stores += 1
+        if self._stores % DISK_RESCAN_EVERY == 0:
+            self._rescan()
+
+    def _delete(self, key: str) -> None:
+        self._unlink(key + ".json")
+
+    def _evict(self, max_bytes: int) -> None:
+        while self._size > max_bytes and self._index:
+            self._unlink(next(iter(self._index)))
+
+    def _usage(self) -> Tuple[int, int]:
+        self._rescan()
+        return len(self._index), self._size
+
+    def _track(self, name: str, size: int) -> None:
+        """Records an entry's size and marks it as the most recently used"""
+        self._forget(name)
+        self._index[name] = size
+        self._size += size
+
+    def _forget(self, name: str) -> None:
+        size = self._index.pop(name, None)
+        if size is not None:
+            self._size -= size
+
+    def _unlink(self, name: str) -> None:
+        self._forget(name)
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def _rescan(self) -> None:
+        """Rebuilds the index from the files in the directory, ordered by modification time"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((name, size) for _, name, size in entries)
+        self._size = sum(self._index.values())
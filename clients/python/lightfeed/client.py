@@ -3,24 +3,74 @@ Lightfeed API Client Implementation
 """
 
 import json
-from typing import Any, Dict, Optional, cast
-
-import requests
-from requests.exceptions import RequestException
+import threading
+import time
+from contextlib import nullcontext
+from types import TracebackType
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union, cast
 
 from lightfeed.models import (
     LightfeedConfig,
+    Record,
     RecordsResponse,
     GetRecordsParams,
     SearchRecordsParams,
     FilterRecordsParams,
     LightfeedError,
 )
+from lightfeed.cache import (
+    DEFAULT_CACHE_MAX_BYTES,
+    DEFAULT_CACHE_TTL,
+    DiskResponseCache,
+    MemoryResponseCache,
+    ResponseCache,
+    cache_scope,
+    canonical_key,
+)
+from lightfeed.batch import BatchResult, run_batch
+from lightfeed.coalesce import SingleFlight
+from lightfeed.concurrency import AdaptiveLimiter, CircuitBreaker
+from lightfeed.compression import CompressionPolicy, requests_encodings, wire_bytes
+from lightfeed.decoding import get_codec
+from lightfeed.instrumentation import Instrumentation, RequestEvent, RequestHooks
+from lightfeed.export import DEFAULT_MAX_WORKERS, DEFAULT_SLICES, TimeSlicedExporter
+from lightfeed.hedging import CLIENT_CLOSED_REQUEST, CancelToken, HedgeCancelled, HedgingPolicy, abortable, abortable_adapter
+from lightfeed.planner import planned_filter
+from lightfeed.page_size import (
+    DEFAULT_INITIAL_LIMIT,
+    DEFAULT_MAX_PAGE_SECONDS,
+    AdaptivePageSize,
+    SizedPageFetcher,
+    adaptive_fetcher,
+)
+from lightfeed.process_export import ExportManifest, ProcessPoolExporter, RecordTransform
+from lightfeed.retry import RetryPolicy, TokenBucket
+from lightfeed.streaming import STREAM_CHUNK_SIZE, RecordStream
+from lightfeed.sync import CheckpointStore, IncrementalSync
+from lightfeed.topk import FederatedHit, federated_search, top_k_search
+from lightfeed.pagination import (
+    DEFAULT_PREFETCH,
+    PageFetcher,
+    initial_body_cursor,
+    initial_query_cursor,
+    iter_page_records,
+    iter_pages,
+    with_body_cursor,
+    with_query_cursor,
+)
+
+if TYPE_CHECKING:
+    # requests is imported when the first session is built, see _build_session
+    import requests
+    from requests.exceptions import RequestException
 
 
 # Default configuration values
 DEFAULT_BASE_URL = "https://api.lightfeed.ai"
 DEFAULT_TIMEOUT = 30.0  # 30 seconds
+DEFAULT_POOL_CONNECTIONS = 10  # Number of per-host pools to cache
+DEFAULT_POOL_MAXSIZE = 10  # Connections kept open per host
 
 
 class LightfeedClient:
@@ -28,6 +78,12 @@ class LightfeedClient:
     Lightfeed API Client
     
     Client for interacting with the Lightfeed API to access your extracted web data.
+    
+    The client owns a pooled HTTP session so consecutive requests (e.g. while
+    paging through a database) reuse open keep-alive connections instead of
+    performing a new TCP and TLS handshake each time. The session is safe to
+    share between threads. Call ``close()`` or use the client as a context
+    manager to release pooled connections.
     """
 
     def __init__(self, config: LightfeedConfig) -> None:
@@ -37,15 +93,112 @@ class LightfeedClient:
         Args:
             config: Client configuration with API key and optional settings
         """
+        self.config = config
         self.api_key = config["apiKey"]
         self.base_url = config.get("baseUrl") or DEFAULT_BASE_URL
         self.timeout = config.get("timeout") or DEFAULT_TIMEOUT
         
+        # Connection pool settings
+        self.pool_connections = config.get("poolConnections") or DEFAULT_POOL_CONNECTIONS
+        self.pool_maxsize = config.get("poolMaxsize") or DEFAULT_POOL_MAXSIZE
+        self.pool_block = bool(config.get("poolBlock", False))
+        self.keep_alive = config.get("keepAlive", True) is not False
+        self.adapters: Dict[str, Any] = dict(config.get("adapters") or {})
+        
         # Prepare request headers used for all API calls
         self.headers = {
             "x-api-key": self.api_key,
             "Content-Type": "application/json",
         }
+        if not self.keep_alive:
+            self.headers["Connection"] = "close"
+        
+        # Response encodings to accept and optional request body compression;
+        # Accept-Encoding is set on the session, once urllib3 can be asked what it decodes
+        self.compression = CompressionPolicy(config.get("compression"), requests_encodings)
+        
+        # JSON backend used for request bodies and responses
+        self.codec = get_codec(config.get("jsonBackend") or "auto", bool(config.get("typedResponses", False)))
+        
+        # Retries and client-side rate limiting are shared by all threads
+        retry_config = config.get("retry")
+        self.retry_policy = RetryPolicy(retry_config) if retry_config is not None else None
+        rate_limit = config.get("rateLimit")
+        self.rate_limiter = TokenBucket(rate_limit, config.get("rateLimitBurst")) if rate_limit else None
+        
+        # Optional local cache for search and filter responses
+        self.cache: Optional[ResponseCache] = None
+        self.cache_scope = cache_scope(self.api_key, self.base_url)
+        cache_config = config.get("cache")
+        if cache_config is not None:
+            ttl = cache_config.get("ttl") or DEFAULT_CACHE_TTL
+            max_bytes = cache_config.get("maxBytes") or DEFAULT_CACHE_MAX_BYTES
+            directory = cache_config.get("directory")
+            if directory:
+                self.cache = DiskResponseCache(directory, ttl=ttl, max_bytes=max_bytes)
+            else:
+                self.cache = MemoryResponseCache(ttl=ttl, max_bytes=max_bytes)
+        
+        # Hooks notified about every request attempt
+        self.instrumentation = Instrumentation(config.get("hooks"))
+        
+        # Identical concurrent calls share one request unless disabled
+        coalesce = config.get("coalesceRequests", True) is not False
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if coalesce else None
+        
+        # Optional duplicate requests for slow idempotent calls
+        hedging_config = config.get("hedging")
+        self.hedging: Optional[HedgingPolicy] = None
+        if hedging_config is not None:
+            self.hedging = HedgingPolicy(hedging_config, max_workers=2 * self.pool_maxsize)
+        
+        # Optional self-tuning in-flight limit and fail-fast circuits, shared by all threads
+        concurrency_config = config.get("adaptiveConcurrency")
+        self.concurrency: Optional[AdaptiveLimiter] = None
+        if concurrency_config is not None:
+            self.concurrency = AdaptiveLimiter(concurrency_config)
+        breaker_config = config.get("circuitBreaker")
+        self.circuit_breaker: Optional[CircuitBreaker] = None
+        if breaker_config is not None:
+            self.circuit_breaker = CircuitBreaker(breaker_config)
+        
+        # The session is created lazily on first use and shared by all threads
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+
+    def __enter__(self) -> "LightfeedClient":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the underlying HTTP session and releases pooled connections
+        
+        The client can still be used afterwards; a new session is created on
+        the next request.
+        """
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+        if self.hedging is not None:
+            self.hedging.close()
+
+    def add_hooks(self, hooks: RequestHooks) -> None:
+        """
+        Registers request hooks, e.g. a ``MetricsAggregator``
+        
+        Args:
+            hooks: Hooks called for every request attempt
+        """
+        self.instrumentation.add(hooks)
 
     def get_records(
         self, database_id: str, params: Optional[GetRecordsParams] = None
@@ -64,18 +217,11 @@ class LightfeedClient:
             LightfeedError: If the API request fails
         """
         url = f"{self.base_url}/v1/databases/{database_id}/records"
+        key = canonical_key("records", database_id, params, self.cache_scope)
         
-        try:
-            response = requests.get(
-                url, 
-                headers=self.headers, 
-                params=params, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return cast(RecordsResponse, response.json())
-        except RequestException as e:
-            raise self._handle_error(e)
+        event = RequestEvent("records", database_id, "GET", url)
+        
+        return self._request(event, key, params=params)
 
     def search_records(
         self, database_id: str, params: SearchRecordsParams
@@ -95,17 +241,7 @@ class LightfeedClient:
         """
         url = f"{self.base_url}/v1/databases/{database_id}/records/search"
         
-        try:
-            response = requests.post(
-                url, 
-                headers=self.headers, 
-                json=params, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return cast(RecordsResponse, response.json())
-        except RequestException as e:
-            raise self._handle_error(e)
+        return self._cached_request("search", database_id, url, params)
 
     def filter_records(
         self, database_id: str, params: FilterRecordsParams
@@ -125,19 +261,902 @@ class LightfeedClient:
         """
         url = f"{self.base_url}/v1/databases/{database_id}/records/filter"
         
+        return self._cached_request("filter", database_id, url, params)
+
+    def filter_records_planned(
+        self,
+        database_id: str,
+        params: FilterRecordsParams,
+        split: bool = True,
+        max_workers: Optional[int] = None,
+        max_branches: Optional[int] = None,
+    ) -> RecordsResponse:
+        """
+        Filter records after simplifying the filter, splitting a top-level OR into concurrent queries
+        
+        The filter is normalized first: nested groups with the same condition
+        are flattened, duplicate rules dropped and trivially true or false
+        branches folded. A filter that can never match returns an empty page
+        without a request. If the result is an OR of several branches, each
+        branch (or group of branches) is sent as its own query and the pages
+        are merged in ``(synced_at, id)`` order, deduplicated by ``id`` and
+        cut to the requested limit. The ``next_cursor`` of a merged page
+        continues the merge when passed back with the same filter.
+        
+        Args:
+            database_id: The database ID
+            params: Filter parameters including filter rules, time range, and pagination
+            split: Split a top-level OR into concurrent queries (a query with an API cursor is never split)
+            max_workers: Maximum number of queries in flight (defaults to the pool size)
+            max_branches: Maximum number of queries per split (defaults to max_workers)
+            
+        Returns:
+            Records response containing results and pagination information
+            
+        Raises:
+            ValueError: If the cursor belongs to another filter or ``max_branches``
+            LightfeedError: If a query fails
+        """
+        return planned_filter(
+            self.filter_records, database_id, params, max_workers or self.pool_maxsize, max_branches, split
+        )
+
+    def get_records_stream(
+        self,
+        database_id: str,
+        params: Optional[GetRecordsParams] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> RecordStream:
+        """
+        Get one page of records, decoding them while the body downloads
+        
+        Unlike ``get_records`` the body is never held in memory as a whole:
+        each record is parsed as soon as it has arrived, so peak memory
+        stays near one record plus one chunk even at ``limit=500``.
+        Streamed requests bypass the response cache and request coalescing.
+        
+        Args:
+            database_id: The database ID
+            params: Optional query parameters
+            chunk_size: Bytes read from the connection at a time
+            
+        Returns:
+            Stream of the page's records; its ``pagination`` is set once exhausted
+            
+        Raises:
+            LightfeedError: If the API request fails, or while iterating if
+                the body cannot be read or parsed
+        """
+        url = f"{self.base_url}/v1/databases/{database_id}/records"
+        event = RequestEvent("records", database_id, "GET", url)
+        return self._stream(event, chunk_size, params=params)
+
+    def search_records_stream(
+        self,
+        database_id: str,
+        params: SearchRecordsParams,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> RecordStream:
+        """
+        Search records, decoding them while the body downloads
+        
+        See ``get_records_stream``.
+        
+        Args:
+            database_id: The database ID
+            params: Search parameters including search text, filters, and pagination
+            chunk_size: Bytes read from the connection at a time
+            
+        Returns:
+            Stream of the page's records; its ``pagination`` is set once exhausted
+            
+        Raises:
+            LightfeedError: If the API request fails, or while iterating if
+                the body cannot be read or parsed
+        """
+        url = f"{self.base_url}/v1/databases/{database_id}/records/search"
+        event = RequestEvent("search", database_id, "POST", url)
+        return self._stream(event, chunk_size, data=self.codec.dumps(params))
+
+    def filter_records_stream(
+        self,
+        database_id: str,
+        params: FilterRecordsParams,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> RecordStream:
+        """
+        Filter records, decoding them while the body downloads
+        
+        See ``get_records_stream``.
+        
+        Args:
+            database_id: The database ID
+            params: Filter parameters including filter rules, time range, and pagination
+            chunk_size: Bytes read from the connection at a time
+            
+        Returns:
+            Stream of the page's records; its ``pagination`` is set once exhausted
+            
+        Raises:
+            LightfeedError: If the API request fails, or while iterating if
+                the body cannot be read or parsed
+        """
+        url = f"{self.base_url}/v1/databases/{database_id}/records/filter"
+        event = RequestEvent("filter", database_id, "POST", url)
+        return self._stream(event, chunk_size, data=self.codec.dumps(params))
+
+    def search_many(
+        self,
+        database_id: str,
+        queries: Sequence[SearchRecordsParams],
+        max_workers: Optional[int] = None,
+    ) -> List[BatchResult]:
+        """
+        Runs many semantic searches against one database concurrently
+        
+        Identical queries are sent once. A failed query is reported in its
+        result (``error``) instead of aborting the rest of the batch.
+        
+        Args:
+            database_id: The database ID
+            queries: Search parameters, one per query
+            max_workers: Maximum number of queries in flight (defaults to the pool size)
+            
+        Returns:
+            One ``BatchResult`` per query, in input order
+        """
+        return run_batch(
+            self.search_records, "search", database_id, queries, max_workers or self.pool_maxsize
+        )
+
+    def filter_many(
+        self,
+        database_id: str,
+        queries: Sequence[FilterRecordsParams],
+        max_workers: Optional[int] = None,
+    ) -> List[BatchResult]:
+        """
+        Runs many filter queries against one database concurrently
+        
+        Identical queries are sent once. A failed query is reported in its
+        result (``error``) instead of aborting the rest of the batch.
+        
+        Args:
+            database_id: The database ID
+            queries: Filter parameters, one per query
+            max_workers: Maximum number of queries in flight (defaults to the pool size)
+            
+        Returns:
+            One ``BatchResult`` per query, in input order
+        """
+        return run_batch(
+            self.filter_records, "filter", database_id, queries, max_workers or self.pool_maxsize
+        )
+
+    def search_top_k(
+        self,
+        database_id: str,
+        params: SearchRecordsParams,
+        k: int,
+        dedupe: bool = True,
+        min_relative_score: Optional[float] = None,
+    ) -> List[Record]:
+        """
+        Returns the best k results of a semantic search with as few requests as possible
+        
+        Page sizes follow k: the first page asks for k results and later pages
+        only for the number still missing. Paging stops once k results are in
+        hand or scores fall below ``search.threshold`` (or below
+        ``min_relative_score`` times the best score).
+        
+        Args:
+            database_id: The database ID
+            params: Search parameters (``pagination`` is chosen by the client)
+            k: Number of results to return
+            dedupe: Drop results whose ``id`` was already returned, e.g. by overlapping pages
+            min_relative_score: Drop results scoring below this fraction of the best score
+            
+        Returns:
+            Up to k records, highest ``relevance_score`` first
+            
+        Raises:
+            LightfeedError: If a search fails
+        """
+        return top_k_search(self.search_records, database_id, params, k, dedupe, min_relative_score)
+
+    def federated_search(
+        self,
+        database_ids: Sequence[str],
+        params: SearchRecordsParams,
+        k: int,
+        max_workers: Optional[int] = None,
+    ) -> List[FederatedHit]:
+        """
+        Runs one semantic search against several databases and returns the best k results
+        
+        The databases are searched concurrently and their pages merged by
+        ``relevance_score`` into a bounded top-k heap. A database is no longer
+        paged once its scores fall below the current k-th best or below
+        ``search.threshold``, so whole result sets are never downloaded.
+        
+        Args:
+            database_ids: The database IDs
+            params: Search parameters sent to every database (``pagination.limit``
+                sets the page size, defaulting to k)
+            k: Number of results to return
+            max_workers: Maximum number of requests in flight (defaults to the pool size)
+            
+        Returns:
+            Up to k ``FederatedHit`` results (database ID, record, score), best first
+            
+        Raises:
+            LightfeedError: If a search fails
+        """
+        return federated_search(
+            self.search_records, database_ids, params, k, max_workers or self.pool_maxsize
+        )
+
+    def iter_records(
+        self,
+        database_id: str,
+        params: Optional[GetRecordsParams] = None,
+        prefetch: int = DEFAULT_PREFETCH,
+        adaptive: Union[bool, AdaptivePageSize] = False,
+    ) -> Iterator[Record]:
+        """
+        Iterates over all records of a database, following pagination cursors
+        
+        The next page is fetched in a background thread while the current one
+        is being consumed, so at most ``prefetch + 2`` pages are held in memory
+        (the queued pages, the page waiting for queue space and the current one).
+        
+        Args:
+            database_id: The database ID
+            params: Optional query parameters (``cursor`` sets the starting page)
+            prefetch: Number of pages to fetch ahead (0 fetches pages on demand)
+            adaptive: Tune ``limit`` page by page (True, or an ``AdaptivePageSize`` to configure it)
+            
+        Returns:
+            Iterator over records
+            
+        Raises:
+            LightfeedError: If an API request fails
+        """
+        def fetch(cursor: Optional[str], limit: Optional[int] = None) -> RecordsResponse:
+            return self.get_records(database_id, with_query_cursor(params, cursor, limit))
+        
+        initial_limit = (params or {}).get("limit")
+        pages = iter_pages(self._page_fetcher(fetch, adaptive, initial_limit), initial_query_cursor(params), prefetch)
+        return iter_page_records(pages)
+
+    def iter_search(
+        self,
+        database_id: str,
+        params: SearchRecordsParams,
+        prefetch: int = DEFAULT_PREFETCH,
+        adaptive: Union[bool, AdaptivePageSize] = False,
+    ) -> Iterator[Record]:
+        """
+        Iterates over all semantic search results, following pagination cursors
+        
+        Args:
+            database_id: The database ID
+            params: Search parameters (``pagination.cursor`` sets the starting page)
+            prefetch: Number of pages to fetch ahead (0 fetches pages on demand)
+            adaptive: Tune ``pagination.limit`` page by page (True, or an ``AdaptivePageSize``)
+            
+        Returns:
+            Iterator over records
+            
+        Raises:
+            LightfeedError: If an API request fails
+        """
+        def fetch(cursor: Optional[str], limit: Optional[int] = None) -> RecordsResponse:
+            page_params = cast(SearchRecordsParams, with_body_cursor(cast(Dict[str, Any], params), cursor, limit))
+            return self.search_records(database_id, page_params)
+        
+        initial_limit = (params.get("pagination") or {}).get("limit")
+        pages = iter_pages(self._page_fetcher(fetch, adaptive, initial_limit), initial_body_cursor(params), prefetch)
+        return iter_page_records(pages)
+
+    def iter_filter(
+        self,
+        database_id: str,
+        params: FilterRecordsParams,
+        prefetch: int = DEFAULT_PREFETCH,
+        adaptive: Union[bool, AdaptivePageSize] = False,
+    ) -> Iterator[Record]:
+        """
+        Iterates over all records matching a filter, following pagination cursors
+        
+        Args:
+            database_id: The database ID
+            params: Filter parameters (``pagination.cursor`` sets the starting page)
+            prefetch: Number of pages to fetch ahead (0 fetches pages on demand)
+            adaptive: Tune ``pagination.limit`` page by page (True, or an ``AdaptivePageSize``)
+            
+        Returns:
+            Iterator over records
+            
+        Raises:
+            LightfeedError: If an API request fails
+        """
+        def fetch(cursor: Optional[str], limit: Optional[int] = None) -> RecordsResponse:
+            page_params = cast(FilterRecordsParams, with_body_cursor(cast(Dict[str, Any], params), cursor, limit))
+            return self.filter_records(database_id, page_params)
+        
+        initial_limit = (params.get("pagination") or {}).get("limit")
+        pages = iter_pages(self._page_fetcher(fetch, adaptive, initial_limit), initial_body_cursor(params), prefetch)
+        return iter_page_records(pages)
+
+    def export_records(
+        self,
+        database_id: str,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        slices: int = DEFAULT_SLICES,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        ordered: bool = False,
+        **options: Any
+    ) -> Iterator[Record]:
+        """
+        Exports a whole database by paging synced-time slices in parallel
+        
+        The synced time range is split into ``slices`` partitions that are
+        fetched concurrently; slices holding much more data than others are
+        re-split adaptively. Records are deduplicated by ``id``.
+        
+        Args:
+            database_id: The database ID
+            start_time: Start of the synced time range (ISO 8601, defaults to the epoch)
+            end_time: End of the synced time range (ISO 8601, defaults to now)
+            slices: Number of initial time slices
+            max_workers: Number of slices fetched concurrently
+            ordered: Return records in ``synced_at`` order (buffers the whole export)
+            **options: Further ``TimeSlicedExporter`` options (limit, pages_per_task, ...)
+            
+        Returns:
+            Iterator over unique records
+            
+        Raises:
+            LightfeedError: If an API request fails
+        """
+        exporter = TimeSlicedExporter(
+            self, database_id, slices=slices, max_workers=max_workers, **options
+        )
+        return exporter.export(start_time, end_time, ordered=ordered)
+
+    def export_files(
+        self,
+        database_id: str,
+        output_dir: str,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        processes: Optional[int] = None,
+        transform: Optional[RecordTransform] = None,
+        filter_params: Optional[FilterRecordsParams] = None,
+        format: str = "jsonl",
+        **options: Any
+    ) -> ExportManifest:
+        """
+        Exports a database to part files using a pool of worker processes
+        
+        Each process runs its own client with this client's configuration,
+        so decoding and transforming records scales with CPU cores instead of
+        being capped by the GIL.
+        
+        Args:
+            database_id: The database ID
+            output_dir: Directory for the part files and ``manifest.json``
+            start_time: Start of the synced time range (ISO 8601, defaults to the epoch)
+            end_time: End of the synced time range (ISO 8601, defaults to now)
+            processes: Number of worker processes (defaults to the number of CPUs)
+            transform: Picklable function applied to every record; returning None drops it
+            filter_params: Export only records matching ``filter_params["filter"]``
+            format: ``jsonl`` or ``parquet`` (requires pyarrow)
+            **options: Further ``ProcessPoolExporter`` options (limit, slices_per_process)
+            
+        Returns:
+            The export manifest
+            
+        Raises:
+            LightfeedError: If an API request fails
+        """
+        exporter = ProcessPoolExporter(
+            self.config,
+            database_id,
+            processes=processes,
+            transform=transform,
+            filter_params=filter_params,
+            format=format,
+            **options
+        )
+        return exporter.run(output_dir, start_time, end_time)
+
+    def incremental_sync(
+        self,
+        database_id: str,
+        store: Optional[CheckpointStore] = None,
+        limit: int = 500,
+        initial_start_time: Optional[str] = None,
+    ) -> IncrementalSync:
+        """
+        Creates an incremental sync of a database
+        
+        Each run of the returned sync fetches only records synced since the
+        checkpoint kept in ``store`` and commits the checkpoint as batches
+        are acknowledged.
+        
+        Args:
+            database_id: The database ID
+            store: Checkpoint store (defaults to a JSON file in the working directory)
+            limit: Page size used for every request (max 500)
+            initial_start_time: Where the first run starts when there is no checkpoint
+            
+        Returns:
+            The incremental sync
+        """
+        return IncrementalSync(
+            self, database_id, store=store, limit=limit, initial_start_time=initial_start_time
+        )
+
+    def _page_fetcher(
+        self,
+        fetch: SizedPageFetcher,
+        adaptive: Union[bool, AdaptivePageSize],
+        initial_limit: Optional[int],
+    ) -> PageFetcher:
+        """
+        Returns the page fetcher for an iterator, adapting its page size if requested
+        
+        Args:
+            fetch: Callable fetching the page at a cursor with an optional limit
+            adaptive: False for fixed pages, True or a controller for adaptive pages
+            initial_limit: Limit given by the caller, used as the starting point
+            
+        Returns:
+            A page fetcher for ``iter_pages``
+        """
+        if isinstance(adaptive, AdaptivePageSize):
+            return adaptive_fetcher(fetch, adaptive)
+        if not adaptive:
+            return fetch
+        # Keep each page well inside the request timeout
+        page_size = AdaptivePageSize(
+            initial=initial_limit or DEFAULT_INITIAL_LIMIT,
+            max_page_seconds=min(DEFAULT_MAX_PAGE_SECONDS, self.timeout / 3),
+        )
+        return adaptive_fetcher(fetch, page_size)
+
+    def _get_session(self) -> "requests.Session":
+        """
+        Returns the shared HTTP session, creating it on first use
+        
+        Returns:
+            The pooled session used for all API calls
+        """
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session()
+                session = self._session
+        return session
+
+    def _build_session(self) -> "requests.Session":
+        """
+        Builds a session with pooled adapters and any user supplied adapters
+        
+        Returns:
+            A new configured session
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.headers.update(self.compression.headers())
+        # With hedging, a losing attempt is aborted even while waiting for headers
+        adapter = (HTTPAdapter if self.hedging is None else abortable_adapter)(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        
+        # Custom adapters are mounted last so they take precedence
+        for prefix, custom_adapter in self.adapters.items():
+            session.mount(prefix, custom_adapter)
+        return session
+
+    def _cached_request(
+        self, endpoint: str, database_id: str, url: str, params: Any
+    ) -> RecordsResponse:
+        """
+        Sends a POST request, serving it from the response cache when possible
+        
+        Args:
+            endpoint: Endpoint name used in the cache key
+            database_id: The database ID
+            url: Fully qualified request URL
+            params: JSON body parameters
+            
+        Returns:
+            Decoded records response
+            
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        body = self.codec.dumps(params)
+        key = canonical_key(endpoint, database_id, params, self.cache_scope)
+        event = RequestEvent(endpoint, database_id, "POST", url)
+        if self.cache is None:
+            return self._request(event, key, data=body)
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._decode(cached)
+        content, response = self._fetch(event, key, data=body)
+        self.cache.set(key, content)
+        return response
+
+    def _request(self, event: RequestEvent, key: Optional[str] = None, **kwargs: Any) -> RecordsResponse:
+        """
+        Sends a request and decodes the response
+        
+        Args:
+            event: Event describing the request (endpoint, database, method, URL)
+            key: Canonical request key used to coalesce identical concurrent calls
+            **kwargs: Extra arguments passed to the session (params, data)
+            
+        Returns:
+            Decoded records response
+            
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        return self._fetch(event, key, **kwargs)[1]
+
+    def _fetch(
+        self, event: RequestEvent, key: Optional[str] = None, **kwargs: Any
+    ) -> Tuple[bytes, RecordsResponse]:
+        """
+        Sends a request, joining an identical one already in flight, and decodes it
+        
+        Callers sharing a request receive the same raw body (or exception)
+        and decode it separately, so they never share mutable results. Only
+        the caller that actually sent the request reports it to the hooks.
+        
+        Args:
+            event: Event describing the request
+            key: Canonical request key, or None to always send
+            **kwargs: Extra arguments passed to the session (params, data)
+            
+        Returns:
+            Raw response body and the decoded response
+            
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        sent = []
+        
+        def send() -> Tuple[bytes, RequestEvent]:
+            sent.append(True)
+            return self._send(event, **kwargs)
+        
+        if key is None or self.single_flight is None:
+            content, last_event = send()
+        else:
+            content, last_event = self.single_flight.do(key, send)
+        if not sent:
+            return content, self._decode(content)
+        return content, self._decode_reported(content, last_event)
+
+    def _send(self, event: RequestEvent, **kwargs: Any) -> Tuple[bytes, RequestEvent]:
+        """
+        Sends a request through the pooled session and reads the whole body
+        
+        Args:
+            event: Event describing the request
+            **kwargs: Extra arguments passed to the session (params, data)
+            
+        Returns:
+            Raw response body and the event of the successful attempt
+            
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        if self.hedging is not None and self.hedging.applies_to(event.endpoint):
+            def attempt(hedge: bool, token: CancelToken) -> Tuple[bytes, RequestEvent]:
+                return self._send_cancellable(event.hedged() if hedge else event, token, **kwargs)
+            
+            return self.hedging.run(event.endpoint, attempt)
+        response, event = self._open(event, **kwargs)
+        return response.content, event
+
+    def _send_cancellable(
+        self, event: RequestEvent, token: CancelToken, **kwargs: Any
+    ) -> Tuple[bytes, RequestEvent]:
+        """
+        Sends one attempt of a hedged request, aborting it once the token is cancelled
+        
+        The body is downloaded after the headers arrive so that cancelling
+        can close the response mid-download and free the connection. An
+        abandoned attempt is reported to the hooks with ``cancelled`` set.
+        
+        Args:
+            event: Event describing the attempt
+            token: Cancelled when the other attempt has answered
+            **kwargs: Extra arguments passed to the session (params, data)
+            
+        Returns:
+            Raw response body and the event of the successful attempt
+            
+        Raises:
+            HedgeCancelled: If the attempt was cancelled
+            LightfeedError: If the API request fails
+        """
+        response, event = self._open(event, stream=True, token=token, **kwargs)
+        token.on_cancel(response.close)
+        read = time.perf_counter()
         try:
-            response = requests.post(
-                url, 
-                headers=self.headers, 
-                json=params, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return cast(RecordsResponse, response.json())
-        except RequestException as e:
-            raise self._handle_error(e)
-
-    def _handle_error(self, error: RequestException) -> LightfeedError:
+            content = response.content
+        except Exception as e:
+            response.close()
+            if not token.cancelled:
+                error = LightfeedError(500, str(e))
+                self.instrumentation.error(event, error)
+                raise error
+        if token.cancelled:
+            event.cancelled = True
+            self.instrumentation.error(event, HedgeCancelled())
+            raise HedgeCancelled()
+        event.bytes_in = len(content)
+        event.wire_bytes_in = wire_bytes(response.raw, event.bytes_in)
+        event.add_phase("download", time.perf_counter() - read)
+        return content, event
+
+    def _open(
+        self, event: RequestEvent, stream: bool = False, token: Optional[CancelToken] = None, **kwargs: Any
+    ) -> Tuple[Any, RequestEvent]:
+        """
+        Sends a request through the pooled session
+        
+        Waits for the client-side rate limiter and a slot of the adaptive
+        concurrency limit before each attempt and retries failures according
+        to the retry policy, if configured. Every attempt is reported to the
+        hooks with its own event and its outcome to the concurrency limit and
+        circuit breaker.
+        
+        Args:
+            event: Event describing the request
+            stream: Return as soon as the headers arrive, leaving the body unread
+            token: Cancellation token of a hedged attempt; once cancelled, no
+                retry is sent and a pending one is abandoned
+            **kwargs: Extra arguments passed to the session (params, data)
+            
+        Returns:
+            The successful response and the event of its attempt
+            
+        Raises:
+            HedgeCancelled: If the token was cancelled
+            LightfeedError: If the API request fails
+            CircuitOpenError: If the circuit of the endpoint and database is open
+        """
+        from requests.exceptions import RequestException, Timeout
+
+        body = kwargs.get("data")
+        headers = self.headers
+        if body:
+            kwargs["data"], encoding = self.compression.compress(body)
+            if encoding is not None:
+                headers = dict(headers, **{"Content-Encoding": encoding})
+        if stream:
+            kwargs["stream"] = True
+        while True:
+            if token is not None and token.cancelled:
+                raise HedgeCancelled()
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.check(event.endpoint, event.database_id)
+            waited = time.perf_counter()
+            self._wait_for_turn()
+            slot = self.concurrency.acquire() if self.concurrency is not None else 0
+            event.add_phase("wait", time.perf_counter() - waited)
+            event.bytes_out = len(body) if body else 0
+            event.wire_bytes_out = len(kwargs["data"]) if body else 0
+            self.instrumentation.request_start(event)
+            try:
+                sent = time.perf_counter()
+                with abortable(token) if token is not None else nullcontext():
+                    response = self._get_session().request(
+                        event.method,
+                        event.url,
+                        headers=headers,
+                        timeout=self.timeout,
+                        **kwargs
+                    )
+                if stream:
+                    event.status = response.status_code
+                    event.add_phase("headers", time.perf_counter() - sent)
+                else:
+                    _record_transfer(event, response, time.perf_counter() - sent)
+                response.raise_for_status()
+                return response, event
+            except Exception as e:
+                if token is not None and token.cancelled:
+                    # Aborted because the duplicate answered first
+                    event.cancelled = True
+                    event.status = CLIENT_CLOSED_REQUEST
+                    self.instrumentation.error(event, HedgeCancelled())
+                    raise HedgeCancelled() from e
+                if not isinstance(e, RequestException):
+                    raise
+                delay = self._retry_delay(e, event.attempt)
+                error = self._handle_error(e)
+                if getattr(e, "response", None) is not None:
+                    event.status = e.response.status_code
+                event.timed_out = isinstance(e, Timeout)
+                self.instrumentation.error(event, error, will_retry=delay is not None)
+                if delay is None:
+                    raise error
+            finally:
+                self._record_health(event, slot)
+            if token is None:
+                time.sleep(delay)
+            elif token.wait(delay):
+                raise HedgeCancelled()
+            event = event.retry()
+
+    def _stream(self, event: RequestEvent, chunk_size: int, **kwargs: Any) -> RecordStream:
+        """
+        Sends a request and returns a stream decoding its body incrementally
+        
+        The request is reported to the hooks when the stream ends; the decode
+        phase covers the time spent parsing and the download phase the rest.
+        
+        Args:
+            event: Event describing the request
+            chunk_size: Bytes read from the connection at a time
+            **kwargs: Extra arguments passed to the session (params, data)
+            
+        Returns:
+            Stream of the response's records
+            
+        Raises:
+            LightfeedError: If the API request fails
+        """
+        from requests.exceptions import RequestException, Timeout
+
+        response, event = self._open(event, stream=True, **kwargs)
+        opened = time.perf_counter()
+        
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.iter_content(chunk_size)
+            except RequestException as e:
+                event.timed_out = isinstance(e, Timeout)
+                raise LightfeedError(500, str(e))
+        
+        def on_close(stream: RecordStream, error: Optional[LightfeedError]) -> None:
+            event.bytes_in = stream.bytes_in
+            event.wire_bytes_in = wire_bytes(response.raw, stream.bytes_in)
+            event.records = stream.records
+            event.add_phase("download", time.perf_counter() - opened - stream.decode_seconds)
+            event.add_phase("decode", stream.decode_seconds)
+            if error is None:
+                self.instrumentation.response(event)
+            else:
+                self.instrumentation.error(event, error)
+        
+        return RecordStream(chunks(), self._decode_record, on_close, response.close)
+
+    def _decode_reported(self, content: bytes, event: RequestEvent) -> RecordsResponse:
+        """
+        Decodes a response body and reports the completed request to the hooks
+        
+        Args:
+            content: Raw response body
+            event: Event of the attempt that returned the body
+            
+        Returns:
+            Decoded records response
+            
+        Raises:
+            LightfeedError: If the body is not a valid records response
+        """
+        started = time.perf_counter()
+        try:
+            response = self._decode(content)
+        except LightfeedError as e:
+            self.instrumentation.error(event, e)
+            raise
+        event.add_phase("decode", time.perf_counter() - started)
+        event.records = len(response.get("results") or [])
+        self.instrumentation.response(event)
+        return response
+
+    def _decode(self, content: bytes) -> RecordsResponse:
+        """
+        Decodes a records response body with the configured JSON backend
+        
+        Args:
+            content: Raw response body
+            
+        Returns:
+            Decoded records response
+            
+        Raises:
+            LightfeedError: If the body is not a valid records response
+        """
+        try:
+            return self.codec.decode_response(content)
+        except self.codec.decode_errors as e:
+            raise LightfeedError(500, f"Invalid response body: {e}")
+
+    def _decode_record(self, content: bytes) -> Record:
+        """Decodes the raw JSON of one streamed record"""
+        try:
+            return self.codec.decode_record(content)
+        except self.codec.decode_errors as e:
+            raise LightfeedError(500, f"Invalid response body: {e}")
+
+    def _wait_for_turn(self) -> None:
+        """
+        Blocks until a request may be sent
+        
+        Honors a server-requested pause shared by all threads, then takes a
+        token from the client-side rate limiter.
+        """
+        if self.retry_policy is not None:
+            pause = self.retry_policy.pause_remaining()
+            if pause > 0:
+                time.sleep(pause)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def _record_health(self, event: RequestEvent, slot: int) -> None:
+        """
+        Reports the outcome of an attempt to the concurrency limit and circuit breaker
+        
+        Args:
+            event: Event of the finished attempt
+            slot: Token of the concurrency slot the attempt held
+        """
+        if event.cancelled:
+            # Cancelled hedge attempts tell nothing about the API's health
+            if self.concurrency is not None:
+                self.concurrency.abandon(slot)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.abandon(event.endpoint, event.database_id)
+            return
+        if self.concurrency is not None:
+            self.concurrency.release(slot, event.endpoint, event.status, event.phases.get("headers"))
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(event.endpoint, event.database_id, event.status)
+
+    def _retry_delay(self, error: "RequestException", attempt: int) -> Optional[float]:
+        """
+        Returns how long to wait before retrying a failed request
+        
+        Args:
+            error: The exception from the requests library
+            attempt: Number of retries already made
+            
+        Returns:
+            Seconds to wait, or None if the request should not be retried
+        """
+        from requests.exceptions import ConnectionError, Timeout
+
+        if self.retry_policy is None:
+            return None
+        response = getattr(error, "response", None)
+        if response is not None:
+            return self.retry_policy.delay_for(attempt, response.status_code, response.headers)
+        if isinstance(error, (ConnectionError, Timeout)):
+            return self.retry_policy.delay_for(attempt, None)
+        return None
+
+    def _handle_error(self, error: "RequestException") -> LightfeedError:
         """
         Handles and transforms API errors into a consistent format
         
@@ -148,20 +1167,54 @@ class LightfeedClient:
             A formatted LightfeedError
         """
         if getattr(error, "response", None) is not None:
-            response = error.response
-            status_code = response.status_code
-            
-            # Ensure status code is one of the expected ones
-            if status_code not in [400, 401, 403, 404, 429, 500]:
-                status_code = 500  # Default to internal server error
-                
-            try:
-                error_data = response.json()
-                message = error_data.get("message", LightfeedError.get_default_message(status_code))
-            except (ValueError, json.JSONDecodeError):
-                message = response.text or LightfeedError.get_default_message(status_code)
-                
-            return LightfeedError(status_code, message)
+            return error_from_response(error.response)
         
         # For network errors, connection issues, etc.
-        return LightfeedError(500, str(error)) 
\ No newline at end of file
+        return LightfeedError(500, str(error))
+
+
+def error_from_response(response: Any) -> LightfeedError:
+    """
+    Builds a LightfeedError from an HTTP error response
+    
+    Works with any response object exposing ``status_code``, ``json()`` and
+    ``text`` (requests and httpx responses both do).
+    
+    Args:
+        response: The HTTP error response
+        
+    Returns:
+        A formatted LightfeedError
+    """
+    status_code = response.status_code
+    
+    # Ensure status code is one of the expected ones
+    if status_code not in [400, 401, 403, 404, 429, 500]:
+        status_code = 500  # Default to internal server error
+        
+    try:
+        error_data = response.json()
+        message = error_data.get("message", LightfeedError.get_default_message(status_code))
+    except (ValueError, json.JSONDecodeError):
+        message = response.text or LightfeedError.get_default_message(status_code)
+        
+    return LightfeedError(status_code, message)
+
+
+def _record_transfer(event: RequestEvent, response: Any, seconds: float) -> None:
+    """
+    Records the status, body sizes and transfer phases of a requests response
+    
+    ``response.elapsed`` covers the time until the headers were parsed; the
+    rest of the call was spent downloading the body.
+    """
+    event.status = response.status_code
+    event.bytes_in = len(response.content or b"")
+    event.wire_bytes_in = wire_bytes(getattr(response, "raw", None), event.bytes_in)
+    elapsed = getattr(response, "elapsed", None)
+    if isinstance(elapsed, timedelta):
+        headers = min(elapsed.total_seconds(), seconds)
+        event.add_phase("headers", headers)
+        event.add_phase("download", seconds - headers)
+    else:
+        event.add_phase("headers", seconds)
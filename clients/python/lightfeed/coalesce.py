@@ -0,0 +1,127 @@
+"""
+Request coalescing: identical concurrent calls share one underlying request
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+T = TypeVar("T")
+
+
+class _Call:
+    """An in-flight call waited on by followers"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Thread-safe single-flight group
+
+    While a call for a key is running, further calls for the same key wait
+    for it and receive its result or exception instead of running again.
+    Results are not kept once the call finishes, so this never serves
+    stale data; use the response cache for that.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Runs ``fn`` unless a call for ``key`` is already in flight
+
+        Args:
+            key: Identity of the call
+            fn: The call to run
+
+        Returns:
+            The result of the (possibly shared) call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        assert call is not None
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Returns the number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Single-flight group for coroutines on one event loop
+
+    The shared call runs as its own task, so cancelling one waiter does not
+    cancel the request for the others.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Awaits ``fn()`` unless a call for ``key`` is already in flight
+
+        Args:
+            key: Identity of the call
+            fn: Coroutine function making the call
+
+        Returns:
+            The result of the (possibly shared) call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        import asyncio
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Returns the number of distinct calls currently running"""
+        return len(self._tasks)
+
+    def _finish(self, key: str, task: "asyncio.Future[Any]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
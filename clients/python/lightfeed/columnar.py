@@ -0,0 +1,216 @@
+"""
+Columnar materialization of records for analytics
+"""
+
+import json
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+from lightfeed.export import parse_timestamp
+from lightfeed.models import Record
+
+
+# Columns holding record metadata; data fields with these names get a "data." prefix
+ID_COLUMN = "id"
+TIMESTAMP_COLUMNS = ("created_at", "changed_at", "synced_at")
+SCORE_COLUMN = "relevance_score"
+META_COLUMNS = (ID_COLUMN,) + TIMESTAMP_COLUMNS + (SCORE_COLUMN,)
+
+# Supported output formats
+OUTPUTS = ("auto", "pandas", "arrow", "dict")
+
+
+class ColumnarCollector:
+    """
+    Accumulates records into one buffer per column
+
+    Records are appended field by field as they arrive, so pages can be
+    consumed straight from an iterator and dropped afterwards without ever
+    building a per-record intermediate structure. Data fields missing from a
+    record are filled with None. Timestamps are kept as raw strings until
+    the result is built and then converted in one pass.
+    """
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.ids: List[Any] = []
+        self.timestamps: Dict[str, List[Optional[str]]] = {name: [] for name in TIMESTAMP_COLUMNS}
+        self.scores = array("d")
+        self.columns: Dict[str, List[Any]] = {}
+
+    def add(self, records: Iterable[Record]) -> "ColumnarCollector":
+        """
+        Appends records to the buffers
+
+        Args:
+            records: Records, e.g. from ``iter_records`` or a page's ``results``
+
+        Returns:
+            The collector, for chaining
+        """
+        columns = self.columns
+        ids_append = self.ids.append
+        created_append = self.timestamps["created_at"].append
+        changed_append = self.timestamps["changed_at"].append
+        synced_append = self.timestamps["synced_at"].append
+        scores_append = self.scores.append
+        nan = float("nan")
+        row = self.rows
+
+        for record in records:
+            ids_append(record.get("id"))
+            timestamps = record.get("timestamps") or {}
+            created_append(timestamps.get("created_at"))
+            changed_append(timestamps.get("changed_at"))
+            synced_append(timestamps.get("synced_at"))
+            score = record.get("relevance_score")
+            scores_append(nan if score is None else score)
+
+            for name, value in (record.get("data") or {}).items():
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = [None] * row
+                elif len(column) < row:
+                    column.extend([None] * (row - len(column)))
+                column.append(value)
+            row += 1
+
+        self.rows = row
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Builds a plain dict of columns
+
+        Timestamps become epoch milliseconds and ``relevance_score`` an
+        ``array('d')`` with NaN where the score is missing.
+
+        Returns:
+            Mapping of column name to column values
+        """
+        result: Dict[str, Any] = {ID_COLUMN: self.ids}
+        for name, values in self.timestamps.items():
+            result[name] = [None if v is None else int(parse_timestamp(v).timestamp() * 1000) for v in values]
+        result[SCORE_COLUMN] = self.scores
+        result.update(self._data_columns())
+        return result
+
+    def to_pandas(self) -> Any:
+        """
+        Builds a pandas DataFrame
+
+        Timestamps become ``datetime64[ms, UTC]`` columns.
+
+        Returns:
+            A ``pandas.DataFrame``
+
+        Raises:
+            ImportError: If pandas is not installed
+        """
+        import numpy as np
+        import pandas as pd
+
+        frame: Dict[str, Any] = {ID_COLUMN: self.ids}
+        for name, values in self.timestamps.items():
+            frame[name] = pd.Series(_to_datetime64(values)).dt.tz_localize("UTC")
+        frame[SCORE_COLUMN] = np.frombuffer(self.scores, dtype=np.float64)
+        frame.update(self._data_columns())
+        return pd.DataFrame(frame)
+
+    def to_arrow(self) -> Any:
+        """
+        Builds a pyarrow Table
+
+        Timestamps become ``timestamp[ms, tz=UTC]`` columns. Data columns
+        whose values have no common Arrow type are stored as text: strings as
+        they are and other values as JSON.
+
+        Returns:
+            A ``pyarrow.Table``
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        import numpy as np
+        import pyarrow as pa
+
+        table: Dict[str, Any] = {ID_COLUMN: pa.array(self.ids)}
+        for name, values in self.timestamps.items():
+            table[name] = pa.array(_to_datetime64(values), type=pa.timestamp("ms", tz="UTC"))
+        table[SCORE_COLUMN] = pa.array(np.frombuffer(self.scores, dtype=np.float64))
+        for name, values in self._data_columns().items():
+            try:
+                table[name] = pa.array(values)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                table[name] = pa.array([text_value(v) for v in values], type=pa.string())
+        return pa.table(table)
+
+    def result(self, output: str = "auto") -> Any:
+        """
+        Builds the collected columns in the requested format
+
+        Args:
+            output: ``pandas``, ``arrow``, ``dict``, or ``auto`` to pick the
+                first of those that is installed
+
+        Returns:
+            A DataFrame, Table or dict of columns
+        """
+        if output not in OUTPUTS:
+            raise ValueError(f"output must be one of {', '.join(OUTPUTS)}")
+        if output == "auto":
+            output = _available_output()
+        if output == "pandas":
+            return self.to_pandas()
+        if output == "arrow":
+            return self.to_arrow()
+        return self.to_dict()
+
+    def _data_columns(self) -> Dict[str, List[Any]]:
+        columns = {}
+        for name, values in self.columns.items():
+            if len(values) < self.rows:
+                values.extend([None] * (self.rows - len(values)))
+            columns["data." + name if name in META_COLUMNS else name] = values
+        return columns
+
+
+def text_value(value: Any) -> Optional[str]:
+    """Encodes a value of a column with no common type: strings as they are, others as JSON"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, default=str)
+
+
+def collect_columns(records: Iterable[Record], output: str = "auto") -> Any:
+    """
+    Streams records into columns and returns a table
+
+    Args:
+        records: Records, e.g. ``client.iter_records(database_id)``
+        output: ``pandas``, ``arrow``, ``dict``, or ``auto`` (the first installed)
+
+    Returns:
+        A DataFrame, Table or dict of columns
+    """
+    return ColumnarCollector().add(records).result(output)
+
+
+def _available_output() -> str:
+    for module, output in (("pandas", "pandas"), ("pyarrow", "arrow")):
+        try:
+            __import__(module)
+            return output
+        except ImportError:
+            continue
+    return "dict"
+
+
+def _to_datetime64(values: List[Optional[str]]) -> Any:
+    import numpy as np
+
+    # numpy parses ISO 8601 natively but rejects the "Z" UTC designator
+    return np.array(
+        ["NaT" if v is None else (v[:-1] if v.endswith("Z") else v) for v in values],
+        dtype="datetime64[ms]",
+    )
@@ -0,0 +1,225 @@
+"""
+Content-encoding negotiation for responses and compression of request bodies
+"""
+
+import gzip
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None  # type: ignore
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None  # type: ignore
+
+from lightfeed.models import CompressionConfig
+
+
+# Content codings in order of preference. Whether zstd and br can be used
+# depends on the HTTP library too: urllib3 1.26 never decodes zstd, and
+# httpx only does from 0.27, so the advertised list is intersected with
+# what the transport reports (see requests_encodings/httpx_encodings)
+ENCODINGS = ("zstd", "br", "gzip", "deflate")
+
+# Codings every supported transport version decodes
+_BASELINE_ENCODINGS = ("gzip", "deflate")
+
+# Request bodies smaller than this are sent uncompressed
+DEFAULT_MIN_REQUEST_BYTES = 1024
+
+# Compression levels favoring speed, since bodies are compressed per request
+_GZIP_LEVEL = 5
+_ZSTD_LEVEL = 3
+_BROTLI_QUALITY = 4
+
+_MODULES = {"zstd": zstandard, "br": brotli, "gzip": gzip, "deflate": zlib}
+
+
+def available_encodings(supported: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Returns the content codings that can be decoded here, most effective first
+
+    Args:
+        supported: Codings the HTTP library decodes; every installed one when omitted
+    """
+    allowed = None if supported is None else set(supported)
+    return [
+        name for name in ENCODINGS
+        if _MODULES[name] is not None and (allowed is None or name in allowed)
+    ]
+
+
+def requests_encodings() -> List[str]:
+    """Returns the content codings requests (through urllib3) decodes in this environment"""
+    try:
+        from urllib3.util.request import ACCEPT_ENCODING
+    except ImportError:  # pragma: no cover - very old urllib3
+        return list(_BASELINE_ENCODINGS)
+    return [name.strip() for name in ACCEPT_ENCODING.split(",") if name.strip()]
+
+
+def httpx_encodings() -> List[str]:
+    """Returns the content codings httpx decodes in this environment"""
+    try:
+        from httpx._decoders import SUPPORTED_DECODERS
+    except ImportError:  # pragma: no cover - httpx moved its decoder table
+        return list(_BASELINE_ENCODINGS)
+    return [name for name in SUPPORTED_DECODERS if name != "identity"]
+
+
+class CompressionPolicy:
+    """
+    Which response encodings to accept and whether to compress request bodies
+
+    Responses are decompressed transparently by the HTTP library; this only
+    decides what is advertised in ``Accept-Encoding``, which never includes
+    a coding the library cannot decode. Request bodies are compressed only
+    when ``requestEncoding`` is set, since the server has to accept the
+    ``Content-Encoding``.
+    """
+
+    def __init__(
+        self,
+        config: Optional[CompressionConfig] = None,
+        transport_encodings: Optional[Callable[[], Iterable[str]]] = None,
+    ) -> None:
+        """
+        Creates a compression policy
+
+        Args:
+            config: Compression configuration
+            transport_encodings: Returns the codings the HTTP library decodes; called
+                on first use of ``accept_encoding`` so the library is imported lazily
+
+        Raises:
+            ValueError: If an encoding is unknown
+            ImportError: If the library for a requested encoding is not installed
+        """
+        config = config or {}
+        accept = config.get("acceptEncoding") or "auto"
+        if accept == "auto":
+            encodings = available_encodings()
+        elif isinstance(accept, str):
+            encodings = [e.strip() for e in accept.split(",") if e.strip()]
+        else:
+            encodings = list(accept)
+        for encoding in encodings:
+            if encoding != "identity":
+                _check_encoding(encoding)
+        self._encodings = encodings
+        self._transport_encodings = transport_encodings
+        self._accept_encoding: Optional[str] = None
+
+        self.request_encoding: Optional[str] = config.get("requestEncoding")
+        if self.request_encoding is not None:
+            _check_encoding(self.request_encoding)
+        min_bytes = config.get("minRequestBytes")
+        self.min_request_bytes = DEFAULT_MIN_REQUEST_BYTES if min_bytes is None else min_bytes
+
+    @property
+    def accept_encoding(self) -> str:
+        """The ``Accept-Encoding`` value: configured codings the transport decodes"""
+        if self._accept_encoding is None:
+            encodings = self._encodings
+            if self._transport_encodings is not None:
+                supported = set(self._transport_encodings()) | {"identity"}
+                encodings = [e for e in encodings if e in supported]
+            self._accept_encoding = ", ".join(encodings) or "identity"
+        return self._accept_encoding
+
+    def headers(self) -> Dict[str, str]:
+        """Returns the headers to send with every request"""
+        return {"Accept-Encoding": self.accept_encoding}
+
+    def compress(self, body: bytes) -> Tuple[bytes, Optional[str]]:
+        """
+        Compresses a request body if it is worth it
+
+        Args:
+            body: Encoded JSON body
+
+        Returns:
+            The body to send and its content coding, or None if sent as is
+        """
+        if self.request_encoding is None or len(body) < self.min_request_bytes:
+            return body, None
+        compressed = compress(body, self.request_encoding)
+        if len(compressed) >= len(body):
+            return body, None
+        return compressed, self.request_encoding
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compresses data with a content coding
+
+    Args:
+        data: Bytes to compress
+        encoding: ``zstd``, ``br``, ``gzip`` or ``deflate``
+
+    Returns:
+        The compressed bytes
+    """
+    _check_encoding(encoding)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+    if encoding == "br":
+        return brotli.compress(data, quality=_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=_GZIP_LEVEL)
+    return zlib.compress(data, _GZIP_LEVEL)
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """
+    Decompresses data with a content coding
+
+    Args:
+        data: Compressed bytes
+        encoding: ``zstd``, ``br``, ``gzip``, ``deflate`` or ``identity``
+
+    Returns:
+        The original bytes
+    """
+    if encoding == "identity":
+        return data
+    _check_encoding(encoding)
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    return zlib.decompress(data)
+
+
+def wire_bytes(raw: Any, default: int) -> int:
+    """
+    Returns the bytes a requests response read from the connection
+
+    urllib3 counts the bytes before decompression in ``raw.tell()``.
+
+    Args:
+        raw: The ``raw`` attribute of a requests response
+        default: Value returned when the count is unavailable
+    """
+    tell = getattr(raw, "tell", None)
+    try:
+        count = tell() if tell is not None else None
+    except (OSError, ValueError):
+        count = None
+    return count if isinstance(count, int) and count > 0 else default
+
+
+def _check_encoding(encoding: str) -> None:
+    if encoding not in _MODULES:
+        raise ValueError(f"Unknown content encoding: {encoding}")
+    if _MODULES[encoding] is None:
+        raise ImportError(f"Content encoding '{encoding}' needs a library that is not installed")
@@ -0,0 +1,305 @@
+"""
+Adaptive concurrency limiting and circuit breaking for Lightfeed API calls
+
+``AdaptiveLimiter`` caps the number of requests a client has in flight and
+tunes the cap with AIMD (additive increase, multiplicative decrease): the
+limit grows by about one slot per round of healthy responses and is cut by
+``backoffRatio`` on a 429, a 5xx, a connection error or a latency spike.
+Throughput thereby settles near whatever the API can serve at the moment.
+
+``CircuitBreaker`` tracks the health of every endpoint and database pair.
+After ``failureThreshold`` consecutive server or connection errors its
+circuit opens and calls fail fast with ``CircuitOpenError`` until
+``resetTimeout`` has passed; then one trial request decides whether the
+circuit closes again.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple, TypedDict
+
+from lightfeed.models import CircuitBreakerConfig, ConcurrencyConfig, LightfeedError
+from lightfeed.retry import CONNECTION_ERROR, SERVER_ERROR, classify_error
+
+
+# Default adaptive concurrency settings
+DEFAULT_INITIAL_LIMIT = 4
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 64
+DEFAULT_BACKOFF_RATIO = 0.5
+DEFAULT_LATENCY_TOLERANCE = 2.0
+DEFAULT_LATENCY_WINDOW = 100
+
+# Default circuit breaker settings
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 10.0  # seconds
+
+# Latencies an endpoint needs before spikes are detected
+_MIN_LATENCY_SAMPLES = 10
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ConcurrencyStats(TypedDict):
+    """State of an adaptive concurrency limiter"""
+
+    limit: int  # Requests currently allowed in flight
+    in_flight: int  # Requests in flight
+    increases: int  # Times the limit was raised
+    decreases: int  # Times the limit was cut
+
+
+class AdaptiveLimiter:
+    """
+    Client-wide in-flight request limit tuned by AIMD
+
+    Thread-safe; one limiter is shared by all threads of a client. Callers
+    take a slot with ``acquire`` before sending and return it with
+    ``release`` once the response headers (or an error) arrived.
+
+    The latency signal is the time to the response headers, compared per
+    endpoint with the best of its recent latencies: an answer slower than
+    ``latencyTolerance`` times that is treated like an overload. The limit is
+    cut at most once per round: responses to requests sent before the last
+    cut do not cut it again, so one burst of errors halves it only once.
+    """
+
+    def __init__(self, config: Optional[ConcurrencyConfig] = None) -> None:
+        """
+        Creates an adaptive concurrency limiter
+
+        Args:
+            config: Adaptive concurrency configuration
+
+        Raises:
+            ValueError: If the limits or the backoff ratio are out of range
+        """
+        config = config or {}
+        self.min_limit = config.get("minLimit") or DEFAULT_MIN_LIMIT
+        self.max_limit = config.get("maxLimit") or DEFAULT_MAX_LIMIT
+        initial_limit = config.get("initialLimit") or DEFAULT_INITIAL_LIMIT
+        self.backoff_ratio = config.get("backoffRatio") or DEFAULT_BACKOFF_RATIO
+        self.latency_tolerance = config.get("latencyTolerance") or DEFAULT_LATENCY_TOLERANCE
+        self.window = config.get("window") or DEFAULT_LATENCY_WINDOW
+        if not 1 <= self.min_limit <= self.max_limit:
+            raise ValueError("minLimit must be at least 1 and at most maxLimit")
+        if not 0 < self.backoff_ratio < 1:
+            raise ValueError("backoffRatio must be between 0 and 1")
+
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        # Bumped on every cut; a slot taken before the last cut cannot cut again
+        self._round = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Requests currently allowed in flight"""
+        return int(self._limit)
+
+    def acquire(self) -> int:
+        """
+        Blocks until fewer requests than the limit are in flight and takes a slot
+
+        Returns:
+            Token identifying the slot, passed back to ``release``
+        """
+        with self._condition:
+            while self.in_flight >= int(self._limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return self._round
+
+    def release(self, token: int, endpoint: str, status: Optional[int], latency: Optional[float] = None) -> None:
+        """
+        Returns a slot and adjusts the limit from the request's outcome
+
+        Args:
+            token: Token returned by ``acquire``
+            endpoint: Endpoint of the request
+            status: HTTP status code, or None if no response was received
+            latency: Seconds until the response headers arrived, if they did
+        """
+        with self._condition:
+            busy = self.in_flight >= int(self._limit) / 2
+            self.in_flight -= 1
+            if classify_error(status) is not None or self._is_spike(endpoint, latency):
+                if token == self._round:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                    self._round += 1
+                    self.decreases += 1
+            elif busy and self._limit < self.max_limit:
+                # About one more slot per limit's worth of healthy responses; an
+                # idle client does not raise a limit it is not using
+                before = int(self._limit)
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+                if int(self._limit) > before:
+                    self.increases += 1
+            self._condition.notify_all()
+
+    def abandon(self, token: int) -> None:
+        """
+        Returns a slot without adjusting the limit, for a request cancelled by the client
+
+        Args:
+            token: Token returned by ``acquire``
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def stats(self) -> ConcurrencyStats:
+        """Returns the current limit and counters"""
+        with self._condition:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self.in_flight,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
+
+    def _is_spike(self, endpoint: str, latency: Optional[float]) -> bool:
+        """Records a latency and tells whether it is far above the endpoint's recent best"""
+        if latency is None:
+            return False
+        samples = self._latencies.get(endpoint)
+        if samples is None:
+            samples = self._latencies[endpoint] = deque(maxlen=self.window)
+        spike = len(samples) >= _MIN_LATENCY_SAMPLES and latency > self.latency_tolerance * min(samples)
+        samples.append(latency)
+        return spike
+
+
+class CircuitOpenError(LightfeedError):
+    """Raised instead of sending a request while its circuit is open"""
+
+    def __init__(self, endpoint: str, database_id: str, retry_after: float) -> None:
+        self.endpoint = endpoint
+        self.database_id = database_id
+        self.retry_after = retry_after  # Seconds until a trial request is let through
+        super().__init__(
+            500,
+            f"Circuit open for {endpoint} requests to {database_id} after repeated failures; "
+            f"retry in {retry_after:.1f}s",
+        )
+
+    def __reduce__(self) -> Tuple[type, Tuple[str, str, float]]:
+        return (self.__class__, (self.endpoint, self.database_id, self.retry_after))
+
+
+class _Circuit:
+    """Health of one endpoint and database pair"""
+
+    __slots__ = ("state", "failures", "opened_at", "trial")
+
+    def __init__(self) -> None:
+        self.state = CLOSED
+        self.failures = 0  # Consecutive failures
+        self.opened_at = 0.0
+        self.trial = False  # A trial request is in flight while half open
+
+
+class CircuitBreaker:
+    """
+    Fails fast on endpoint and database pairs that keep failing
+
+    Server errors (5xx), connection errors and timeouts count as failures;
+    any other answer, including 4xx and 429, shows the API is reachable and
+    closes the circuit. Thread-safe.
+    """
+
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Creates a circuit breaker
+
+        Args:
+            config: Circuit breaker configuration
+            clock: Monotonic clock, for testing
+        """
+        config = config or {}
+        self.failure_threshold = max(1, config.get("failureThreshold") or DEFAULT_FAILURE_THRESHOLD)
+        reset_timeout = config.get("resetTimeout")
+        self.reset_timeout = DEFAULT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self._clock = clock
+        self._circuits: Dict[Tuple[str, str], _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def check(self, endpoint: str, database_id: str) -> None:
+        """
+        Lets a request through, or fails fast while its circuit is open
+
+        Once ``resetTimeout`` has passed, one caller is let through as a trial
+        while the others keep failing fast until its outcome is recorded.
+
+        Args:
+            endpoint: Endpoint of the request
+            database_id: The database ID
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            circuit = self._circuits.get((endpoint, database_id))
+            if circuit is None or circuit.state == CLOSED:
+                return
+            remaining = circuit.opened_at + self.reset_timeout - self._clock()
+            if remaining <= 0 and not circuit.trial:
+                circuit.state = HALF_OPEN
+                circuit.trial = True
+                return
+        raise CircuitOpenError(endpoint, database_id, max(0.0, remaining))
+
+    def record(self, endpoint: str, database_id: str, status: Optional[int]) -> None:
+        """
+        Records the outcome of a request let through by ``check``
+
+        Args:
+            endpoint: Endpoint of the request
+            database_id: The database ID
+            status: HTTP status code, or None if no response was received
+        """
+        failed = classify_error(status) in (SERVER_ERROR, CONNECTION_ERROR)
+        with self._lock:
+            key = (endpoint, database_id)
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                if not failed:
+                    return
+                circuit = self._circuits[key] = _Circuit()
+            circuit.trial = False
+            if not failed:
+                circuit.state = CLOSED
+                circuit.failures = 0
+                return
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                circuit.state = OPEN
+                circuit.opened_at = self._clock()
+
+    def abandon(self, endpoint: str, database_id: str) -> None:
+        """
+        Forgets a request let through by ``check`` without recording an outcome
+
+        A request cancelled by the client says nothing about the endpoint's
+        health; a cancelled trial only lets the next caller try again.
+
+        Args:
+            endpoint: Endpoint of the request
+            database_id: The database ID
+        """
+        with self._lock:
+            circuit = self._circuits.get((endpoint, database_id))
+            if circuit is not None:
+                circuit.trial = False
+
+    def states(self) -> Dict[str, str]:
+        """Returns the state of every circuit that has seen a failure, keyed by ``endpoint/database_id``"""
+        with self._lock:
+            return {f"{endpoint}/{database_id}": circuit.state for (endpoint, database_id), circuit in self._circuits.items()}
@@ -0,0 +1,319 @@
+"""
+Pluggable JSON encoding and decoding for API requests and responses
+"""
+
+import functools
+import importlib.util
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type, cast
+
+from lightfeed.models import Record, RecordsResponse
+
+
+# Supported JSON backends, in order of preference for dict decoding
+BACKENDS = ("orjson", "msgspec", "json")
+
+# Typed response structs, built on first use (see _typed_classes)
+TYPED_CLASSES = ("TypedTimestamps", "TypedRecord", "TypedPagination", "TypedRecordsResponse")
+
+
+class _MappingAccess:
+    """
+    Dict-style read access for typed structs
+
+    Lets typed responses flow through helpers written against the
+    ``RecordsResponse`` TypedDicts (``page["results"]``, ``record.get("id")``).
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        return getattr(self, key, None) is not None
+
+
+class _Slotted(_MappingAccess):
+    """Base of the typed structs when msgspec is not installed"""
+
+    __slots__ = ()
+
+    def __init__(self, **fields: Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _installed(backend: str) -> bool:
+    """Tells whether a backend can be imported, without importing it"""
+    return backend == "json" or importlib.util.find_spec(backend) is not None
+
+
+@functools.lru_cache(maxsize=None)
+def _typed_classes() -> Dict[str, type]:
+    """
+    Builds the typed response structs
+
+    They are msgspec structs when msgspec is installed, so msgspec can decode
+    into them directly, and slotted classes otherwise. Building them on first
+    use keeps msgspec out of clients that decode into dicts.
+    """
+    if _installed("msgspec"):
+        import msgspec
+
+        class TypedTimestamps(msgspec.Struct, _MappingAccess):
+            """Timestamps of a record"""
+
+            created_at: str
+            changed_at: str
+            synced_at: str
+
+        class TypedRecord(msgspec.Struct, _MappingAccess):
+            """Record returned by the API"""
+
+            id: int
+            data: Dict[str, Any]
+            timestamps: TypedTimestamps
+            relevance_score: Optional[float] = None
+
+        class TypedPagination(msgspec.Struct, _MappingAccess):
+            """Pagination metadata"""
+
+            limit: int
+            has_more: bool
+            next_cursor: Optional[str] = None
+
+        class TypedRecordsResponse(msgspec.Struct, _MappingAccess):
+            """API response with records and pagination"""
+
+            results: List[TypedRecord]
+            pagination: TypedPagination
+
+    else:
+
+        class TypedTimestamps(_Slotted):  # type: ignore[no-redef]
+            """Timestamps of a record"""
+
+            __slots__ = ("created_at", "changed_at", "synced_at")
+
+        class TypedRecord(_Slotted):  # type: ignore[no-redef]
+            """Record returned by the API"""
+
+            __slots__ = ("id", "data", "timestamps", "relevance_score")
+
+        class TypedPagination(_Slotted):  # type: ignore[no-redef]
+            """Pagination metadata"""
+
+            __slots__ = ("limit", "has_more", "next_cursor")
+
+        class TypedRecordsResponse(_Slotted):  # type: ignore[no-redef]
+            """API response with records and pagination"""
+
+            __slots__ = ("results", "pagination")
+
+    classes: Dict[str, type] = {}
+    for cls in (TypedTimestamps, TypedRecord, TypedPagination, TypedRecordsResponse):
+        # Pickle finds the classes through the module's __getattr__
+        cls.__qualname__ = cls.__name__
+        classes[cls.__name__] = cls
+    return classes
+
+
+def __getattr__(name: str) -> Any:
+    if name in TYPED_CLASSES:
+        return _typed_classes()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _typed_record(record: Dict[str, Any]) -> Any:
+    """Builds a typed record from a decoded record dict"""
+    classes = _typed_classes()
+    timestamps = record.get("timestamps")
+    return classes["TypedRecord"](
+        id=record.get("id"),
+        data=record.get("data") or {},
+        timestamps=classes["TypedTimestamps"](**timestamps) if timestamps is not None else None,
+        relevance_score=record.get("relevance_score"),
+    )
+
+
+def _typed_from_dict(body: Dict[str, Any]) -> Any:
+    """Builds typed structs from a decoded response dict"""
+    classes = _typed_classes()
+    results = [_typed_record(record) for record in body.get("results") or []]
+    return classes["TypedRecordsResponse"](results=results, pagination=classes["TypedPagination"](**body["pagination"]))
+
+
+class JSONCodec:
+    """
+    Encodes request bodies and decodes response bodies
+
+    With ``typed=True`` responses are decoded into slotted ``TypedRecordsResponse``
+    structs instead of dicts. The structs also support dict-style reads, so the
+    pagination, export and sync helpers accept them unchanged.
+    """
+
+    name = "json"
+
+    # Exceptions raised for malformed input
+    decode_errors: Tuple[Type[BaseException], ...] = (ValueError, KeyError, TypeError)
+
+    def __init__(self, typed: bool = False) -> None:
+        self.typed = typed
+
+    def dumps(self, obj: Any) -> bytes:
+        """Serializes a request body"""
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        """Parses a JSON document"""
+        return json.loads(data)
+
+    def decode_response(self, data: bytes) -> RecordsResponse:
+        """
+        Parses a records response body
+
+        Args:
+            data: Raw response body
+
+        Returns:
+            The decoded response (typed structs when ``typed`` is set)
+        """
+        body = self.loads(data)
+        if self.typed:
+            return cast(RecordsResponse, _typed_from_dict(body))
+        return cast(RecordsResponse, body)
+
+    def decode_record(self, data: bytes) -> Record:
+        """
+        Parses a single record, e.g. one element of a streamed ``results`` array
+
+        Args:
+            data: Raw JSON of the record
+
+        Returns:
+            The decoded record (a typed struct when ``typed`` is set)
+        """
+        record = self.loads(data)
+        if self.typed:
+            return cast(Record, _typed_record(record))
+        return cast(Record, record)
+
+
+class OrjsonCodec(JSONCodec):
+    """Codec backed by orjson, imported on first use"""
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        self._bind()
+        return self.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        self._bind()
+        return self.loads(data)
+
+    def _bind(self) -> None:
+        """Imports orjson and replaces the methods above with its functions"""
+        import orjson
+
+        self.dumps = orjson.dumps  # type: ignore[method-assign]
+        self.loads = orjson.loads  # type: ignore[method-assign]
+
+
+class MsgspecCodec(JSONCodec):
+    """
+    Codec backed by msgspec, decoding typed responses without intermediate dicts
+
+    msgspec is imported and the decoders are built on first use.
+    """
+
+    name = "msgspec"
+
+    def dumps(self, obj: Any) -> bytes:
+        self._bind()
+        return self.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        self._bind()
+        return self.loads(data)
+
+    def decode_response(self, data: bytes) -> RecordsResponse:
+        self._bind()
+        return self.decode_response(data)
+
+    def decode_record(self, data: bytes) -> Record:
+        self._bind()
+        return self.decode_record(data)
+
+    def _bind(self) -> None:
+        """Imports msgspec and replaces the methods above with its encoder and decoders"""
+        import msgspec
+
+        decoder = msgspec.json.Decoder()
+        self.dumps = msgspec.json.Encoder().encode  # type: ignore[method-assign]
+        self.loads = decoder.decode  # type: ignore[method-assign]
+        if self.typed:
+            classes = _typed_classes()
+            self.decode_response = msgspec.json.Decoder(classes["TypedRecordsResponse"]).decode  # type: ignore[method-assign]
+            self.decode_record = msgspec.json.Decoder(classes["TypedRecord"]).decode  # type: ignore[method-assign]
+        else:
+            self.decode_response = decoder.decode  # type: ignore[method-assign]
+            self.decode_record = decoder.decode  # type: ignore[method-assign]
+
+
+_CODECS = {"json": JSONCodec, "orjson": OrjsonCodec, "msgspec": MsgspecCodec}
+
+
+def available_backends(typed: bool = False) -> List[str]:
+    """
+    Returns the installed JSON backends, fastest first
+
+    Args:
+        typed: Rank backends for typed decoding, where msgspec is fastest
+    """
+    names = [name for name in BACKENDS if _installed(name)]
+    if typed and "msgspec" in names:
+        names.remove("msgspec")
+        names.insert(0, "msgspec")
+    return names
+
+
+def get_codec(backend: str = "auto", typed: bool = False) -> JSONCodec:
+    """
+    Creates a codec for a JSON backend
+
+    Args:
+        backend: ``orjson``, ``msgspec``, ``json``, or ``auto`` for the fastest installed
+        typed: Decode responses into typed structs
+
+    Returns:
+        The codec; its backend is imported when it is first used
+
+    Raises:
+        ValueError: If the backend is unknown
+        ImportError: If the requested backend is not installed
+    """
+    if backend == "auto":
+        backend = available_backends(typed)[0]
+    if backend not in _CODECS:
+        raise ValueError(f"Unknown JSON backend: {backend}")
+    if not _installed(backend):
+        raise ImportError(f"JSON backend '{backend}' is not installed")
+    return _CODECS[backend](typed)
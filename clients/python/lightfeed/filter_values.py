@@ -0,0 +1,52 @@
+"""
+Value semantics shared by the local filter evaluators
+
+The compiler in ``lightfeed.filtering``, the planner and the SQLite mirror
+must agree on how filter expressions are read so that a filter selects the
+same records wherever it runs; they all use these helpers.
+"""
+
+import math
+from numbers import Number
+from typing import Any, Optional, Union
+
+
+def enum_value(value: Union[str, Any]) -> str:
+    """Returns the string value of an ``Operator``/``Condition`` member, or the string itself"""
+    return getattr(value, "value", value)
+
+
+def as_number(value: Any) -> Optional[float]:
+    """Returns the numeric value of numbers and numeric strings, else None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, Number):
+        return float(value)  # type: ignore[arg-type]
+    if isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return None
+        # Words such as "nan" or "infinity" are text, not numbers
+        return number if math.isfinite(number) else None
+    return None
+
+
+def as_text(value: Any) -> str:
+    """Returns the text rules compare a value as (``true``/``false`` for booleans, empty for null)"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return ""
+    return str(value)
+
+
+def is_empty(value: Any) -> bool:
+    """Whether a value counts as empty: null, a blank string, or an empty list or object"""
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip() == ""
+    if isinstance(value, (list, dict)):
+        return len(value) == 0
+    return False
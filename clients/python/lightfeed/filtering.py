@@ -0,0 +1,187 @@
+"""
+Client-side compiler and evaluator for filter expressions
+
+Compiles a ``Filter`` (nested ``RuleGroup``/``ColumnRule`` expressions) into
+a plain Python predicate that can be applied to records already held
+locally, e.g. from a cache, a sync or an export.
+
+Semantics follow the API's SQL-style evaluation:
+
+- Rules read ``record["data"][column]``. A missing or null value only
+  matches ``is_empty``; every other operator evaluates to false for it.
+- ``equals``/``not_equals`` and the ordering operators compare numbers
+  numerically (numeric strings are accepted on either side) and
+  everything else as strings.
+- ``contains``/``not_contains``/``starts_with``/``ends_with`` are case
+  insensitive substring tests on strings; for list values ``contains``
+  tests membership.
+- ``is_empty`` matches null, missing, empty strings and empty lists/objects.
+- A group without a condition uses AND; a group without rules matches
+  every record.
+"""
+
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional
+
+from lightfeed.filter_values import as_number, as_text, enum_value, is_empty
+from lightfeed.models import Condition, Filter, Operator, Record
+
+
+# A compiled filter: takes a record's data dict and says whether it matches
+DataPredicate = Callable[[Mapping[str, Any]], bool]
+
+_MISSING = object()
+
+
+def compile_filter(filter: Filter, case_sensitive: bool = False) -> Callable[[Record], bool]:
+    """
+    Compiles a filter into a predicate over records
+
+    Rule values, operators and conditions are resolved once up front, and
+    groups short-circuit at evaluation time.
+
+    Args:
+        filter: The filter expression
+        case_sensitive: Make the substring operators case sensitive
+
+    Returns:
+        A predicate returning True for matching records
+
+    Raises:
+        ValueError: If the filter uses an unknown operator or condition
+    """
+    predicate = _compile_node(filter, case_sensitive)
+
+    def matches(record: Record) -> bool:
+        return predicate(record.get("data") or {})
+
+    return matches
+
+
+def apply_filter(records: Iterable[Record], filter: Filter, case_sensitive: bool = False) -> Iterator[Record]:
+    """
+    Lazily yields the records matching a filter
+
+    Args:
+        records: Records to filter
+        filter: The filter expression
+        case_sensitive: Make the substring operators case sensitive
+
+    Returns:
+        Iterator over matching records
+    """
+    predicate = compile_filter(filter, case_sensitive)
+    return (record for record in records if predicate(record))
+
+
+def _compile_node(node: Any, case_sensitive: bool) -> DataPredicate:
+    if "rules" in node:
+        return _compile_group(node, case_sensitive)
+    return _compile_rule(node, case_sensitive)
+
+
+def _compile_group(group: Any, case_sensitive: bool) -> DataPredicate:
+    condition = enum_value(group.get("condition") or Condition.AND)
+    if condition not in (Condition.AND.value, Condition.OR.value):
+        raise ValueError(f"Unknown filter condition: {condition}")
+    predicates = [_compile_node(rule, case_sensitive) for rule in group.get("rules") or []]
+
+    if not predicates:
+        return lambda data: True
+    if len(predicates) == 1:
+        return predicates[0]
+    if condition == Condition.AND.value:
+        return lambda data: all(p(data) for p in predicates)
+    return lambda data: any(p(data) for p in predicates)
+
+
+def _compile_rule(rule: Any, case_sensitive: bool) -> DataPredicate:
+    column = rule["column"]
+    operator = enum_value(rule["operator"])
+    value = rule.get("value")
+
+    if operator == Operator.IS_EMPTY.value:
+        return lambda data: is_empty(data.get(column))
+    if operator == Operator.IS_NOT_EMPTY.value:
+        return lambda data: not is_empty(data.get(column))
+
+    test = _compile_test(operator, value, case_sensitive)
+
+    def evaluate(data: Mapping[str, Any]) -> bool:
+        actual = data.get(column, _MISSING)
+        if actual is _MISSING or actual is None:
+            return False
+        return test(actual)
+
+    return evaluate
+
+
+def _compile_test(operator: str, value: Any, case_sensitive: bool) -> Callable[[Any], bool]:
+    """Builds the comparison for one operator with its value pre-processed"""
+    if operator in (Operator.EQUALS.value, Operator.NOT_EQUALS.value):
+        expected_number = as_number(value)
+        expected_text = as_text(value)
+        negate = operator == Operator.NOT_EQUALS.value
+
+        def equals(actual: Any) -> bool:
+            actual_number = as_number(actual)
+            if expected_number is not None and actual_number is not None:
+                result = actual_number == expected_number
+            elif isinstance(actual, (list, dict)) or isinstance(value, (list, dict)):
+                result = actual == value
+            else:
+                result = as_text(actual) == expected_text
+            return result != negate
+
+        return equals
+
+    if operator in _ORDERINGS:
+        compare = _ORDERINGS[operator]
+        expected_number = as_number(value)
+        expected_text = as_text(value)
+
+        def ordering(actual: Any) -> bool:
+            actual_number = as_number(actual)
+            if expected_number is not None:
+                return actual_number is not None and compare(actual_number, expected_number)
+            if actual_number is not None or isinstance(actual, (list, dict)):
+                return False
+            return compare(as_text(actual), expected_text)
+
+        return ordering
+
+    if operator in _SUBSTRING_TESTS:
+        needle = as_text(value)
+        if not case_sensitive:
+            needle = needle.lower()
+        test = _SUBSTRING_TESTS[operator]
+        negate = operator == Operator.NOT_CONTAINS.value
+
+        def substring(actual: Any) -> bool:
+            if isinstance(actual, list) and operator in (Operator.CONTAINS.value, Operator.NOT_CONTAINS.value):
+                items = [as_text(item) for item in actual]
+                if not case_sensitive:
+                    items = [item.lower() for item in items]
+                return (needle in items) != negate
+            text = as_text(actual)
+            if not case_sensitive:
+                text = text.lower()
+            return test(text, needle) != negate
+
+        return substring
+
+    raise ValueError(f"Unknown filter operator: {operator}")
+
+
+_ORDERINGS = {
+    Operator.GREATER_THAN.value: lambda a, b: a > b,
+    Operator.LESS_THAN.value: lambda a, b: a < b,
+    Operator.GREATER_THAN_OR_EQUALS.value: lambda a, b: a >= b,
+    Operator.LESS_THAN_OR_EQUALS.value: lambda a, b: a <= b,
+}
+
+_SUBSTRING_TESTS = {
+    Operator.CONTAINS.value: lambda text, needle: needle in text,
+    Operator.NOT_CONTAINS.value: lambda text, needle: needle in text,
+    Operator.STARTS_WITH.value: lambda text, needle: text.startswith(needle),
+    Operator.ENDS_WITH.value: lambda text, needle: text.endswith(needle),
+}
@@ -0,0 +1,453 @@
+"""
+Request hedging: duplicate slow idempotent requests to cut tail latency
+
+A request that has not answered within a high percentile of the latency
+recently observed for its endpoint is sent a second time, on another
+pooled connection. Whichever attempt answers first wins and the other is
+cancelled, even while it is still waiting for its response headers.
+Hedges are paid for from a budget that refills with every request, so
+the extra load stays below ``maxRatio`` of the traffic.
+"""
+
+import heapq
+import itertools
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypedDict, TypeVar
+
+from lightfeed.models import HedgingConfig
+
+if TYPE_CHECKING:
+    from requests.adapters import HTTPAdapter
+
+
+# Default hedging settings
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_MAX_RATIO = 0.05
+DEFAULT_MIN_DELAY = 0.01  # seconds
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_WINDOW = 500
+DEFAULT_ENDPOINTS = ("search", "filter")
+
+# Hedges that can be saved up while traffic is fast
+MAX_BUDGET = 10.0
+
+# Observations between two recomputations of an endpoint's hedge delay
+_REFRESH_EVERY = 16
+
+# Status recorded for an attempt aborted before its response arrived, as
+# servers log a client that hung up; it counts as neither success nor failure
+CLIENT_CLOSED_REQUEST = 499
+
+T = TypeVar("T")
+
+
+class HedgeCancelled(Exception):
+    """Raised in an attempt that lost the race against its duplicate"""
+
+
+class CancelToken:
+    """
+    Cancellation signal shared with one attempt
+
+    The attempt registers how to abort itself (e.g. closing its response)
+    with ``on_cancel``; callbacks registered after cancellation run at once.
+    """
+
+    def __init__(self) -> None:
+        self.cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        self._event.set()
+        for callback in callbacks:
+            _quietly(callback)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps for up to ``timeout`` seconds; returns True as soon as the token is cancelled"""
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        _quietly(callback)
+
+
+class HedgeStats(TypedDict):
+    """Hedging counters of a client"""
+
+    requests: int  # Requests eligible for hedging
+    hedges: int  # Duplicates sent
+    hedges_won: int  # Duplicates that answered before the original
+    delays: Dict[str, Optional[float]]  # Current hedge delay per endpoint in seconds
+
+
+class _LatencyWindow:
+    """Recent latencies of one endpoint and the hedge delay derived from them"""
+
+    def __init__(self, size: int) -> None:
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.delay: Optional[float] = None
+        self._stale = 0
+
+    def observe(self, seconds: float, percentile: float, min_samples: int, min_delay: float) -> None:
+        self.samples.append(seconds)
+        self._stale += 1
+        if len(self.samples) < min_samples:
+            return
+        if self.delay is None or self._stale >= _REFRESH_EVERY:
+            ordered = sorted(self.samples)
+            index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+            self.delay = max(min_delay, ordered[index])
+            self._stale = 0
+
+
+class _Timer:
+    """Runs callbacks at their deadlines on one shared thread"""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, Callable[[], None]]] = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def call_at(self, deadline: float, callback: Callable[[], None]) -> None:
+        """Schedules a callback for a ``time.perf_counter`` deadline"""
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, next(self._order), callback))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="lightfeed-hedge-timer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Drops pending callbacks and stops the thread"""
+        with self._condition:
+            self._closed = True
+            self._heap.clear()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    remaining = self._heap[0][0] - time.perf_counter() if self._heap else None
+                    if remaining is not None and remaining <= 0:
+                        callback = heapq.heappop(self._heap)[2]
+                        break
+                    self._condition.wait(remaining)
+            _quietly(callback)
+
+
+class HedgingPolicy:
+    """
+    Decides when to send a duplicate of a request and races the two attempts
+
+    Thread-safe; one policy is shared by all threads of a client. The
+    original attempt runs on the caller's thread, so the hedge delay and the
+    observed latencies start when the request is actually sent. One timer
+    thread tracks the hedge delays of all requests; only duplicates that are
+    actually sent take a thread of the small pool owned by the policy.
+    """
+
+    def __init__(self, config: Optional[HedgingConfig] = None, max_workers: int = 20) -> None:
+        """
+        Creates a hedging policy
+
+        Args:
+            config: Hedging configuration
+            max_workers: Threads available for attempts, shared by all callers
+        """
+        config = config or {}
+        self.percentile = config.get("percentile") or DEFAULT_PERCENTILE
+        max_ratio = config.get("maxRatio")
+        self.max_ratio = DEFAULT_MAX_RATIO if max_ratio is None else max_ratio
+        min_delay = config.get("minDelay")
+        self.min_delay = DEFAULT_MIN_DELAY if min_delay is None else min_delay
+        self.min_samples = max(1, config.get("minSamples") or DEFAULT_MIN_SAMPLES)
+        self.window = config.get("window") or DEFAULT_WINDOW
+        self.endpoints = frozenset(config.get("endpoints") or DEFAULT_ENDPOINTS)
+        self.max_workers = max(2, max_workers)
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self._budget = 0.0
+        self._windows: Dict[str, _LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._timer: Optional[_Timer] = None
+
+    def applies_to(self, endpoint: str) -> bool:
+        """Whether requests to an endpoint may be hedged"""
+        return endpoint in self.endpoints
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """Returns how long to wait before hedging, or None until enough latencies are known"""
+        with self._lock:
+            window = self._windows.get(endpoint)
+            return window.delay if window is not None else None
+
+    def observe(self, endpoint: str, seconds: float) -> None:
+        """Records the latency of a completed request"""
+        with self._lock:
+            window = self._windows.get(endpoint)
+            if window is None:
+                window = self._windows[endpoint] = _LatencyWindow(self.window)
+            window.observe(seconds, self.percentile, self.min_samples, self.min_delay)
+
+    def run(self, endpoint: str, attempt: Callable[[bool, CancelToken], T]) -> T:
+        """
+        Runs a request, racing a duplicate against it if it is slow
+
+        Args:
+            endpoint: Endpoint of the request
+            attempt: Sends the request; called with whether it is the duplicate
+                and a token it must abort on once cancelled (raising ``HedgeCancelled``)
+
+        Returns:
+            The result of the first attempt to succeed
+
+        Raises:
+            Exception: The original attempt's error if every attempt failed
+        """
+        started = time.perf_counter()
+        delay = self._admit(endpoint)
+        if delay is None:
+            result = attempt(False, CancelToken())
+        else:
+            result = self._race(endpoint, attempt, delay)
+        self.observe(endpoint, time.perf_counter() - started)
+        return result
+
+    def stats(self) -> HedgeStats:
+        """Returns the hedging counters"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedges_won": self.hedges_won,
+                "delays": {endpoint: window.delay for endpoint, window in self._windows.items()},
+            }
+
+    def close(self) -> None:
+        """Stops the timer and attempt threads"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.close()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _admit(self, endpoint: str) -> Optional[float]:
+        """Counts a request, refills the budget and returns the hedge delay, if any"""
+        with self._lock:
+            self.requests += 1
+            self._budget = min(MAX_BUDGET, self._budget + self.max_ratio)
+            window = self._windows.get(endpoint)
+            return window.delay if window is not None else None
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self._budget < 1.0:
+                return False
+            self._budget -= 1.0
+            self.hedges += 1
+            return True
+
+    def _race(self, endpoint: str, attempt: Callable[[bool, CancelToken], T], delay: float) -> T:
+        tokens = {False: CancelToken(), True: CancelToken()}
+        context = copy_context()
+        lock = threading.Lock()
+        primary_done = False
+        hedges: List["Future[T]"] = []  # The duplicate, once sent
+        winner: List[bool] = []
+
+        def claim(hedge: bool) -> bool:
+            """Declares an attempt the winner unless the other one already is"""
+            with lock:
+                if not winner:
+                    winner.append(hedge)
+                return winner[0] == hedge
+
+        def duplicate() -> T:
+            result = attempt(True, tokens[True])
+            if not claim(True):
+                raise HedgeCancelled()
+            # Abort the original wherever it is, freeing the caller's thread
+            tokens[False].cancel()
+            with self._lock:
+                self.hedges_won += 1
+            return result
+
+        def send() -> None:
+            # Runs on the timer thread once the delay has passed since the original's send
+            with lock:
+                if primary_done or not self._take_budget():
+                    return
+                hedges.append(self._get_executor().submit(context.run, duplicate))
+
+        def finish() -> Optional["Future[T]"]:
+            """Marks the original as done and returns the duplicate, if it was sent"""
+            nonlocal primary_done
+            with lock:
+                primary_done = True
+                return hedges[0] if hedges else None
+
+        self._get_timer().call_at(time.perf_counter() + delay, send)
+        try:
+            result = attempt(False, tokens[False])
+        except Exception as error:
+            hedge = finish()
+            if hedge is None or hedge.cancel():
+                raise
+            try:
+                # Cancelled because the duplicate won, or failed while it may still succeed
+                return hedge.result()
+            except Exception:
+                raise error
+        hedge = finish()
+        if not claim(False):
+            assert hedge is not None
+            return hedge.result()
+        if hedge is not None:
+            tokens[True].cancel()
+            hedge.cancel()
+        return result
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="lightfeed-hedge")
+            return self._executor
+
+    def _get_timer(self) -> _Timer:
+        with self._lock:
+            if self._timer is None:
+                self._timer = _Timer()
+            return self._timer
+
+
+# Scope of the hedged attempt waiting for its response on the current thread
+_abort_scope: ContextVar[Optional["_AbortScope"]] = ContextVar("lightfeed_abort_scope", default=None)
+
+
+class _AbortScope:
+    """Connections an attempt is waiting on, shut down if its token is cancelled meanwhile"""
+
+    def __init__(self) -> None:
+        self.active = True
+        self.connections: List[Any] = []
+        self.lock = threading.Lock()
+
+    def add(self, connection: Any) -> None:
+        with self.lock:
+            if self.active:
+                self.connections.append(connection)
+
+    def abort(self) -> None:
+        # Under the lock so a connection is never shut down once returned to its pool
+        with self.lock:
+            if self.active:
+                for connection in self.connections:
+                    _quietly(partial(_shutdown, connection))
+
+    def close(self) -> None:
+        with self.lock:
+            self.active = False
+            self.connections = []
+
+
+@contextmanager
+def abortable(token: CancelToken) -> Iterator[None]:
+    """
+    Lets cancelling a token interrupt a request sent on this thread
+
+    Only requests sent through an adapter from ``abortable_adapter`` are
+    interrupted; they fail with a connection error. Once the block exits,
+    cancelling the token no longer touches the connection.
+
+    Args:
+        token: The attempt's cancellation token
+    """
+    scope = _AbortScope()
+    reset = _abort_scope.set(scope)
+    token.on_cancel(scope.abort)
+    try:
+        yield
+    finally:
+        scope.close()
+        _abort_scope.reset(reset)
+
+
+def abortable_adapter(**kwargs: Any) -> "HTTPAdapter":
+    """
+    Creates a requests ``HTTPAdapter`` whose requests ``abortable`` can interrupt
+
+    Args:
+        **kwargs: Arguments of ``HTTPAdapter``
+
+    Returns:
+        The adapter
+    """
+    return _abortable_adapter_class()(**kwargs)
+
+
+@lru_cache(maxsize=None)
+def _abortable_adapter_class() -> type:
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class AbortablePool:
+        def _get_conn(self, timeout: Optional[float] = None) -> Any:
+            connection = super()._get_conn(timeout)  # type: ignore[misc]
+            scope = _abort_scope.get()
+            if scope is not None:
+                scope.add(connection)
+            return connection
+
+    pool_classes = {
+        "http": type("AbortableHTTPConnectionPool", (AbortablePool, HTTPConnectionPool), {}),
+        "https": type("AbortableHTTPSConnectionPool", (AbortablePool, HTTPSConnectionPool), {}),
+    }
+
+    class AbortableAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    return AbortableAdapter
+
+
+def _shutdown(connection: Any) -> None:
+    """Wakes a thread blocked reading a connection; its read fails"""
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        # The plain socket method, as SSLSocket.shutdown also unwraps TLS under the reader
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+
+
+def _quietly(callback: Callable[[], None]) -> None:
+    try:
+        callback()
+    except Exception:
+        pass
@@ -0,0 +1,548 @@
+"""
+Request instrumentation: hooks, per-request events and metrics adapters
+
+Every HTTP attempt made by a client produces a ``RequestEvent`` that is
+passed to the registered hooks:
+
+- ``on_request_start`` before the request is sent
+- ``on_response`` once the body has been received and decoded
+- ``on_error`` when the attempt fails (``will_retry`` tells whether the
+  client retries it) or, with request hedging, is abandoned because its
+  duplicate answered first (``cancelled``)
+
+Phase durations (in seconds) are recorded in ``event.phases``:
+
+- ``wait``: time spent in the client-side rate limiter or a shared pause
+- ``connect``/``tls``/``send``/``server``: connection setup, upload and time
+  waiting for the response headers (async client only, from httpx tracing)
+- ``headers``: time until the response headers arrived, including connection
+  setup and server time (synchronous client, where requests does not expose
+  the finer phases)
+- ``download``: time reading the response body
+- ``decode``: time decoding the JSON body
+
+Requests answered from the response cache or shared through request
+coalescing do not produce events of their own.
+"""
+
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+logger = logging.getLogger("lightfeed")
+
+# Default histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0, 30.0,
+)
+
+# Page number of the request being made by a pagination helper, if any
+_current_page: "ContextVar[Optional[int]]" = ContextVar("lightfeed_page", default=None)
+
+# Collects the events of requests made in the current context, if set
+_captured: "ContextVar[Optional[List[RequestEvent]]]" = ContextVar("lightfeed_captured", default=None)
+
+
+@contextlib.contextmanager
+def page_context(page: int) -> Iterator[None]:
+    """
+    Marks requests made inside the block as fetching the given page
+
+    Args:
+        page: Page number, starting at 1
+    """
+    token = _current_page.set(page)
+    try:
+        yield
+    finally:
+        _current_page.reset(token)
+
+
+@contextlib.contextmanager
+def capture_events() -> Iterator[List["RequestEvent"]]:
+    """
+    Collects the finished events of requests made inside the block
+
+    Used by helpers that adapt to observed response sizes and timings.
+
+    Returns:
+        List filled with the events as requests complete or fail
+    """
+    events: List[RequestEvent] = []
+    token = _captured.set(events)
+    try:
+        yield events
+    finally:
+        _captured.reset(token)
+
+
+class RequestEvent:
+    """One HTTP attempt made by a client"""
+
+    __slots__ = (
+        "endpoint",
+        "database_id",
+        "method",
+        "url",
+        "attempt",
+        "page",
+        "start_time",
+        "status",
+        "bytes_out",
+        "bytes_in",
+        "wire_bytes_out",
+        "wire_bytes_in",
+        "records",
+        "phases",
+        "duration",
+        "error",
+        "will_retry",
+        "timed_out",
+        "hedge",
+        "cancelled",
+        "_started",
+    )
+
+    def __init__(self, endpoint: str, database_id: str, method: str, url: str, attempt: int = 0) -> None:
+        self.endpoint = endpoint  # "records", "search" or "filter"
+        self.database_id = database_id
+        self.method = method
+        self.url = url
+        self.attempt = attempt  # Number of retries made before this attempt
+        self.page = _current_page.get()  # Page number when made by a pagination helper
+        self.start_time = time.time()  # Wall-clock start, seconds since the epoch
+        self.status: Optional[int] = None  # HTTP status, None for connection errors
+        self.bytes_out = 0  # Request body size
+        self.bytes_in = 0  # Response body size, decompressed
+        self.wire_bytes_out = 0  # Request body size as sent, after compression
+        self.wire_bytes_in = 0  # Response body size as received, before decompression
+        self.records: Optional[int] = None  # Records in the decoded page
+        self.phases: Dict[str, float] = {}  # Seconds per phase
+        self.duration: Optional[float] = None  # Total seconds, set when the attempt ends
+        self.error: Optional[BaseException] = None
+        self.will_retry = False
+        self.timed_out = False  # The attempt failed with a timeout
+        self.hedge = False  # The attempt is a duplicate sent by request hedging
+        self.cancelled = False  # The attempt was abandoned because its duplicate answered first
+        self._started = time.perf_counter()
+
+    def retry(self) -> "RequestEvent":
+        """Returns the event for the next attempt of the same request"""
+        event = RequestEvent(self.endpoint, self.database_id, self.method, self.url, self.attempt + 1)
+        event.hedge = self.hedge
+        return event
+
+    def hedged(self) -> "RequestEvent":
+        """Returns the event for a duplicate of this attempt sent by request hedging"""
+        event = RequestEvent(self.endpoint, self.database_id, self.method, self.url, self.attempt)
+        event.hedge = True
+        return event
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        """Adds time spent in a phase"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + max(0.0, seconds)
+
+    def finish(self) -> None:
+        """Records the total duration of the attempt"""
+        self.duration = time.perf_counter() - self._started
+
+    def __repr__(self) -> str:
+        return (
+            f"RequestEvent(endpoint={self.endpoint!r}, database_id={self.database_id!r}, "
+            f"attempt={self.attempt}, status={self.status}, duration={self.duration})"
+        )
+
+
+class RequestHooks:
+    """
+    Base class for request hooks
+
+    Override any of the callbacks. They run on the thread (or event loop)
+    making the request, so they should be quick; exceptions raised by hooks
+    are logged and otherwise ignored.
+    """
+
+    def on_request_start(self, event: RequestEvent) -> None:
+        """Called before an attempt is sent"""
+
+    def on_response(self, event: RequestEvent) -> None:
+        """Called after a successful attempt has been decoded"""
+
+    def on_error(self, event: RequestEvent) -> None:
+        """Called when an attempt fails"""
+
+
+class Instrumentation:
+    """Dispatches request events to the registered hooks"""
+
+    def __init__(self, hooks: Optional[Sequence[RequestHooks]] = None) -> None:
+        self.hooks: List[RequestHooks] = list(hooks or [])
+
+    def add(self, hooks: RequestHooks) -> None:
+        """Registers hooks"""
+        self.hooks.append(hooks)
+
+    def request_start(self, event: RequestEvent) -> None:
+        for hooks in self.hooks:
+            self._call(hooks.on_request_start, event)
+
+    def response(self, event: RequestEvent) -> None:
+        event.finish()
+        _capture(event)
+        for hooks in self.hooks:
+            self._call(hooks.on_response, event)
+
+    def error(self, event: RequestEvent, error: BaseException, will_retry: bool = False) -> None:
+        event.error = error
+        event.will_retry = will_retry
+        event.finish()
+        _capture(event)
+        for hooks in self.hooks:
+            self._call(hooks.on_error, event)
+
+    @staticmethod
+    def _call(callback: Any, event: RequestEvent) -> None:
+        try:
+            callback(event)
+        except Exception:
+            logger.exception("Lightfeed request hook %r failed", callback)
+
+
+def _capture(event: RequestEvent) -> None:
+    captured = _captured.get()
+    if captured is not None:
+        captured.append(event)
+
+
+class HttpxPhaseTracer:
+    """
+    Collects connection and transfer phases from httpx trace events
+
+    Pass an instance as the ``trace`` request extension.
+    """
+
+    # httpcore trace event prefixes and the phase they belong to
+    _PHASES = {
+        "connection.connect_tcp": "connect",
+        "connection.connect_unix_socket": "connect",
+        "connection.start_tls": "tls",
+        "http11.send_request_headers": "send",
+        "http11.send_request_body": "send",
+        "http2.send_request_headers": "send",
+        "http2.send_request_body": "send",
+        "http11.receive_response_headers": "server",
+        "http2.receive_response_headers": "server",
+        "http11.receive_response_body": "download",
+        "http2.receive_response_body": "download",
+    }
+
+    def __init__(self, event: RequestEvent) -> None:
+        self.event = event
+        self._started: Dict[str, float] = {}
+
+    async def __call__(self, name: str, info: Dict[str, Any]) -> None:
+        prefix, _, stage = name.rpartition(".")
+        phase = self._PHASES.get(prefix)
+        if phase is None:
+            return
+        if stage == "started":
+            self._started[prefix] = time.perf_counter()
+        elif prefix in self._started:
+            self.event.add_phase(phase, time.perf_counter() - self._started.pop(prefix))
+
+
+class Histogram:
+    """Fixed-bucket histogram with approximate quantiles"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile by interpolating inside its bucket
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            The estimated value (0.0 when empty)
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class _Series:
+    """Metrics of one endpoint (and database)"""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.hedges = 0
+        self.cancelled = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.wire_bytes_in = 0
+        self.wire_bytes_out = 0
+        self.records = 0
+        self.statuses: Dict[str, int] = {}
+        self.duration = Histogram(buckets)
+        self.phases: Dict[str, Histogram] = {}
+        self.page_records = Histogram((1, 10, 50, 100, 200, 300, 400, 500))
+
+    def phase(self, name: str) -> Histogram:
+        if name not in self.phases:
+            self.phases[name] = Histogram(self.buckets)
+        return self.phases[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "cancelled": self.cancelled,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "wire_bytes_in": self.wire_bytes_in,
+            "wire_bytes_out": self.wire_bytes_out,
+            "records": self.records,
+            "statuses": dict(self.statuses),
+            "duration": self.duration.summary(),
+            "phases": {name: h.summary() for name, h in self.phases.items()},
+            "records_per_page": self.page_records.summary(),
+        }
+
+
+class MetricsAggregator(RequestHooks):
+    """
+    In-process metrics with latency histograms per endpoint
+
+    Thread-safe. ``snapshot()`` returns counters and histogram summaries
+    (count, mean, p50/p90/p99, max) keyed by endpoint, or by
+    ``endpoint/database_id`` with ``per_database=True``.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, per_database: bool = False) -> None:
+        self.buckets = tuple(buckets)
+        self.per_database = per_database
+        self._lock = threading.Lock()
+        self._series: Dict[str, _Series] = {}
+
+    def on_response(self, event: RequestEvent) -> None:
+        with self._lock:
+            series = self._get_series(event)
+            self._observe(series, event)
+            series.records += event.records or 0
+            if event.records is not None:
+                series.page_records.observe(event.records)
+
+    def on_error(self, event: RequestEvent) -> None:
+        with self._lock:
+            series = self._get_series(event)
+            self._observe(series, event)
+            if event.cancelled:
+                series.cancelled += 1
+                return
+            series.errors += 1
+            if event.will_retry:
+                series.retries += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the current metrics keyed by series"""
+        with self._lock:
+            return {key: series.snapshot() for key, series in self._series.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def _get_series(self, event: RequestEvent) -> _Series:
+        key = f"{event.endpoint}/{event.database_id}" if self.per_database else event.endpoint
+        if key not in self._series:
+            self._series[key] = _Series(self.buckets)
+        return self._series[key]
+
+    @staticmethod
+    def _observe(series: _Series, event: RequestEvent) -> None:
+        series.requests += 1
+        if event.hedge:
+            series.hedges += 1
+        series.bytes_in += event.bytes_in
+        series.bytes_out += event.bytes_out
+        series.wire_bytes_in += event.wire_bytes_in
+        series.wire_bytes_out += event.wire_bytes_out
+        status = str(event.status) if event.status is not None else "connection_error"
+        series.statuses[status] = series.statuses.get(status, 0) + 1
+        if event.duration is not None:
+            series.duration.observe(event.duration)
+        for phase, seconds in event.phases.items():
+            series.phase(phase).observe(seconds)
+
+
+def _attributes(event: RequestEvent) -> Dict[str, Any]:
+    attributes: Dict[str, Any] = {
+        "lightfeed.endpoint": event.endpoint,
+        "lightfeed.database_id": event.database_id,
+        "http.request.method": event.method,
+    }
+    if event.status is not None:
+        attributes["http.response.status_code"] = event.status
+    return attributes
+
+
+class OpenTelemetryHooks(RequestHooks):
+    """
+    Exports request metrics and spans through OpenTelemetry
+
+    Does nothing when ``opentelemetry-api`` is not installed (check ``enabled``).
+    """
+
+    def __init__(self, meter_provider: Any = None, tracer_provider: Any = None) -> None:
+        try:
+            from opentelemetry import metrics, trace
+        except ImportError:
+            self.enabled = False
+            return
+        self.enabled = True
+        self._trace = trace
+        meter = metrics.get_meter("lightfeed", meter_provider=meter_provider)
+        self._tracer = trace.get_tracer("lightfeed", tracer_provider=tracer_provider)
+        self._duration = meter.create_histogram(
+            "lightfeed.client.request.duration", unit="s", description="Duration of API requests"
+        )
+        self._phases = meter.create_histogram(
+            "lightfeed.client.request.phase.duration", unit="s", description="Duration of request phases"
+        )
+        self._bytes_in = meter.create_counter("lightfeed.client.response.size", unit="By")
+        self._bytes_out = meter.create_counter("lightfeed.client.request.size", unit="By")
+        self._wire_bytes_in = meter.create_counter("lightfeed.client.response.wire_size", unit="By")
+        self._wire_bytes_out = meter.create_counter("lightfeed.client.request.wire_size", unit="By")
+        self._records = meter.create_counter("lightfeed.client.records", description="Records received")
+        self._errors = meter.create_counter("lightfeed.client.errors", description="Failed request attempts")
+
+    def on_response(self, event: RequestEvent) -> None:
+        if self.enabled:
+            self._record(event)
+
+    def on_error(self, event: RequestEvent) -> None:
+        if self.enabled:
+            self._record(event)
+
+    def _record(self, event: RequestEvent) -> None:
+        attributes = _attributes(event)
+        self._duration.record(event.duration or 0.0, attributes)
+        for phase, seconds in event.phases.items():
+            self._phases.record(seconds, dict(attributes, **{"lightfeed.phase": phase}))
+        self._bytes_in.add(event.bytes_in, attributes)
+        self._bytes_out.add(event.bytes_out, attributes)
+        self._wire_bytes_in.add(event.wire_bytes_in, attributes)
+        self._wire_bytes_out.add(event.wire_bytes_out, attributes)
+        if event.records:
+            self._records.add(event.records, attributes)
+
+        start_ns = int(event.start_time * 1e9)
+        span = self._tracer.start_span(f"lightfeed {event.endpoint}", start_time=start_ns, attributes=attributes)
+        if event.page is not None:
+            span.set_attribute("lightfeed.page", event.page)
+        if event.error is not None and not event.cancelled:
+            self._errors.add(1, attributes)
+            span.record_exception(event.error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(event.error)))
+        span.end(end_time=start_ns + int((event.duration or 0.0) * 1e9))
+
+
+class PrometheusHooks(RequestHooks):
+    """
+    Exports request metrics to Prometheus
+
+    Metrics are registered on creation, so create one instance per registry.
+    Does nothing when ``prometheus_client`` is not installed (check ``enabled``).
+    """
+
+    def __init__(
+        self,
+        registry: Any = None,
+        namespace: str = "lightfeed",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        try:
+            from prometheus_client import Counter, Histogram as PrometheusHistogram
+        except ImportError:
+            self.enabled = False
+            return
+        self.enabled = True
+        options: Dict[str, Any] = {"namespace": namespace}
+        if registry is not None:
+            options["registry"] = registry
+        self._duration = PrometheusHistogram(
+            "request_duration_seconds", "Duration of API requests", ["endpoint"], buckets=buckets, **options
+        )
+        self._phases = PrometheusHistogram(
+            "request_phase_seconds", "Duration of request phases", ["endpoint", "phase"], buckets=buckets, **options
+        )
+        self._requests = Counter("requests_total", "API request attempts", ["endpoint", "status"], **options)
+        self._bytes = Counter("bytes_total", "Body bytes transferred", ["endpoint", "direction"], **options)
+        self._wire_bytes = Counter(
+            "wire_bytes_total", "Body bytes transferred before decompression", ["endpoint", "direction"], **options
+        )
+        self._records = Counter("records_total", "Records received", ["endpoint"], **options)
+        self._retries = Counter("retries_total", "Retried request attempts", ["endpoint"], **options)
+
+    def on_response(self, event: RequestEvent) -> None:
+        if self.enabled:
+            self._record(event)
+            self._records.labels(event.endpoint).inc(event.records or 0)
+
+    def on_error(self, event: RequestEvent) -> None:
+        if self.enabled:
+            self._record(event)
+            if event.will_retry:
+                self._retries.labels(event.endpoint).inc()
+
+    def _record(self, event: RequestEvent) -> None:
+        status = str(event.status) if event.status is not None else "connection_error"
+        self._requests.labels(event.endpoint, status).inc()
+        self._duration.labels(event.endpoint).observe(event.duration or 0.0)
+        for phase, seconds in event.phases.items():
+            self._phases.labels(event.endpoint, phase).observe(seconds)
+        self._bytes.labels(event.endpoint, "in").inc(event.bytes_in)
+        self._bytes.labels(event.endpoint, "out").inc(event.bytes_out)
+        self._wire_bytes.labels(event.endpoint, "in").inc(event.wire_bytes_in)
+        self._wire_bytes.labels(event.endpoint, "out").inc(event.wire_bytes_out)
@@ -0,0 +1,612 @@
+"""
+Local SQLite mirror of synced records with an indexed query API
+
+Records pulled from the API are stored per database in SQLite, upserted on
+``id`` so that only newer versions (by ``changed_at``) replace older ones.
+``filter_records`` and ``get_records`` answer API-shaped queries locally
+with the same semantics as ``lightfeed.filtering``.
+
+Declaring an index on a ``data`` column (``create_index``) maintains a
+normalized copy of that column's values (numeric value, text, case-folded
+text, list elements, emptiness), so rules on it become index lookups.
+Rules on other columns are still answered, by evaluating them row by row.
+"""
+
+import json
+import sqlite3
+import threading
+from functools import lru_cache
+from types import TracebackType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from lightfeed.export import format_timestamp, parse_timestamp
+from lightfeed.filter_values import as_number, as_text, enum_value, is_empty
+from lightfeed.filtering import compile_filter
+from lightfeed.models import (
+    Condition,
+    Filter,
+    FilterRecordsParams,
+    GetRecordsParams,
+    Operator,
+    Record,
+    RecordsResponse,
+    TimeRange,
+)
+from lightfeed.sync import CheckpointStore, IncrementalSync, SQLiteCheckpointStore
+
+
+# Page size used when a query does not set a limit
+DEFAULT_LIMIT = 100
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS lightfeed_records ("
+    "database_id TEXT NOT NULL, id INTEGER NOT NULL, data TEXT NOT NULL, timestamps TEXT, "
+    "changed_at TEXT NOT NULL, synced_at TEXT NOT NULL, PRIMARY KEY (database_id, id))",
+    "CREATE INDEX IF NOT EXISTS lightfeed_records_synced ON lightfeed_records (database_id, synced_at, id)",
+    "CREATE TABLE IF NOT EXISTS lightfeed_indexes ("
+    "database_id TEXT NOT NULL, column_name TEXT NOT NULL, PRIMARY KEY (database_id, column_name))",
+    # One row per indexed value (item = 0) and per element of an indexed list (item = 1)
+    "CREATE TABLE IF NOT EXISTS lightfeed_values ("
+    "database_id TEXT NOT NULL, record_id INTEGER NOT NULL, column_name TEXT NOT NULL, item INTEGER NOT NULL, "
+    "kind TEXT NOT NULL, num REAL, txt TEXT, folded TEXT, empty INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS lightfeed_values_record ON lightfeed_values (database_id, record_id)",
+    "CREATE INDEX IF NOT EXISTS lightfeed_values_num ON lightfeed_values (database_id, column_name, num)",
+    "CREATE INDEX IF NOT EXISTS lightfeed_values_txt ON lightfeed_values (database_id, column_name, txt)",
+    "CREATE INDEX IF NOT EXISTS lightfeed_values_folded ON lightfeed_values (database_id, column_name, folded)",
+)
+
+_UPSERT = (
+    "INSERT INTO lightfeed_records (database_id, id, data, timestamps, changed_at, synced_at) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (database_id, id) DO UPDATE SET "
+    "data = excluded.data, timestamps = excluded.timestamps, "
+    "changed_at = excluded.changed_at, synced_at = excluded.synced_at "
+    "WHERE excluded.changed_at >= lightfeed_records.changed_at"
+)
+
+_ORDERINGS = {
+    Operator.GREATER_THAN.value: ">",
+    Operator.LESS_THAN.value: "<",
+    Operator.GREATER_THAN_OR_EQUALS.value: ">=",
+    Operator.LESS_THAN_OR_EQUALS.value: "<=",
+}
+
+
+class SQLiteMirror:
+    """
+    Local copy of one or more databases answering filter queries in SQLite
+
+    Thread-safe: each thread uses its own connection to the database file,
+    which is opened in WAL mode so readers do not block the writer.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens (and creates, if needed) a mirror
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        conn = self._connect()
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def __enter__(self) -> "SQLiteMirror":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the connections of every thread"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def create_index(self, database_id: str, column: str) -> None:
+        """
+        Indexes a ``data`` column so rules on it are answered by index lookups
+
+        Records already in the mirror are indexed immediately, within SQLite
+        (``json_each``) rather than by loading them into Python.
+
+        Args:
+            database_id: The database ID
+            column: Name of the ``data`` column
+        """
+        conn = self._connect()
+        with conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO lightfeed_indexes (database_id, column_name) VALUES (?, ?)",
+                (database_id, column),
+            ).rowcount
+            if not inserted:
+                return
+            # Built inside SQLite; the SQL functions apply the same value semantics as _value_rows
+            conn.execute(_INDEX_VALUES, (database_id, column, database_id, column))
+            conn.execute(_INDEX_ITEMS, (database_id, column, database_id, column))
+
+    def drop_index(self, database_id: str, column: str) -> None:
+        """
+        Removes an index declared with ``create_index``
+
+        Args:
+            database_id: The database ID
+            column: Name of the ``data`` column
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM lightfeed_indexes WHERE database_id = ? AND column_name = ?", (database_id, column)
+            )
+            conn.execute(
+                "DELETE FROM lightfeed_values WHERE database_id = ? AND column_name = ?", (database_id, column)
+            )
+
+    def indexes(self, database_id: str) -> List[str]:
+        """Returns the indexed columns of a database"""
+        rows = self._connect().execute(
+            "SELECT column_name FROM lightfeed_indexes WHERE database_id = ? ORDER BY column_name", (database_id,)
+        )
+        return [row[0] for row in rows]
+
+    def upsert(self, database_id: str, records: Iterable[Record]) -> int:
+        """
+        Stores records, keeping the newest version of each
+
+        A record replaces the stored one with the same ``id`` unless the stored
+        one has a later ``changed_at``.
+
+        Args:
+            database_id: The database ID
+            records: Records as returned by the API
+
+        Returns:
+            Number of records inserted or updated
+        """
+        conn = self._connect()
+        written = 0
+        with conn:
+            columns = [row[0] for row in conn.execute(
+                "SELECT column_name FROM lightfeed_indexes WHERE database_id = ?", (database_id,)
+            )]
+            for record in records:
+                timestamps = record.get("timestamps") or {}
+                data = record.get("data") or {}
+                changed = conn.execute(_UPSERT, (
+                    database_id,
+                    record["id"],
+                    json.dumps(data, separators=(",", ":")),
+                    json.dumps(timestamps, separators=(",", ":")),
+                    _normalize(timestamps.get("changed_at")),
+                    _normalize(timestamps.get("synced_at")),
+                )).rowcount
+                if not changed:
+                    continue
+                written += 1
+                if columns:
+                    conn.execute(
+                        "DELETE FROM lightfeed_values WHERE database_id = ? AND record_id = ?",
+                        (database_id, record["id"]),
+                    )
+                    for column in columns:
+                        conn.executemany(_INSERT_VALUE, _value_rows(database_id, record["id"], column, data))
+        return written
+
+    def delete(self, database_id: str, record_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Removes records from the mirror
+
+        Args:
+            database_id: The database ID
+            record_ids: Records to remove (all records of the database when omitted)
+
+        Returns:
+            Number of records removed
+        """
+        conn = self._connect()
+        with conn:
+            if record_ids is None:
+                conn.execute("DELETE FROM lightfeed_values WHERE database_id = ?", (database_id,))
+                return conn.execute("DELETE FROM lightfeed_records WHERE database_id = ?", (database_id,)).rowcount
+            removed = 0
+            for record_id in record_ids:
+                conn.execute(
+                    "DELETE FROM lightfeed_values WHERE database_id = ? AND record_id = ?", (database_id, record_id)
+                )
+                removed += conn.execute(
+                    "DELETE FROM lightfeed_records WHERE database_id = ? AND id = ?", (database_id, record_id)
+                ).rowcount
+        return removed
+
+    def count(self, database_id: str) -> int:
+        """Returns the number of mirrored records of a database"""
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM lightfeed_records WHERE database_id = ?", (database_id,)
+        ).fetchone()
+        return row[0]
+
+    def pull(
+        self,
+        client: Any,
+        database_id: str,
+        store: Optional[CheckpointStore] = None,
+        initial_start_time: Optional[str] = None,
+        limit: int = 500,
+    ) -> int:
+        """
+        Brings the mirror up to date with an incremental sync
+
+        Checkpoints are kept in the mirror's own file unless another store
+        is given, so each pull only fetches records synced since the last one.
+
+        Args:
+            client: A ``LightfeedClient`` (or any object with ``get_records``)
+            database_id: The database ID
+            store: Checkpoint store (defaults to the mirror's SQLite file)
+            initial_start_time: Where the first pull starts
+            limit: Page size of the sync requests
+
+        Returns:
+            Number of records received
+
+        Raises:
+            LightfeedError: If an API request fails
+        """
+        sync = IncrementalSync(
+            client,
+            database_id,
+            store=store if store is not None else SQLiteCheckpointStore(self.path),
+            limit=limit,
+            initial_start_time=initial_start_time,
+        )
+        return sync.run(lambda batch: self.upsert(database_id, batch))
+
+    def get_records(self, database_id: str, params: Optional[GetRecordsParams] = None) -> RecordsResponse:
+        """
+        Answers a ``get_records`` query from the mirror
+
+        Args:
+            database_id: The database ID
+            params: Optional time range, limit and cursor
+
+        Returns:
+            Records response in ascending ``(synced_at, id)`` order
+        """
+        params = params or {}
+        time_range: TimeRange = {"start_time": params.get("start_time"), "end_time": params.get("end_time")}
+        return self._query(database_id, None, time_range, params.get("limit"), params.get("cursor"), False)
+
+    def filter_records(
+        self, database_id: str, params: FilterRecordsParams, case_sensitive: bool = False
+    ) -> RecordsResponse:
+        """
+        Answers a ``filter_records`` query from the mirror
+
+        Args:
+            database_id: The database ID
+            params: Filter, time range on ``synced_at`` and pagination
+            case_sensitive: Make the substring operators case sensitive
+
+        Returns:
+            Records response in ascending ``(synced_at, id)`` order
+
+        Raises:
+            ValueError: If the filter uses an unknown operator or condition
+        """
+        pagination = params.get("pagination") or {}
+        return self._query(
+            database_id,
+            params.get("filter"),
+            params.get("time_range") or {},
+            pagination.get("limit"),
+            pagination.get("cursor"),
+            case_sensitive,
+        )
+
+    def explain(self, database_id: str, params: FilterRecordsParams) -> List[str]:
+        """
+        Returns SQLite's query plan for a filter query, to check index use
+
+        Args:
+            database_id: The database ID
+            params: Filter parameters
+
+        Returns:
+            The plan's detail lines
+        """
+        sql, args = self._select(database_id, params.get("filter"), params.get("time_range") or {}, None, False)
+        rows = self._connect().execute("EXPLAIN QUERY PLAN " + sql, args + [DEFAULT_LIMIT])
+        return [row[-1] for row in rows]
+
+    def _query(
+        self,
+        database_id: str,
+        filter: Optional[Filter],
+        time_range: TimeRange,
+        limit: Optional[int],
+        cursor: Optional[str],
+        case_sensitive: bool,
+    ) -> RecordsResponse:
+        limit = limit or DEFAULT_LIMIT
+        sql, args = self._select(database_id, filter, time_range, cursor, case_sensitive)
+        rows = self._connect().execute(sql, args + [limit + 1]).fetchall()
+        results: List[Record] = [
+            {"id": record_id, "data": json.loads(data), "timestamps": json.loads(timestamps)}
+            for record_id, data, timestamps, _ in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = f"{last[3]}_{last[0]}"
+        return {
+            "results": results,
+            "pagination": {"limit": limit, "next_cursor": next_cursor, "has_more": next_cursor is not None},
+        }
+
+    def _select(
+        self,
+        database_id: str,
+        filter: Optional[Filter],
+        time_range: TimeRange,
+        cursor: Optional[str],
+        case_sensitive: bool,
+    ) -> Tuple[str, List[Any]]:
+        where = ["r.database_id = ?"]
+        args: List[Any] = [database_id]
+        if time_range.get("start_time"):
+            where.append("r.synced_at >= ?")
+            args.append(_normalize(time_range["start_time"]))
+        if time_range.get("end_time"):
+            where.append("r.synced_at <= ?")
+            args.append(_normalize(time_range["end_time"]))
+        if cursor:
+            # Cursors are "<synced_at>_<id>" of the last record of the previous page
+            synced_at, record_id = cursor.rsplit("_", 1)
+            where.append("(r.synced_at > ? OR (r.synced_at = ? AND r.id > ?))")
+            args.extend([synced_at, synced_at, int(record_id)])
+        if filter:
+            compiler = _FilterCompiler(database_id, set(self.indexes(database_id)), case_sensitive)
+            condition, condition_args = compiler.compile(filter)
+            where.append(condition)
+            args.extend(condition_args)
+        sql = (
+            "SELECT r.id, r.data, r.timestamps, r.synced_at FROM lightfeed_records r WHERE "
+            + " AND ".join(where)
+            + " ORDER BY r.synced_at, r.id LIMIT ?"
+        )
+        return sql, args
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.create_function("lightfeed_match", 3, _match, deterministic=True)
+            conn.create_function("lightfeed_number", 2, _json_number, deterministic=True)
+            conn.create_function("lightfeed_text", 2, _json_text, deterministic=True)
+            conn.create_function("lightfeed_fold", 1, _fold, deterministic=True)
+            conn.create_function("lightfeed_empty", 2, _json_empty, deterministic=True)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+
+_INSERT_VALUE = (
+    "INSERT INTO lightfeed_values (database_id, record_id, column_name, item, kind, num, txt, folded, empty) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+# Index rows of every record's value of a column, read with json_each
+_INDEX_VALUES = (
+    "INSERT INTO lightfeed_values (database_id, record_id, column_name, item, kind, num, txt, folded, empty) "
+    "SELECT ?, id, ?, 0, kind, lightfeed_number(type, value), CASE kind WHEN 'scalar' THEN txt END, "
+    "lightfeed_fold(txt), lightfeed_empty(type, value) FROM ("
+    "SELECT r.id AS id, v.type AS type, v.value AS value, lightfeed_text(v.type, v.value) AS txt, "
+    "CASE v.type WHEN 'array' THEN 'list' WHEN 'object' THEN 'object' ELSE 'scalar' END AS kind "
+    "FROM lightfeed_records r, json_each(r.data) v "
+    "WHERE r.database_id = ? AND v.key = ? AND v.type != 'null')"
+)
+
+# Index rows of the elements of every record's list value of a column
+_INDEX_ITEMS = (
+    "INSERT INTO lightfeed_values (database_id, record_id, column_name, item, kind, num, txt, folded, empty) "
+    "SELECT ?, id, ?, 1, 'scalar', NULL, txt, lightfeed_fold(txt), 0 FROM ("
+    "SELECT r.id AS id, lightfeed_text(e.type, e.value) AS txt "
+    "FROM lightfeed_records r, json_each(r.data) v, json_each(v.value) e "
+    "WHERE r.database_id = ? AND v.key = ? AND v.type = 'array')"
+)
+
+
+def _value_rows(database_id: str, record_id: int, column: str, data: Dict[str, Any]) -> List[Tuple[Any, ...]]:
+    """Builds the normalized index rows of one column of a record"""
+    value = data.get(column)
+    if value is None:
+        return []
+    kind = "list" if isinstance(value, list) else "object" if isinstance(value, dict) else "scalar"
+    text = as_text(value)
+    rows = [(
+        database_id, record_id, column, 0, kind,
+        as_number(value), text if kind == "scalar" else None, text.lower(), int(is_empty(value)),
+    )]
+    if kind == "list":
+        for item in value:
+            item_text = as_text(item)
+            rows.append((database_id, record_id, column, 1, "scalar", None, item_text, item_text.lower(), 0))
+    return rows
+
+
+class _FilterCompiler:
+    """
+    Translates a filter into a SQL condition on ``lightfeed_records r``
+
+    Rules on indexed columns become ``r.id IN (...)`` lookups on the
+    normalized values, mirroring ``lightfeed.filtering`` exactly; other rules
+    call ``lightfeed_match``, which runs the Python evaluator row by row.
+    """
+
+    def __init__(self, database_id: str, indexed: Set[str], case_sensitive: bool) -> None:
+        self.database_id = database_id
+        self.indexed = indexed
+        self.case_sensitive = case_sensitive
+
+    def compile(self, node: Any) -> Tuple[str, List[Any]]:
+        """Returns the SQL condition for a filter node and its arguments"""
+        if "rules" in node:
+            return self._group(node)
+        return self._rule(node)
+
+    def _group(self, group: Any) -> Tuple[str, List[Any]]:
+        condition = enum_value(group.get("condition") or Condition.AND)
+        if condition not in (Condition.AND.value, Condition.OR.value):
+            raise ValueError(f"Unknown filter condition: {condition}")
+        parts = [self.compile(rule) for rule in group.get("rules") or []]
+        if not parts:
+            return "1", []
+        return "(" + f" {condition} ".join(sql for sql, _ in parts) + ")", [a for _, args in parts for a in args]
+
+    def _rule(self, rule: Any) -> Tuple[str, List[Any]]:
+        column = rule["column"]
+        operator = enum_value(rule["operator"])
+        value = rule.get("value")
+        substring = operator in _SUBSTRING_OPERATORS
+        # Lists and objects as rule values, and case-sensitive substring tests
+        # (whose text is not stored for lists and objects), use the evaluator
+        if column not in self.indexed or isinstance(value, (list, dict)) or (substring and self.case_sensitive):
+            compile_filter({"rules": [rule]}, self.case_sensitive)  # type: ignore[typeddict-item]
+            return "lightfeed_match(r.data, ?, ?)", [json.dumps(_plain_rule(rule)), int(self.case_sensitive)]
+
+        if operator == Operator.IS_EMPTY.value:
+            return self._not_in(column, "item = 0 AND empty = 0")
+        if operator == Operator.IS_NOT_EMPTY.value:
+            return self._in(column, "item = 0 AND empty = 0")
+
+        number = as_number(value)
+        text = as_text(value)
+        if operator == Operator.EQUALS.value:
+            if number is not None:
+                return self._in(column, "item = 0 AND num = ?", number)
+            return self._in(column, "item = 0 AND kind = 'scalar' AND txt = ?", text)
+        if operator == Operator.NOT_EQUALS.value:
+            if number is not None:
+                return self._in(column, "item = 0 AND (num IS NULL OR num != ?)", number)
+            return self._in(column, "item = 0 AND (kind != 'scalar' OR txt != ?)", text)
+
+        if operator in _ORDERINGS:
+            compare = _ORDERINGS[operator]
+            if number is not None:
+                return self._in(column, f"item = 0 AND num {compare} ?", number)
+            return self._in(column, f"item = 0 AND num IS NULL AND kind = 'scalar' AND txt {compare} ?", text)
+
+        needle = text.lower()
+        if operator == Operator.CONTAINS.value:
+            return _any(
+                self._in(column, "item = 0 AND kind != 'list' AND instr(folded, ?) > 0", needle),
+                self._in(column, "item = 1 AND folded = ?", needle),
+            )
+        if operator == Operator.NOT_CONTAINS.value:
+            lists_sql, lists_args = self._in(column, "item = 0 AND kind = 'list'")
+            member_sql, member_args = self._not_in(column, "item = 1 AND folded = ?", needle)
+            return _any(
+                self._in(column, "item = 0 AND kind != 'list' AND instr(folded, ?) = 0", needle),
+                (f"({lists_sql} AND {member_sql})", lists_args + member_args),
+            )
+        if operator == Operator.STARTS_WITH.value:
+            return self._in(column, "item = 0 AND substr(folded, 1, length(?)) = ?", needle, needle)
+        if operator == Operator.ENDS_WITH.value:
+            if not needle:
+                return self._in(column, "item = 0")
+            return self._in(column, "item = 0 AND substr(folded, -length(?)) = ?", needle, needle)
+        raise ValueError(f"Unknown filter operator: {operator}")
+
+    def _in(self, column: str, condition: str, *args: Any) -> Tuple[str, List[Any]]:
+        return "r.id IN " + self._values(condition), [self.database_id, column, *args]
+
+    def _not_in(self, column: str, condition: str, *args: Any) -> Tuple[str, List[Any]]:
+        return "r.id NOT IN " + self._values(condition), [self.database_id, column, *args]
+
+    @staticmethod
+    def _values(condition: str) -> str:
+        return f"(SELECT record_id FROM lightfeed_values WHERE database_id = ? AND column_name = ? AND {condition})"
+
+
+_SUBSTRING_OPERATORS = (
+    Operator.CONTAINS.value,
+    Operator.NOT_CONTAINS.value,
+    Operator.STARTS_WITH.value,
+    Operator.ENDS_WITH.value,
+)
+
+
+def _any(*parts: Tuple[str, List[Any]]) -> Tuple[str, List[Any]]:
+    return "(" + " OR ".join(sql for sql, _ in parts) + ")", [a for _, args in parts for a in args]
+
+
+def _plain_rule(rule: Any) -> Dict[str, Any]:
+    return {"column": rule["column"], "operator": enum_value(rule["operator"]), "value": rule.get("value")}
+
+
+@lru_cache(maxsize=256)
+def _rule_predicate(rule_json: str, case_sensitive: bool) -> Callable[[Record], bool]:
+    return compile_filter({"rules": [json.loads(rule_json)]}, case_sensitive)  # type: ignore[typeddict-item]
+
+
+@lru_cache(maxsize=8)
+def _parse_data(data: str) -> Dict[str, Any]:
+    # Rules on unindexed columns of one row share the parsed data
+    return json.loads(data)
+
+
+def _match(data: str, rule_json: str, case_sensitive: int) -> int:
+    """SQL function evaluating one rule on a row's data with the Python evaluator"""
+    return int(_rule_predicate(rule_json, bool(case_sensitive))({"data": _parse_data(data)}))
+
+
+def _json_value(json_type: str, value: Any) -> Any:
+    """Turns a ``json_each`` value back into the Python value ``json.loads`` gives"""
+    if json_type in ("true", "false"):
+        return json_type == "true"
+    if json_type in ("array", "object"):
+        return json.loads(value)
+    return value
+
+
+def _json_number(json_type: str, value: Any) -> Optional[float]:
+    """SQL function: ``as_number`` of a ``json_each`` value"""
+    return as_number(_json_value(json_type, value))
+
+
+def _json_text(json_type: str, value: Any) -> str:
+    """SQL function: ``as_text`` of a ``json_each`` value"""
+    return as_text(_json_value(json_type, value))
+
+
+def _json_empty(json_type: str, value: Any) -> int:
+    """SQL function: ``is_empty`` of a ``json_each`` value"""
+    return int(is_empty(_json_value(json_type, value)))
+
+
+def _fold(text: Optional[str]) -> Optional[str]:
+    """SQL function: case folding as ``str.lower`` does it, beyond the ASCII of SQLite's ``lower``"""
+    return None if text is None else text.lower()
+
+
+def _normalize(timestamp: Optional[str]) -> str:
+    """Formats a timestamp uniformly so timestamps compare correctly as text"""
+    if not timestamp:
+        return ""
+    return format_timestamp(parse_timestamp(timestamp))
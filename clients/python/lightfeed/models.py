@@ -6,12 +6,88 @@ from enum import Enum, auto, IntEnum
 from typing import Dict, List, Optional, Union, Any, TypedDict, Literal
 
 
+class RetryConfig(TypedDict, total=False):
+    """Retry and backoff configuration"""
+    
+    maxRetries: Optional[int]  # Retries per request for every retryable error class (defaults to 3)
+    rateLimitRetries: Optional[int]  # Retries after 429 responses (defaults to maxRetries)
+    serverErrorRetries: Optional[int]  # Retries after 5xx responses (defaults to maxRetries)
+    connectionErrorRetries: Optional[int]  # Retries after connection errors and timeouts (defaults to maxRetries)
+    backoffFactor: Optional[float]  # Base backoff delay in seconds, doubled per attempt (defaults to 0.5)
+    maxBackoff: Optional[float]  # Upper bound for a single backoff delay in seconds (defaults to 30)
+    respectRetryAfter: Optional[bool]  # Honor Retry-After and rate-limit reset headers (defaults to True)
+
+
+class CacheConfig(TypedDict, total=False):
+    """Response cache configuration"""
+    
+    ttl: Optional[float]  # Seconds a cached response stays valid (defaults to 60)
+    maxBytes: Optional[int]  # Maximum total size of cached responses (defaults to 64 MiB)
+    directory: Optional[str]  # Persist the cache in this directory instead of in memory
+
+
+class CompressionConfig(TypedDict, total=False):
+    """Compression configuration"""
+    
+    acceptEncoding: Optional[Union[str, List[str]]]  # Response encodings to accept, or "auto" for every installed one (default)
+    requestEncoding: Optional[str]  # Compress request bodies: "gzip", "zstd", "br" or "deflate" (disabled when omitted)
+    minRequestBytes: Optional[int]  # Smallest request body that is compressed (defaults to 1024)
+
+
+class HedgingConfig(TypedDict, total=False):
+    """Request hedging configuration"""
+    
+    percentile: Optional[float]  # Send a duplicate once a request is slower than this latency percentile (defaults to 95)
+    maxRatio: Optional[float]  # Duplicates allowed per request, averaged over time (defaults to 0.05)
+    minDelay: Optional[float]  # Never send a duplicate sooner than this many seconds (defaults to 0.01)
+    minSamples: Optional[int]  # Requests observed before hedging starts (defaults to 20)
+    window: Optional[int]  # Recent latencies per endpoint the percentile is taken over (defaults to 500)
+    endpoints: Optional[List[str]]  # Endpoints to hedge: "search", "filter", "records" (defaults to search and filter)
+
+
+class ConcurrencyConfig(TypedDict, total=False):
+    """Adaptive concurrency limit configuration"""
+    
+    initialLimit: Optional[int]  # Requests allowed in flight at first (defaults to 4)
+    minLimit: Optional[int]  # The limit is never cut below this (defaults to 1)
+    maxLimit: Optional[int]  # The limit is never raised above this (defaults to 64)
+    backoffRatio: Optional[float]  # Factor the limit is multiplied by on 429s, 5xx errors or latency spikes (defaults to 0.5)
+    latencyTolerance: Optional[float]  # Latency above this multiple of an endpoint's recent best counts as a spike (defaults to 2)
+    window: Optional[int]  # Recent latencies per endpoint the best is taken from (defaults to 100)
+
+
+class CircuitBreakerConfig(TypedDict, total=False):
+    """Circuit breaker configuration"""
+    
+    failureThreshold: Optional[int]  # Consecutive 5xx or connection errors that open a circuit (defaults to 5)
+    resetTimeout: Optional[float]  # Seconds an open circuit fails fast before a trial request (defaults to 10)
+
+
 class LightfeedConfig(TypedDict, total=False):
     """API client configuration"""
     
     apiKey: str  # Lightfeed API key (required)
     baseUrl: Optional[str]  # API base URL (defaults to https://api.lightfeed.ai)
     timeout: Optional[float]  # Request timeout in seconds (defaults to 30)
+    poolConnections: Optional[int]  # Number of per-host connection pools to cache (defaults to 10)
+    poolMaxsize: Optional[int]  # Maximum connections kept open per host (defaults to 10)
+    poolBlock: Optional[bool]  # Wait for a free pooled connection instead of opening extra ones (defaults to False)
+    keepAlive: Optional[bool]  # Reuse connections between requests (defaults to True)
+    adapters: Optional[Dict[str, Any]]  # Transport adapters to mount on the session, keyed by URL prefix
+    maxConcurrency: Optional[int]  # Maximum in-flight requests for the async client (defaults to 100)
+    http2: Optional[bool]  # Negotiate HTTP/2 in the async client (requires httpx[http2], defaults to False)
+    retry: Optional[RetryConfig]  # Retry failed requests with backoff (disabled when omitted)
+    rateLimit: Optional[float]  # Client-side request rate cap in requests per second, shared by all threads
+    rateLimitBurst: Optional[int]  # Requests allowed in a burst above rateLimit (defaults to one second worth)
+    cache: Optional[CacheConfig]  # Cache search and filter responses locally (disabled when omitted)
+    jsonBackend: Optional[str]  # JSON library: "orjson", "msgspec", "json" or "auto" (defaults to "auto")
+    typedResponses: Optional[bool]  # Decode responses into slotted structs instead of dicts (defaults to False)
+    coalesceRequests: Optional[bool]  # Share one request between identical concurrent calls (defaults to True)
+    hooks: Optional[List[Any]]  # RequestHooks notified about every request attempt (see lightfeed.instrumentation)
+    compression: Optional[CompressionConfig]  # Response encoding negotiation and request body compression
+    hedging: Optional[HedgingConfig]  # Send a duplicate of slow idempotent requests (disabled when omitted)
+    adaptiveConcurrency: Optional[ConcurrencyConfig]  # Tune the in-flight request limit to the API's health (disabled when omitted)
+    circuitBreaker: Optional[CircuitBreakerConfig]  # Fail fast on endpoint and database pairs that keep failing (disabled when omitted)
 
 
 class Timestamps(TypedDict):
@@ -172,6 +248,10 @@ class LightfeedError(Exception):
 
     def __repr__(self) -> str:
         return f"LightfeedError(status={self.status}, message='{self.message}')"
+
+    def __reduce__(self) -> Any:
+        # Rebuild from status and message so the error survives pickling (e.g. from worker processes)
+        return (self.__class__, (self.status, self.message))
         
     @staticmethod
     def get_default_message(status: int) -> str:
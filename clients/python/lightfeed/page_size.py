@@ -0,0 +1,201 @@
+"""
+Adaptive page sizing for paginated iteration
+"""
+
+import time
+from typing import Callable, List, Optional
+
+from lightfeed.instrumentation import RequestEvent, capture_events
+from lightfeed.models import LightfeedError, RecordsResponse
+from lightfeed.pagination import PageFetcher
+
+
+# Bounds of the API's limit parameter
+MIN_LIMIT = 1
+MAX_LIMIT = 500
+
+# Default limit of the first page
+DEFAULT_INITIAL_LIMIT = 100
+
+# Default budget for the size of one response body
+DEFAULT_MAX_PAGE_BYTES = 4 * 1024 * 1024  # 4 MiB
+
+# Default budget for the time to fetch one page
+DEFAULT_MAX_PAGE_SECONDS = 10.0
+
+# Pages fetched without growing the limit after a 429 or a timeout
+HOLD_PAGES = 3
+
+# Times a page that timed out is retried with a smaller limit
+MAX_TIMEOUT_SHRINKS = 3
+
+# A page fetching at least this much slower per record than the best seen so
+# far means a larger limit no longer pays off
+_SLOWDOWN = 0.9
+
+# A callable fetching the page at a cursor with a given limit
+SizedPageFetcher = Callable[[Optional[str], int], RecordsResponse]
+
+
+class AdaptivePageSize:
+    """
+    Tunes the page ``limit`` of a crawl from observed pages
+
+    Starts at ``initial`` and grows the limit geometrically while pages stay
+    within the byte and time budgets, since larger pages mean fewer round
+    trips. The per-record size and time are tracked as moving averages and
+    cap the limit at ``max_page_bytes`` and ``max_page_seconds``. If a larger
+    page turns out to deliver fewer records per second than a smaller one,
+    the limit settles at the smaller size. A 429 pauses growth for a few
+    pages; a timeout halves the limit.
+
+    One instance tunes one crawl and is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_INITIAL_LIMIT,
+        min_limit: int = MIN_LIMIT,
+        max_limit: int = MAX_LIMIT,
+        max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+        max_page_seconds: float = DEFAULT_MAX_PAGE_SECONDS,
+        growth: float = 2.0,
+        smoothing: float = 0.3,
+    ) -> None:
+        """
+        Creates a page size controller
+
+        Args:
+            initial: Limit of the first page
+            min_limit: Smallest limit used (at least 1)
+            max_limit: Largest limit used (at most 500)
+            max_page_bytes: Budget for one response body
+            max_page_seconds: Budget for fetching one page, well below the request timeout
+            growth: Maximum factor the limit grows by between pages
+            smoothing: Weight of the newest page in the moving averages
+        """
+        self.min_limit = max(MIN_LIMIT, min_limit)
+        self.max_limit = max(self.min_limit, min(MAX_LIMIT, max_limit))
+        self.max_page_bytes = max_page_bytes
+        self.max_page_seconds = max_page_seconds
+        self.growth = max(1.0, growth)
+        self.smoothing = smoothing
+        self.limit = self._clamp(initial)
+
+        self.bytes_per_record: Optional[float] = None
+        self.seconds_per_record: Optional[float] = None
+        self._hold = 0
+        self._best_rate = 0.0
+        self._best_limit = self.limit
+        self._ceiling = self.max_limit
+
+    def observe(
+        self,
+        limit: int,
+        records: int,
+        seconds: float,
+        bytes_in: Optional[int] = None,
+        rate_limited: bool = False,
+    ) -> None:
+        """
+        Updates the limit from a fetched page
+
+        Args:
+            limit: The limit the page was requested with
+            records: Records in the page
+            seconds: Time taken to fetch the page
+            bytes_in: Size of the response body, if known
+            rate_limited: Whether a 429 was received while fetching the page
+        """
+        if rate_limited:
+            self._hold = HOLD_PAGES
+        if records > 0 and seconds > 0:
+            self.seconds_per_record = self._average(self.seconds_per_record, seconds / records)
+            if bytes_in:
+                self.bytes_per_record = self._average(self.bytes_per_record, bytes_in / records)
+            # Only full pages say how well this limit performs
+            if records >= limit:
+                self._compare(limit, records / seconds)
+        self.limit = self._next_limit()
+
+    def timed_out(self) -> None:
+        """Halves the limit after a page timed out"""
+        self.limit = self._clamp(self.limit // 2)
+        self._hold = HOLD_PAGES
+
+    def _compare(self, limit: int, rate: float) -> None:
+        if rate >= self._best_rate:
+            self._best_rate, self._best_limit = rate, limit
+        elif limit > self._best_limit and rate < self._best_rate * _SLOWDOWN:
+            self._ceiling = self._best_limit
+
+    def _next_limit(self) -> int:
+        target = float(min(self.max_limit, self._ceiling))
+        if self.bytes_per_record:
+            target = min(target, self.max_page_bytes / self.bytes_per_record)
+        if self.seconds_per_record:
+            target = min(target, self.max_page_seconds / self.seconds_per_record)
+        if self._hold > 0:
+            self._hold -= 1
+            target = min(target, self.limit)
+        else:
+            target = min(target, self.limit * self.growth)
+        return self._clamp(int(target))
+
+    def _average(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return current + self.smoothing * (value - current)
+
+    def _clamp(self, limit: int) -> int:
+        return max(self.min_limit, min(self.max_limit, limit))
+
+
+def adaptive_fetcher(fetch: SizedPageFetcher, page_size: AdaptivePageSize) -> PageFetcher:
+    """
+    Wraps a page fetcher so every page uses the controller's current limit
+
+    Response sizes, 429s and timeouts are read from the request events of
+    the fetch. A page that times out is retried at the same cursor with a
+    smaller limit.
+
+    Args:
+        fetch: Callable fetching the page at a cursor with a limit
+        page_size: The controller to consult and update
+
+    Returns:
+        A plain page fetcher for ``iter_pages``
+    """
+    def fetch_page(cursor: Optional[str]) -> RecordsResponse:
+        shrinks = 0
+        while True:
+            limit = page_size.limit
+            started = time.perf_counter()
+            with capture_events() as events:
+                try:
+                    page = fetch(cursor, limit)
+                except LightfeedError:
+                    if not _timed_out(events) or shrinks >= MAX_TIMEOUT_SHRINKS or limit <= page_size.min_limit:
+                        raise
+                    page_size.timed_out()
+                    shrinks += 1
+                    continue
+            if _timed_out(events):
+                page_size.timed_out()
+            # Prefer the successful attempt's own timing, which excludes retry backoff
+            succeeded = [e for e in events if e.error is None]
+            seconds = succeeded[-1].duration if succeeded else None
+            page_size.observe(
+                limit,
+                len(page.get("results") or []),
+                seconds or time.perf_counter() - started,
+                bytes_in=succeeded[-1].bytes_in if succeeded else None,
+                rate_limited=any(e.status == 429 for e in events),
+            )
+            return page
+
+    return fetch_page
+
+
+def _timed_out(events: List[RequestEvent]) -> bool:
+    return any(e.timed_out for e in events)
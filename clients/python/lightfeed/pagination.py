@@ -0,0 +1,214 @@
+"""
+Cursor pagination helpers for the Lightfeed API
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, cast
+
+from lightfeed.instrumentation import page_context
+from lightfeed.models import (
+    GetRecordsParams,
+    SearchRecordsParams,
+    FilterRecordsParams,
+    Record,
+    RecordsResponse,
+)
+
+
+# A callable that fetches one page given the cursor of that page
+PageFetcher = Callable[[Optional[str]], RecordsResponse]
+
+# Default number of pages fetched ahead of the consumer
+DEFAULT_PREFETCH = 1
+
+# How often a blocked prefetch worker checks whether the consumer went away
+_POLL_INTERVAL = 0.1
+
+
+def with_query_cursor(
+    params: Optional[GetRecordsParams], cursor: Optional[str], limit: Optional[int] = None
+) -> GetRecordsParams:
+    """
+    Returns a copy of get-records query parameters pointing at a cursor
+
+    Args:
+        params: Original query parameters
+        cursor: Cursor of the page to fetch, or None for the first page
+        limit: Page size overriding the original ``limit``, if given
+
+    Returns:
+        New query parameters with the cursor applied
+    """
+    new_params = cast(GetRecordsParams, dict(params or {}))
+    if cursor is not None:
+        new_params["cursor"] = cursor
+    if limit is not None:
+        new_params["limit"] = limit
+    return new_params
+
+
+def with_body_cursor(
+    params: Dict[str, Any], cursor: Optional[str], limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Returns a copy of search/filter body parameters pointing at a cursor
+
+    Args:
+        params: Original search or filter parameters
+        cursor: Cursor of the page to fetch, or None for the first page
+        limit: Page size overriding the original ``pagination.limit``, if given
+
+    Returns:
+        New body parameters with ``pagination.cursor`` applied
+    """
+    new_params = dict(params)
+    if cursor is not None or limit is not None:
+        pagination = dict(new_params.get("pagination") or {})
+        if cursor is not None:
+            pagination["cursor"] = cursor
+        if limit is not None:
+            pagination["limit"] = limit
+        new_params["pagination"] = pagination
+    return new_params
+
+
+def initial_query_cursor(params: Optional[GetRecordsParams]) -> Optional[str]:
+    """Returns the cursor a get-records crawl starts from"""
+    return (params or {}).get("cursor")
+
+
+def initial_body_cursor(params: Any) -> Optional[str]:
+    """Returns the cursor a search/filter crawl starts from"""
+    return (params.get("pagination") or {}).get("cursor")
+
+
+def next_cursor(page: RecordsResponse) -> Optional[str]:
+    """
+    Returns the cursor of the page following ``page``
+
+    Args:
+        page: A records response
+
+    Returns:
+        The next cursor, or None when there are no more pages
+    """
+    pagination = page.get("pagination") or {}
+    if not pagination.get("has_more"):
+        return None
+    return pagination.get("next_cursor")
+
+
+def iter_pages(
+    fetch: PageFetcher,
+    cursor: Optional[str] = None,
+    prefetch: int = DEFAULT_PREFETCH,
+) -> Iterator[RecordsResponse]:
+    """
+    Walks a cursor chain and yields each page in order
+
+    When ``prefetch`` is positive a background thread fetches up to that
+    many pages ahead of the consumer, so network round trips overlap with
+    the consumer's own processing. At most ``prefetch + 2`` pages are held
+    in memory: the queued pages, the page the worker holds while it waits
+    for queue space, and the page being consumed.
+
+    Args:
+        fetch: Callable fetching the page at a given cursor
+        cursor: Cursor of the first page, or None to start from the beginning
+        prefetch: Number of pages to fetch ahead (0 disables the background thread)
+
+    Returns:
+        Iterator over pages
+
+    Raises:
+        LightfeedError: If fetching a page fails
+    """
+    if prefetch <= 0:
+        return _iter_pages_serial(fetch, cursor)
+    return _iter_pages_prefetch(fetch, cursor, prefetch)
+
+
+def iter_page_records(pages: Iterator[RecordsResponse]) -> Iterator[Record]:
+    """
+    Flattens pages into individual records
+
+    Args:
+        pages: Iterator over pages
+
+    Returns:
+        Iterator over records
+    """
+    for page in pages:
+        for record in page.get("results") or []:
+            yield record
+
+
+def _iter_pages_serial(fetch: PageFetcher, cursor: Optional[str]) -> Iterator[RecordsResponse]:
+    page_number = 0
+    while True:
+        page_number += 1
+        with page_context(page_number):
+            page = fetch(cursor)
+        yield page
+        cursor = next_cursor(page)
+        if cursor is None:
+            return
+
+
+# Sentinel marking the end of the cursor chain in the prefetch queue
+_DONE = object()
+
+
+class _PageError:
+    """Wraps an exception raised by the prefetch worker"""
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _iter_pages_prefetch(
+    fetch: PageFetcher, cursor: Optional[str], prefetch: int
+) -> Iterator[RecordsResponse]:
+    pages: "queue.Queue[Any]" = queue.Queue(maxsize=prefetch)
+    stopped = threading.Event()
+
+    def put(item: Any) -> bool:
+        # Block until there is room, giving up once the consumer has stopped
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker() -> None:
+        next_page_cursor = cursor
+        page_number = 0
+        try:
+            while not stopped.is_set():
+                page_number += 1
+                with page_context(page_number):
+                    page = fetch(next_page_cursor)
+                if not put(page):
+                    return
+                next_page_cursor = next_cursor(page)
+                if next_page_cursor is None:
+                    break
+            put(_DONE)
+        except BaseException as e:  # Forwarded to the consumer thread
+            put(_PageError(e))
+
+    thread = threading.Thread(target=worker, name="lightfeed-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = pages.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _PageError):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
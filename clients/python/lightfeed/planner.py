@@ -0,0 +1,402 @@
+"""
+Filter planning: simplify filter expressions and split top-level ORs
+
+``normalize_filter`` rewrites a ``Filter`` into an equivalent, smaller one:
+nested groups with the same condition are flattened, single-rule groups
+are unwrapped, duplicate rules are dropped and trivially true or false
+branches are folded away. Semantics follow ``lightfeed.filtering``: a
+group without rules matches every record, and a rule and its negation
+(``equals``/``not_equals``, ``contains``/``not_contains`` with the same
+value, ``is_empty``/``is_not_empty``) can never both match.
+
+``planned_filter`` runs the branches of a top-level OR as separate,
+concurrent filter queries and merges their results, trading one large
+query for several small ones. The API returns filter results in ascending
+``(synced_at, id)`` order; the merge relies on it and checks it.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, cast
+
+from lightfeed.cache import canonicalize
+from lightfeed.filter_values import enum_value
+from lightfeed.models import Condition, FilterRecordsParams, Filter, LightfeedError, Operator, Record, RecordsResponse
+
+
+# Page size used when the query sets none, as the API does
+DEFAULT_LIMIT = 100
+
+# A callable running one filter query, e.g. ``client.filter_records``
+FilterCall = Callable[[str, FilterRecordsParams], RecordsResponse]
+
+# Operators that never match together with their counterpart on the same column and value
+_NEGATIONS = {
+    Operator.EQUALS.value: Operator.NOT_EQUALS.value,
+    Operator.NOT_EQUALS.value: Operator.EQUALS.value,
+    Operator.CONTAINS.value: Operator.NOT_CONTAINS.value,
+    Operator.NOT_CONTAINS.value: Operator.CONTAINS.value,
+    Operator.IS_EMPTY.value: Operator.IS_NOT_EMPTY.value,
+    Operator.IS_NOT_EMPTY.value: Operator.IS_EMPTY.value,
+}
+
+# Operators ignoring the rule's value
+_UNARY = (Operator.IS_EMPTY.value, Operator.IS_NOT_EMPTY.value)
+
+# Marks the cursors of split queries, telling them apart from API cursors
+_CURSOR_PREFIX = "plan:"
+
+
+# Branches found to match every record, or none
+_TRUE = object()
+_FALSE = object()
+
+
+def normalize_filter(filter: Filter) -> Optional[Filter]:
+    """
+    Simplifies a filter without changing which records it matches
+
+    Args:
+        filter: The filter expression; it is not modified
+
+    Returns:
+        The simplified filter (a group without rules if it matches every
+        record), or None if it can never match
+
+    Raises:
+        ValueError: If the filter uses an unknown condition
+    """
+    node = _normalize(filter)
+    if node is _FALSE:
+        return None
+    if node is _TRUE:
+        return cast(Filter, {"condition": Condition.AND, "rules": []})
+    if "rules" not in node:
+        return cast(Filter, {"condition": Condition.AND, "rules": [node]})
+    return cast(Filter, node)
+
+
+def split_filter(filter: Filter, max_branches: int) -> List[Filter]:
+    """
+    Splits the top-level OR of a filter into independent filters
+
+    Every record matching the filter matches at least one of the returned
+    filters and vice versa. Branches are grouped into at most
+    ``max_branches`` filters of near-equal size.
+
+    Args:
+        filter: A filter, normally the result of ``normalize_filter``
+        max_branches: Maximum number of filters returned
+
+    Returns:
+        The sub-filters, or the filter alone if its top level is not an OR
+        of several branches
+    """
+    rules = filter.get("rules") or []
+    if _condition(filter) != Condition.OR.value or len(rules) < 2 or max_branches < 2:
+        return [filter]
+    count = min(max_branches, len(rules))
+    size, extra = divmod(len(rules), count)
+    branches: List[Filter] = []
+    start = 0
+    for index in range(count):
+        end = start + size + (1 if index < extra else 0)
+        chunk = rules[start:end]
+        start = end
+        if len(chunk) > 1:
+            branches.append(cast(Filter, {"condition": Condition.OR, "rules": chunk}))
+        elif "rules" in chunk[0]:
+            branches.append(cast(Filter, chunk[0]))
+        else:
+            branches.append(cast(Filter, {"condition": Condition.AND, "rules": chunk}))
+    return branches
+
+
+def planned_filter(
+    filter_call: FilterCall,
+    database_id: str,
+    params: FilterRecordsParams,
+    max_workers: int,
+    max_branches: Optional[int] = None,
+    split: bool = True,
+) -> RecordsResponse:
+    """
+    Runs a filter query after simplifying it, splitting a top-level OR
+
+    Without a split the simplified query is sent as is and its response,
+    cursor included, is returned. A filter that can never match returns an
+    empty page without a request.
+
+    With a split, every branch is queried concurrently for a full page.
+    Results arrive in ascending ``(synced_at, id)`` order per branch, so
+    merging the branches in that order and dropping repeated records gives
+    the first ``limit`` records of the whole query. Its ``next_cursor``
+    records where every branch stopped; passing it back with the same
+    filter and ``max_branches`` continues the merge. If the first pages of
+    the branches are not in that order, the query is sent unsplit instead.
+
+    Args:
+        filter_call: Callable running one filter query, e.g. ``client.filter_records``
+        database_id: The database ID
+        params: Filter parameters including filter rules, time range, and pagination
+        max_workers: Maximum number of queries in flight
+        max_branches: Maximum number of queries a split runs (defaults to max_workers)
+        split: Split a top-level OR into concurrent queries
+
+    Returns:
+        Records response containing results and pagination information
+
+    Raises:
+        ValueError: If the filter uses an unknown condition, or the cursor
+            belongs to another filter
+        LightfeedError: If a query fails, or a later page of a branch is
+            out of order
+    """
+    pagination = params.get("pagination") or {}
+    limit = pagination.get("limit") or DEFAULT_LIMIT
+    cursor = pagination.get("cursor")
+    filter = normalize_filter(params["filter"])
+    if filter is None:
+        return {"results": [], "pagination": {"limit": limit, "next_cursor": None, "has_more": False}}
+
+    resumed = cursor is not None and cursor.startswith(_CURSOR_PREFIX)
+    branches = [filter]
+    if resumed or (split and not cursor):
+        branches = split_filter(filter, max_branches or max_workers)
+    if len(branches) == 1 and not resumed:
+        return filter_call(database_id, cast(FilterRecordsParams, dict(params, filter=filter)))
+
+    digest = _digest(branches)
+    if resumed:
+        state = _decode_cursor(cast(str, cursor), digest, len(branches))
+        floor = tuple(state["last"])
+        readers = [
+            _BranchReader(filter_call, database_id, params, branch, limit, position["cursor"], floor)
+            for branch, position in zip(branches, state["branches"])
+            if position is not None
+        ]
+    else:
+        readers = [_BranchReader(filter_call, database_id, params, branch, limit) for branch in branches]
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(readers) or 1))) as executor:
+            list(executor.map(lambda reader: reader.load(), readers))
+        results, last = _merge(readers, limit)
+    except _OutOfOrder:
+        if resumed:
+            raise LightfeedError(500, "Filter results are not sorted by (synced_at, id); cannot continue a split query")
+        return filter_call(database_id, cast(FilterRecordsParams, dict(params, filter=filter)))
+
+    positions = [reader.position(last) for reader in readers]
+    has_more = any(position is not None for position in positions)
+    next_cursor = None
+    if has_more and last is not None:
+        if resumed:
+            # Exhausted branches stay in place so the positions line up with the branches
+            remaining = iter(positions)
+            positions = [None if position is None else next(remaining) for position in state["branches"]]
+        next_cursor = _encode_cursor(digest, last, positions)
+    return {"results": results, "pagination": {"limit": limit, "next_cursor": next_cursor, "has_more": has_more}}
+
+
+class _OutOfOrder(Exception):
+    """A branch returned records out of ``(synced_at, id)`` order"""
+
+
+class _BranchReader:
+    """
+    Reads one branch of a split query in order, page after page
+
+    Records at or before ``floor``, the last record a previous page of the
+    merge returned, were already returned and are skipped.
+    """
+
+    def __init__(
+        self,
+        filter_call: FilterCall,
+        database_id: str,
+        params: FilterRecordsParams,
+        branch: Filter,
+        limit: int,
+        cursor: Optional[str] = None,
+        floor: Optional[Tuple[Any, ...]] = None,
+    ) -> None:
+        self.filter_call = filter_call
+        self.database_id = database_id
+        self.params = params
+        self.branch = branch
+        self.limit = limit
+        self.cursor = cursor  # Cursor of the loaded page; None for the first
+        self.floor = floor
+        self.records: List[Record] = []
+        self.index = 0
+        self.next_cursor: Optional[str] = None
+        self.has_more = False
+
+    def load(self) -> None:
+        pagination: Dict[str, Any] = {"limit": self.limit}
+        if self.cursor is not None:
+            pagination["cursor"] = self.cursor
+        page = self.filter_call(
+            self.database_id, cast(FilterRecordsParams, dict(self.params, filter=self.branch, pagination=pagination))
+        )
+        records = page.get("results") or []
+        keys = [_order_key(record) for record in records]
+        if any(later < earlier for earlier, later in zip(keys, keys[1:])):
+            raise _OutOfOrder()
+        if keys and self.records and keys[0] < _order_key(self.records[-1]):
+            raise _OutOfOrder()
+        self.records = records
+        self.index = 0
+        page_pagination = page.get("pagination") or {}
+        self.next_cursor = page_pagination.get("next_cursor")
+        self.has_more = bool(page_pagination.get("has_more") and self.next_cursor)
+
+    def head(self) -> Optional[Record]:
+        """Returns the next record, loading the next page when needed, or None at the end"""
+        while True:
+            self._skip_floor()
+            if self.index < len(self.records):
+                return self.records[self.index]
+            if not self.has_more:
+                return None
+            self.cursor = self.next_cursor
+            self.load()
+
+    def position(self, last: Optional[Tuple[Any, ...]]) -> Optional[Dict[str, Optional[str]]]:
+        """Where to continue after ``last`` without another request, or None if the branch is done"""
+        if last is not None:
+            self.floor = last
+        self._skip_floor()
+        if self.index < len(self.records):
+            return {"cursor": self.cursor}
+        if self.has_more:
+            return {"cursor": self.next_cursor}
+        return None
+
+    def _skip_floor(self) -> None:
+        if self.floor is None:
+            return
+        while self.index < len(self.records) and _order_key(self.records[self.index]) <= self.floor:
+            self.index += 1
+
+
+def _merge(readers: List[_BranchReader], limit: int) -> Tuple[List[Record], Optional[Tuple[Any, ...]]]:
+    """Takes up to ``limit`` records from the branches in order, each record once"""
+    results: List[Record] = []
+    last: Optional[Tuple[Any, ...]] = None
+    while len(results) < limit:
+        best: Optional[Tuple[Tuple[Any, ...], _BranchReader]] = None
+        for reader in readers:
+            record = reader.head()
+            if record is not None and (best is None or _order_key(record) < best[0]):
+                best = (_order_key(record), reader)
+        if best is None:
+            break
+        key, reader = best
+        results.append(reader.records[reader.index])
+        last = key
+        # A record matched by several branches is their head at once; skip it everywhere
+        for other in readers:
+            other.floor = key
+    return results, last
+
+
+def _digest(branches: List[Filter]) -> str:
+    return hashlib.sha256(_key(branches).encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_cursor(digest: str, last: Tuple[Any, ...], positions: List[Optional[Dict[str, Optional[str]]]]) -> str:
+    state = {"filter": digest, "last": list(last), "branches": positions}
+    payload = json.dumps(state, separators=(",", ":"), default=str).encode("utf-8")
+    return _CURSOR_PREFIX + base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def _decode_cursor(cursor: str, digest: str, branches: int) -> Dict[str, Any]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor[len(_CURSOR_PREFIX):].encode("ascii")))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid split query cursor: {cursor}") from e
+    if state.get("filter") != digest or len(state.get("branches") or []) != branches:
+        raise ValueError("Cursor belongs to another filter or max_branches setting")
+    return cast(Dict[str, Any], state)
+
+
+def _normalize(node: Any) -> Any:
+    if "rules" not in node:
+        return cast(Dict[str, Any], node)
+    condition = _condition(node)
+    if not node.get("rules"):
+        return _TRUE
+    # TRUE absorbs an OR and FALSE an AND; the other one can be dropped
+    absorbing, neutral = (_TRUE, _FALSE) if condition == Condition.OR.value else (_FALSE, _TRUE)
+
+    rules: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    for child in node["rules"]:
+        normalized = _normalize(child)
+        if normalized is neutral:
+            continue
+        if normalized is absorbing:
+            return absorbing
+        child_node = cast(Dict[str, Any], normalized)
+        same_condition = "rules" in child_node and _condition(child_node) == condition
+        for rule in child_node["rules"] if same_condition else [child_node]:
+            key = _key(rule)
+            if key not in seen:
+                seen.add(key)
+                rules.append(rule)
+
+    if not rules:
+        return neutral
+    if _has_contradiction(rules, condition):
+        return absorbing
+    if len(rules) == 1:
+        return rules[0]
+    return {"condition": Condition(condition), "rules": rules}
+
+
+def _has_contradiction(rules: List[Dict[str, Any]], condition: str) -> bool:
+    """
+    Whether a group holds a rule and its negation
+
+    Under AND the group never matches. Under OR only ``is_empty`` and
+    ``is_not_empty`` cover every record between them: the other operators
+    fail on missing values either way.
+    """
+    present: Set[Tuple[str, str, str]] = set()
+    for rule in rules:
+        if "rules" not in rule:
+            present.add(_rule_signature(rule))
+    for column, operator, value in present:
+        negation = _NEGATIONS.get(operator)
+        if negation is None or (condition == Condition.OR.value and operator not in _UNARY):
+            continue
+        if (column, negation, value) in present:
+            return True
+    return False
+
+
+def _rule_signature(rule: Dict[str, Any]) -> Tuple[str, str, str]:
+    operator = enum_value(rule.get("operator"))
+    value = "" if operator in _UNARY else _key(rule.get("value"))
+    return (rule.get("column"), operator, value)
+
+
+def _condition(group: Any) -> str:
+    condition = enum_value(group.get("condition") or Condition.AND)
+    if condition not in (Condition.AND.value, Condition.OR.value):
+        raise ValueError(f"Unknown filter condition: {condition}")
+    return condition
+
+
+def _key(value: Any) -> str:
+    return json.dumps(canonicalize(value), sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _order_key(record: Record) -> Tuple[str, Any]:
+    timestamps = record.get("timestamps") or {}
+    return (timestamps.get("synced_at") or "", record.get("id") or 0)
@@ -0,0 +1,424 @@
+"""
+Multiprocess export of a database to per-slice output files
+
+Threads share one interpreter, so a thread-pool export is capped by the
+GIL once JSON decoding and per-record transformation dominate. Here the
+synced-time range is split into slices that are handed to a pool of
+worker processes. Each worker owns its own client, pages through a slice,
+decodes and transforms the records and writes them straight to a part
+file, so records never travel back through the parent. A manifest
+describes the parts.
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, TypedDict
+
+from lightfeed.export import EPOCH, format_timestamp, parse_timestamp, split_range
+from lightfeed.models import FilterRecordsParams, LightfeedConfig, Record
+from lightfeed.pagination import next_cursor
+
+
+# Supported output formats
+FORMATS = ("jsonl", "parquet")
+
+# Name of the manifest written next to the part files
+MANIFEST_NAME = "manifest.json"
+
+# Default number of slices per worker process; extra slices balance uneven density
+DEFAULT_SLICES_PER_PROCESS = 4
+
+# Default number of records per Parquet row group; a worker buffers at most one
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+# A picklable function transforming a record; returning None drops it
+RecordTransform = Callable[[Record], Optional[Any]]
+
+
+class ExportPart(TypedDict):
+    """One output file of an export"""
+
+    path: str  # File name, relative to the output directory
+    start_time: str  # Start of the part's synced time slice (inclusive)
+    end_time: str  # End of the part's synced time slice (exclusive, except for the last slice)
+    records: int  # Records written
+    requests: int  # API requests made
+    bytes: int  # File size
+    seconds: float  # Time the worker spent on the part
+
+
+class ExportManifest(TypedDict):
+    """Description of a finished export"""
+
+    database_id: str
+    format: str  # "jsonl" or "parquet"
+    start_time: str
+    end_time: str
+    filter: Optional[Any]  # Filter the export was restricted to, if any
+    records: int  # Records written across all parts
+    seconds: float  # Wall-clock time of the export
+    created_at: str  # When the export finished
+    parts: List[ExportPart]
+
+
+class ProcessPoolExporter:
+    """
+    Exports a database with a pool of worker processes
+
+    The synced-time range is split into ``processes * slices_per_process``
+    slices, and each worker process takes slices from a shared queue.
+    Slices are half-open on the right, so a record on a boundary is written
+    by exactly one part. Each slice is paged through ``get_records``, or
+    through ``filter_records`` when a filter is given.
+
+    The client configuration, transform and filter are sent to the worker
+    processes and must be picklable (the transform must be a module-level
+    function). ``hooks`` are not sent to the workers, and records are
+    always decoded into dicts. With Parquet output the transform must return
+    records, and each part is streamed to disk one row group at a time.
+    """
+
+    def __init__(
+        self,
+        config: LightfeedConfig,
+        database_id: str,
+        processes: Optional[int] = None,
+        slices_per_process: int = DEFAULT_SLICES_PER_PROCESS,
+        limit: int = 500,
+        transform: Optional[RecordTransform] = None,
+        filter_params: Optional[FilterRecordsParams] = None,
+        format: str = "jsonl",
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ) -> None:
+        """
+        Creates a new exporter
+
+        Args:
+            config: Client configuration used by every worker
+            database_id: The database ID
+            processes: Number of worker processes (defaults to the number of CPUs)
+            slices_per_process: Slices per process
+            limit: Page size used for every request (max 500)
+            transform: Function applied to every record before it is written
+            filter_params: Export only records matching ``filter_params["filter"]``
+            format: ``jsonl`` or ``parquet`` (requires pyarrow)
+            row_group_size: Records per Parquet row group
+
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        # Workers write plain dicts, and hooks would only observe the worker processes
+        self.config = {key: value for key, value in config.items() if key not in ("hooks", "typedResponses")}
+        self.database_id = database_id
+        self.processes = processes or os.cpu_count() or 1
+        self.slices_per_process = max(1, slices_per_process)
+        self.limit = limit
+        self.transform = transform
+        self.filter = (filter_params or {}).get("filter")
+        self.format = format
+        self.row_group_size = max(1, row_group_size)
+
+    def run(
+        self,
+        output_dir: str,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+    ) -> ExportManifest:
+        """
+        Exports every record synced within a time range
+
+        Args:
+            output_dir: Directory for the part files and the manifest (created if missing)
+            start_time: Start of the synced time range (ISO 8601, defaults to the epoch)
+            end_time: End of the synced time range (ISO 8601, defaults to now)
+
+        Returns:
+            The manifest, also written to ``manifest.json`` in ``output_dir``
+
+        Raises:
+            LightfeedError: If an API request fails
+        """
+        # Loads multiprocessing, so only imported when an export runs
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        started = time.perf_counter()
+        start = parse_timestamp(start_time) if start_time else EPOCH
+        end = parse_timestamp(end_time) if end_time else datetime.now(timezone.utc)
+        os.makedirs(output_dir, exist_ok=True)
+
+        slices = split_range(start, end, self.processes * self.slices_per_process)
+        tasks = [
+            _SliceTask(
+                index=index,
+                start_time=format_timestamp(slice_start),
+                end_time=format_timestamp(slice_end),
+                last=index == len(slices) - 1,
+                path=os.path.join(output_dir, f"part-{index:05d}.{self.format}"),
+            )
+            for index, (slice_start, slice_end) in enumerate(slices)
+        ]
+        options = _WorkerOptions(
+            self.database_id, self.limit, self.transform, self.filter, self.format, self.row_group_size
+        )
+
+        parts: List[ExportPart] = []
+        with ProcessPoolExecutor(
+            max_workers=self.processes, initializer=_init_worker, initargs=(self.config,)
+        ) as executor:
+            futures = [executor.submit(_export_slice, options, task) for task in tasks]
+            try:
+                for future in as_completed(futures):
+                    parts.append(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        parts.sort(key=lambda part: part["path"])
+        manifest: ExportManifest = {
+            "database_id": self.database_id,
+            "format": self.format,
+            "start_time": format_timestamp(start),
+            "end_time": format_timestamp(end),
+            "filter": self.filter,
+            "records": sum(part["records"] for part in parts),
+            "seconds": round(time.perf_counter() - started, 3),
+            "created_at": format_timestamp(datetime.now(timezone.utc)),
+            "parts": parts,
+        }
+        with open(os.path.join(output_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        return manifest
+
+
+class _SliceTask(NamedTuple):
+    """A synced-time slice and the file it is written to"""
+
+    index: int
+    start_time: str
+    end_time: str
+    last: bool  # The last slice also includes its end bound
+    path: str
+
+
+class _WorkerOptions(NamedTuple):
+    """Export settings shared by every slice"""
+
+    database_id: str
+    limit: int
+    transform: Optional[RecordTransform]
+    filter: Optional[Any]
+    format: str
+    row_group_size: int
+
+
+# Client of the current worker process, created by _init_worker
+_worker_client: Any = None
+
+
+def _init_worker(config: LightfeedConfig) -> None:
+    global _worker_client
+    from lightfeed.client import LightfeedClient
+
+    _worker_client = LightfeedClient(config)
+
+
+def _export_slice(options: _WorkerOptions, task: _SliceTask) -> ExportPart:
+    """Pages through one slice and writes its records to the slice's file"""
+    started = time.perf_counter()
+    end = parse_timestamp(task.end_time)
+    writer: Any
+    if options.format == "jsonl":
+        writer = _JSONLWriter(task.path)
+    else:
+        writer = _ParquetWriter(task.path, options.row_group_size)
+    requests = 0
+    cursor: Optional[str] = None
+    try:
+        while True:
+            page = _fetch(options, task, cursor)
+            requests += 1
+            batch = []
+            for record in page.get("results") or []:
+                # Boundary records belong to the slice starting there
+                if not task.last and parse_timestamp(record["timestamps"]["synced_at"]) >= end:
+                    continue
+                if options.transform is not None:
+                    record = options.transform(record)
+                    if record is None:
+                        continue
+                batch.append(record)
+            writer.write(batch)
+            cursor = next_cursor(page)
+            if cursor is None:
+                break
+    finally:
+        writer.close()
+    return {
+        "path": os.path.basename(task.path),
+        "start_time": task.start_time,
+        "end_time": task.end_time,
+        "records": writer.records,
+        "requests": requests,
+        "bytes": os.path.getsize(task.path),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _fetch(options: _WorkerOptions, task: _SliceTask, cursor: Optional[str]) -> Any:
+    if options.filter is None:
+        params: Dict[str, Any] = {"start_time": task.start_time, "end_time": task.end_time, "limit": options.limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        return _worker_client.get_records(options.database_id, params)
+    pagination: Dict[str, Any] = {"limit": options.limit}
+    if cursor is not None:
+        pagination["cursor"] = cursor
+    return _worker_client.filter_records(options.database_id, {
+        "filter": options.filter,
+        "time_range": {"start_time": task.start_time, "end_time": task.end_time},
+        "pagination": pagination,
+    })
+
+
+class _JSONLWriter:
+    """Writes one JSON document per line, encoded with the client's codec"""
+
+    def __init__(self, path: str) -> None:
+        self.records = 0
+        self._file = open(path, "wb")
+        self._dumps = _worker_client.codec.dumps
+
+    def write(self, records: List[Any]) -> None:
+        if records:
+            self._file.write(b"\n".join(self._dumps(record) for record in records) + b"\n")
+            self.records += len(records)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetWriter:
+    """
+    Streams a slice into a Parquet file, one row group per ``row_group_size`` records
+
+    The file's schema comes from the first row group. A later row group
+    with new columns or other types widens it (integers and floats to
+    float64, anything else to JSON strings) and the row groups already
+    written are rewritten one at a time, so memory stays bounded by a row
+    group either way.
+    """
+
+    def __init__(self, path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> None:
+        from lightfeed.columnar import ColumnarCollector
+
+        self.records = 0
+        self._path = path
+        self._row_group_size = row_group_size
+        self._collector = ColumnarCollector()
+        self._writer: Any = None
+        self._schema: Any = None
+
+    def write(self, records: List[Any]) -> None:
+        self.records += len(records)
+        start = 0
+        while start < len(records):
+            end = start + self._row_group_size - self._collector.rows
+            self._collector.add(records[start:end])
+            start = end
+            if self._collector.rows >= self._row_group_size:
+                self._flush()
+
+    def close(self) -> None:
+        # An empty slice still gets a file holding the metadata columns
+        if self._collector.rows or self._writer is None:
+            self._flush()
+        self._writer.close()
+
+    def _flush(self) -> None:
+        from lightfeed.columnar import ColumnarCollector
+
+        table = self._collector.to_arrow()
+        self._collector = ColumnarCollector()
+        if self._writer is None:
+            self._open(table.schema)
+        else:
+            schema = _widen_schema(self._schema, table.schema)
+            if not schema.equals(self._schema):
+                self._rewrite(schema)
+        self._writer.write_table(_conform_table(table, self._schema))
+
+    def _open(self, schema: Any) -> None:
+        import pyarrow.parquet as pq
+
+        self._schema = schema
+        self._writer = pq.ParquetWriter(self._path, schema)
+
+    def _rewrite(self, schema: Any) -> None:
+        """Copies the row groups written so far into a file with the wider schema"""
+        import pyarrow.parquet as pq
+
+        self._writer.close()
+        previous = self._path + ".tmp"
+        os.replace(self._path, previous)
+        self._open(schema)
+        with open(previous, "rb") as f:
+            source = pq.ParquetFile(f)
+            for index in range(source.num_row_groups):
+                self._writer.write_table(_conform_table(source.read_row_group(index), schema))
+        os.unlink(previous)
+
+
+def _widen_schema(schema: Any, other: Any) -> Any:
+    """Returns a schema holding the columns of both, in a type fitting both"""
+    import pyarrow as pa
+
+    fields = []
+    for field in schema:
+        index = other.get_field_index(field.name)
+        if index < 0:
+            fields.append(field)
+        else:
+            fields.append(pa.field(field.name, _common_type(field.type, other.field(index).type)))
+    fields.extend(field for field in other if schema.get_field_index(field.name) < 0)
+    return pa.schema(fields)
+
+
+def _common_type(first: Any, second: Any) -> Any:
+    import pyarrow as pa
+
+    if first.equals(second) or pa.types.is_null(second):
+        return first
+    if pa.types.is_null(first):
+        return second
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if any(check(first) for check in numeric) and any(check(second) for check in numeric):
+        return pa.float64()
+    return pa.string()
+
+
+def _conform_table(table: Any, schema: Any) -> Any:
+    """Casts a table to a schema, adding missing columns as nulls"""
+    import pyarrow as pa
+
+    from lightfeed.columnar import text_value
+
+    columns = []
+    for field in schema:
+        index = table.schema.get_field_index(field.name)
+        if index < 0:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(index)
+        if column.type.equals(field.type):
+            columns.append(column)
+        elif pa.types.is_string(field.type) and not pa.types.is_null(column.type):
+            # Encoded like columns with no common type in ColumnarCollector.to_arrow
+            columns.append(pa.array([text_value(v) for v in column.to_pylist()], type=pa.string()))
+        else:
+            columns.append(column.cast(field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
@@ -0,0 +1,216 @@
+"""
+Retry, backoff and client-side rate limiting for Lightfeed API calls
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Mapping, Optional
+
+from lightfeed.models import RetryConfig
+
+
+# Default retry settings
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5  # seconds
+DEFAULT_MAX_BACKOFF = 30.0  # seconds
+
+# Error classes a retry rule can apply to
+RATE_LIMIT = "rate_limit"
+SERVER_ERROR = "server_error"
+CONNECTION_ERROR = "connection_error"
+
+
+def classify_error(status: Optional[int]) -> Optional[str]:
+    """
+    Maps a failed request to its retry error class
+
+    Args:
+        status: HTTP status code of the response, or None if no response was received
+
+    Returns:
+        The error class, or None if the error is never retried
+    """
+    if status is None:
+        return CONNECTION_ERROR
+    if status == 429:
+        return RATE_LIMIT
+    if status >= 500:
+        return SERVER_ERROR
+    return None
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]], now: Optional[float] = None) -> Optional[float]:
+    """
+    Reads how long the server asked us to wait from rate-limit headers
+
+    Understands ``Retry-After`` (seconds or HTTP date), ``RateLimit-Reset``
+    (seconds) and ``X-RateLimit-Reset`` (seconds or a Unix timestamp).
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        now: Current Unix time, for testing
+
+    Returns:
+        Seconds to wait, or None if no usable header is present
+    """
+    if not headers:
+        return None
+    now = time.time() if now is None else now
+
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            # HTTP dates are rare, so the email package is only loaded for them
+            from email.utils import parsedate_to_datetime
+
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+
+    for header in ("RateLimit-Reset", "X-RateLimit-Reset"):
+        value = headers.get(header)
+        if not value:
+            continue
+        try:
+            reset = float(value)
+        except ValueError:
+            continue
+        # Large values are absolute Unix timestamps rather than deltas
+        if reset > 1e9:
+            reset -= now
+        return max(0.0, reset)
+    return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the client's request rate
+
+    Every request reserves one token. When the bucket is empty the caller is
+    told how long to wait for its token, so sync and async callers can both
+    sleep without holding a lock.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Creates a token bucket
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity (defaults to one second worth of tokens)
+            clock: Monotonic clock, for testing
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Reserves a token
+
+        Returns:
+            Seconds the caller must wait before using its token (0 if available now)
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Blocks until a token is available"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter and per-error-class retry limits
+
+    When the server answers with ``Retry-After`` (or a rate-limit reset
+    header) that delay is used instead of the computed backoff, and it is
+    shared: every thread using the policy holds off until it has passed, so
+    a 429 does not trigger a burst of retries from all workers at once.
+    """
+
+    def __init__(self, config: Optional[RetryConfig] = None, rng: Optional[random.Random] = None) -> None:
+        """
+        Creates a retry policy
+
+        Args:
+            config: Retry configuration
+            rng: Random generator used for jitter, for testing
+        """
+        config = config or {}
+        max_retries = config.get("maxRetries")
+        self.max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_factor = config.get("backoffFactor") or DEFAULT_BACKOFF_FACTOR
+        self.max_backoff = config.get("maxBackoff") or DEFAULT_MAX_BACKOFF
+        self.respect_retry_after = config.get("respectRetryAfter", True) is not False
+        self.limits = {
+            RATE_LIMIT: _retry_limit(config.get("rateLimitRetries"), self.max_retries),
+            SERVER_ERROR: _retry_limit(config.get("serverErrorRetries"), self.max_retries),
+            CONNECTION_ERROR: _retry_limit(config.get("connectionErrorRetries"), self.max_retries),
+        }
+        self._rng = rng or random.Random()
+        self._not_before = 0.0
+        self._lock = threading.Lock()
+
+    def delay_for(
+        self,
+        attempt: int,
+        status: Optional[int],
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Optional[float]:
+        """
+        Decides whether a failed attempt is retried and how long to wait
+
+        Args:
+            attempt: Number of retries already made for this request
+            status: HTTP status code, or None for connection errors
+            headers: Response headers, if a response was received
+
+        Returns:
+            Seconds to wait before retrying, or None to give up
+        """
+        error_class = classify_error(status)
+        if error_class is None or attempt >= self.limits[error_class]:
+            return None
+
+        server_delay = parse_retry_after(headers) if self.respect_retry_after else None
+        if server_delay is not None:
+            delay = min(server_delay, self.max_backoff)
+            with self._lock:
+                self._not_before = max(self._not_before, time.monotonic() + delay)
+            return delay
+
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        backoff = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return self._rng.uniform(0, backoff)
+
+    def pause_remaining(self) -> float:
+        """
+        Returns how long callers must wait because of a server-requested pause
+
+        Returns:
+            Seconds until the shared ``Retry-After`` window ends
+        """
+        with self._lock:
+            return max(0.0, self._not_before - time.monotonic())
+
+
+def _retry_limit(value: Optional[int], default: int) -> int:
+    return default if value is None else value
@@ -0,0 +1,242 @@
+"""
+Streaming, incremental parsing of records responses
+
+A records page is ``{"results": [...], "pagination": {...}}``. Instead of
+buffering the whole body and building the whole object tree, the parser
+here scans the body chunk by chunk and hands out each element of
+``results`` as soon as its closing brace arrives, so only one record (plus
+the unparsed tail of the last chunk) is held at a time.
+"""
+
+import json
+import re
+import time
+from types import TracebackType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Type, cast
+
+from lightfeed.models import LightfeedError, Pagination, Record
+
+
+# Bytes read from the response per chunk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# A complete JSON string, or a structural character. A lone quote means the
+# string continues in the next chunk.
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|["{}\[\],]')
+
+_WHITESPACE_AND_COLON = b" \t\r\n:"
+
+
+class RecordStreamParser:
+    """
+    Incremental parser for the body of a records response
+
+    Feed it the body in chunks of any size; every call returns the raw JSON
+    of the ``results`` elements completed by that chunk. The other
+    top-level members (``pagination``) are decoded and kept in ``members``.
+    Elements are validated only by whoever decodes them.
+    """
+
+    def __init__(self) -> None:
+        self.members: Dict[str, Any] = {}
+        self.done = False
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._in_results = False
+        self._element_start: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        Parses the next chunk of the body
+
+        Args:
+            chunk: Next bytes of the body
+
+        Returns:
+            Raw JSON of every ``results`` element completed by this chunk
+
+        Raises:
+            ValueError: If the body is not a JSON object
+        """
+        self._buffer += chunk
+        elements: List[bytes] = []
+        buffer = self._buffer
+        for match in _TOKEN.finditer(buffer, self._pos):
+            token = match.group()
+            if token == b'"':
+                # Incomplete string: rescan it once more data has arrived
+                self._pos = match.start()
+                break
+            self._pos = match.end()
+            if self.done:
+                raise ValueError("Unexpected data after the end of the response")
+            if token[0] == 0x22:  # '"'
+                if self._depth == 1 and self._expect_key:
+                    self._key = json.loads(token)
+                    self._expect_key = False
+                    self._value_start = match.end()
+                continue
+            self._structural(token, match.start(), match.end(), elements)
+        else:
+            self._pos = len(buffer)
+        self._compact()
+        return elements
+
+    def close(self) -> None:
+        """
+        Checks that the whole body has been fed
+
+        Raises:
+            ValueError: If the body ended early
+        """
+        if not self.done:
+            raise ValueError("Response body ended unexpectedly")
+
+    def _structural(self, token: bytes, start: int, end: int, elements: List[bytes]) -> None:
+        depth = self._depth
+        if token in (b"{", b"["):
+            if depth == 0 and token != b"{":
+                raise ValueError("Expected a JSON object")
+            if depth == 0:
+                self._expect_key = True
+            elif depth == 1 and self._key == "results" and token == b"[":
+                self._in_results = True
+                self._value_start = None
+            elif depth == 2 and self._in_results:
+                self._element_start = start
+            self._depth += 1
+        elif token in (b"}", b"]"):
+            if depth == 0:
+                raise ValueError("Unbalanced brackets")
+            self._depth -= 1
+            if depth == 3 and self._in_results and self._element_start is not None:
+                elements.append(bytes(self._buffer[self._element_start:end]))
+                self._element_start = None
+            elif depth == 2 and self._in_results:
+                self._in_results = False
+                self._key = None
+            elif depth == 1:
+                self._finish_member(start)
+                self.done = True
+        elif depth == 1:  # ','
+            self._finish_member(start)
+            self._expect_key = True
+
+    def _finish_member(self, end: int) -> None:
+        if self._key is not None and self._value_start is not None:
+            value = bytes(self._buffer[self._value_start:end]).strip(_WHITESPACE_AND_COLON)
+            self.members[self._key] = json.loads(value)
+        self._key = None
+        self._value_start = None
+
+    def _compact(self) -> None:
+        """Drops the part of the buffer that no pending element or member needs"""
+        keep = self._pos
+        for start in (self._element_start, self._value_start):
+            if start is not None:
+                keep = min(keep, start)
+        if keep:
+            del self._buffer[:keep]
+            self._pos -= keep
+            if self._element_start is not None:
+                self._element_start -= keep
+            if self._value_start is not None:
+                self._value_start -= keep
+
+
+class RecordStream:
+    """
+    Records of one response, decoded as the body arrives
+
+    Iterate it to receive the records; ``pagination`` is available once the
+    iteration has finished. Close it (or use it as a context manager) when
+    stopping early so the connection is released. A stream can only be
+    iterated once.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        decode: Callable[[bytes], Record],
+        on_close: Optional[Callable[["RecordStream", Optional[LightfeedError]], None]] = None,
+        release: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Creates a stream over the chunks of a response body
+
+        Args:
+            chunks: The response body in chunks; transport errors must already be LightfeedErrors
+            decode: Decodes the raw JSON of one record
+            on_close: Called once when the stream ends, with the error that ended it, if any
+            release: Releases the underlying response
+        """
+        self.pagination: Optional[Pagination] = None
+        self.records = 0
+        self.bytes_in = 0
+        self.decode_seconds = 0.0
+        self._chunks = chunks
+        self._decode = decode
+        self._on_close = on_close
+        self._release = release
+        self._closed = False
+        self._iterator = self._records()
+
+    def __iter__(self) -> Iterator[Record]:
+        return self
+
+    def __next__(self) -> Record:
+        return next(self._iterator)
+
+    def __enter__(self) -> "RecordStream":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the stream and releases the connection"""
+        self._iterator.close()
+        self._finish(None)
+
+    def _records(self) -> Iterator[Record]:
+        parser = RecordStreamParser()
+        error: Optional[LightfeedError] = None
+        try:
+            for chunk in self._chunks:
+                self.bytes_in += len(chunk)
+                started = time.perf_counter()
+                try:
+                    records = [self._decode(element) for element in parser.feed(chunk)]
+                except ValueError as e:
+                    raise LightfeedError(500, f"Invalid response body: {e}")
+                self.decode_seconds += time.perf_counter() - started
+                self.records += len(records)
+                yield from records
+            try:
+                parser.close()
+            except ValueError as e:
+                raise LightfeedError(500, f"Invalid response body: {e}")
+            self.pagination = cast(Optional[Pagination], parser.members.get("pagination"))
+        except LightfeedError as e:
+            error = e
+            raise
+        finally:
+            self._finish(error)
+
+    def _finish(self, error: Optional[LightfeedError]) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._release is not None:
+            self._release()
+        if self._on_close is not None:
+            self._on_close(self, error)
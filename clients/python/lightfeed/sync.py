@@ -0,0 +1,277 @@
+"""
+Incremental (changed-since) sync with persisted checkpoints
+"""
+
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, TypedDict
+
+from lightfeed.export import parse_timestamp
+from lightfeed.models import GetRecordsParams, Record
+from lightfeed.pagination import next_cursor
+
+if TYPE_CHECKING:
+    # sqlite3 is imported by SQLiteCheckpointStore, so clients that never sync skip it
+    import sqlite3
+
+
+# Default location of the file checkpoint store
+DEFAULT_CHECKPOINT_PATH = "lightfeed-checkpoints.json"
+
+
+class SyncCheckpoint(TypedDict):
+    """Position of the last record a sync has delivered"""
+
+    synced_at: str  # ISO 8601 synced time of the last delivered record
+    record_id: int  # ID of the last delivered record
+
+
+class CheckpointStore(ABC):
+    """
+    Base class for checkpoint stores
+
+    Stores keep one checkpoint per database ID. ``save`` must replace the
+    stored checkpoint atomically so a crash never leaves a partial write.
+    """
+
+    @abstractmethod
+    def load(self, database_id: str) -> Optional[SyncCheckpoint]:
+        """
+        Loads the checkpoint of a database
+
+        Args:
+            database_id: The database ID
+
+        Returns:
+            The checkpoint, or None if the database has never been synced
+        """
+
+    @abstractmethod
+    def save(self, database_id: str, checkpoint: SyncCheckpoint) -> None:
+        """
+        Atomically replaces the checkpoint of a database
+
+        Args:
+            database_id: The database ID
+            checkpoint: The new checkpoint
+        """
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Stores checkpoints for all databases in one JSON file"""
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH) -> None:
+        """
+        Creates a file checkpoint store
+
+        Args:
+            path: Path of the JSON file (created on first save)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self, database_id: str) -> Optional[SyncCheckpoint]:
+        with self._lock:
+            return self._read().get(database_id)
+
+    def save(self, database_id: str, checkpoint: SyncCheckpoint) -> None:
+        with self._lock:
+            checkpoints = self._read()
+            checkpoints[database_id] = checkpoint
+            # Write to a temporary file and rename it over the old one
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoints-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(checkpoints, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def _read(self) -> Dict[str, SyncCheckpoint]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Stores checkpoints in a SQLite database"""
+
+    def __init__(self, path: str) -> None:
+        """
+        Creates a SQLite checkpoint store
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lightfeed_checkpoints ("
+                "database_id TEXT PRIMARY KEY, synced_at TEXT NOT NULL, record_id INTEGER NOT NULL)"
+            )
+
+    def load(self, database_id: str) -> Optional[SyncCheckpoint]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT synced_at, record_id FROM lightfeed_checkpoints WHERE database_id = ?",
+                (database_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"synced_at": row[0], "record_id": row[1]}
+
+    def save(self, database_id: str, checkpoint: SyncCheckpoint) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO lightfeed_checkpoints (database_id, synced_at, record_id) VALUES (?, ?, ?)",
+                (database_id, checkpoint["synced_at"], checkpoint["record_id"]),
+            )
+
+    def _connect(self) -> "sqlite3.Connection":
+        import sqlite3
+
+        # A connection per operation keeps the store usable from any thread
+        return sqlite3.connect(self.path)
+
+
+class IncrementalSync:
+    """
+    Replicates a database incrementally using a persisted checkpoint
+
+    Each run fetches records synced since the checkpoint (``start_time`` is
+    the checkpoint's ``synced_at``), drops records at or before the
+    checkpoint position, and hands the rest to the consumer page by page.
+    The checkpoint only moves forward once the consumer has acknowledged a
+    batch, so a failed run resumes from the last acknowledged record.
+
+    Records are expected in ascending ``(synced_at, id)`` order, which is
+    the order encoded in API pagination cursors.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        database_id: str,
+        store: Optional[CheckpointStore] = None,
+        limit: int = 500,
+        initial_start_time: Optional[str] = None,
+    ) -> None:
+        """
+        Creates an incremental sync
+
+        Args:
+            client: A ``LightfeedClient`` (or any object with ``get_records``)
+            database_id: The database ID
+            store: Checkpoint store (defaults to a JSON file in the working directory)
+            limit: Page size used for every request (max 500)
+            initial_start_time: Where the first run starts when there is no checkpoint
+        """
+        self.client = client
+        self.database_id = database_id
+        self.store = store if store is not None else FileCheckpointStore()
+        self.limit = limit
+        self.initial_start_time = initial_start_time
+
+    @property
+    def checkpoint(self) -> Optional[SyncCheckpoint]:
+        """The currently stored checkpoint"""
+        return self.store.load(self.database_id)
+
+    def batches(self, end_time: Optional[str] = None) -> Iterator[List[Record]]:
+        """
+        Yields batches of new or changed records
+
+        Requesting the next batch acknowledges the previous one and commits
+        the checkpoint past it. A batch the consumer is still working on when
+        iteration stops (for example because of an exception) is not
+        acknowledged and will be delivered again on the next run.
+
+        Args:
+            end_time: Optional upper bound of the synced time range (ISO 8601)
+
+        Returns:
+            Iterator over non-empty batches of records
+        """
+        checkpoint = self.store.load(self.database_id)
+        position = _checkpoint_key(checkpoint) if checkpoint else None
+
+        params: GetRecordsParams = {"limit": self.limit}
+        start_time = checkpoint["synced_at"] if checkpoint else self.initial_start_time
+        if start_time:
+            params["start_time"] = start_time
+        if end_time:
+            params["end_time"] = end_time
+
+        cursor: Optional[str] = None
+        while True:
+            page_params = dict(params)
+            if cursor is not None:
+                page_params["cursor"] = cursor
+            page = self.client.get_records(self.database_id, page_params)
+
+            batch: List[Record] = []
+            latest: Optional[Tuple[datetime, int, Record]] = None
+            for record in page.get("results") or []:
+                key = _record_key(record)
+                # Drop the records already delivered at the checkpoint boundary
+                if position is not None and key <= position:
+                    continue
+                batch.append(record)
+                if latest is None or key > latest[:2]:
+                    latest = (key[0], key[1], record)
+
+            if batch and latest is not None:
+                yield batch
+                # The consumer asked for more, so the batch is acknowledged
+                self.store.save(self.database_id, {
+                    "synced_at": latest[2]["timestamps"]["synced_at"],
+                    "record_id": latest[1],
+                })
+                position = latest[:2]
+
+            cursor = next_cursor(page)
+            if cursor is None:
+                return
+
+    def run(self, handler: Callable[[List[Record]], None], end_time: Optional[str] = None) -> int:
+        """
+        Runs one sync, passing each batch to a handler
+
+        The checkpoint is committed after each successful handler call. If the
+        handler raises, the exception propagates and the batch is retried on
+        the next run.
+
+        Args:
+            handler: Callable processing one batch of records
+            end_time: Optional upper bound of the synced time range (ISO 8601)
+
+        Returns:
+            Number of records delivered
+
+        Raises:
+            LightfeedError: If an API request fails
+        """
+        count = 0
+        for batch in self.batches(end_time):
+            handler(batch)
+            count += len(batch)
+        return count
+
+
+def _checkpoint_key(checkpoint: SyncCheckpoint) -> Tuple[datetime, int]:
+    return parse_timestamp(checkpoint["synced_at"]), checkpoint["record_id"]
+
+
+def _record_key(record: Record) -> Tuple[datetime, int]:
+    return parse_timestamp(record["timestamps"]["synced_at"]), record["id"]
@@ -0,0 +1,244 @@
+"""
+Top-k selection over relevance-ranked search results
+"""
+
+import heapq
+import itertools
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Generic, List, NamedTuple, Optional, Sequence, Set, Tuple, TypeVar, cast
+
+from lightfeed.models import Record, RecordsResponse, SearchRecordsParams
+from lightfeed.pagination import next_cursor
+
+
+# Largest page the API returns
+MAX_PAGE_LIMIT = 500
+
+# A callable running one search against a database, e.g. ``client.search_records``
+SearchCall = Callable[[str, SearchRecordsParams], RecordsResponse]
+
+T = TypeVar("T")
+
+
+class TopK(Generic[T]):
+    """
+    The k highest-scoring items seen so far
+
+    A min-heap of at most k entries: once full, an item only gets in by
+    beating the lowest score, which it then evicts, so memory stays bounded
+    however many items are offered. Among equal scores the item offered
+    first ranks higher.
+    """
+
+    def __init__(self, k: int) -> None:
+        """
+        Creates an empty top-k collection
+
+        Args:
+            k: Number of items kept
+
+        Raises:
+            ValueError: If k is less than 1
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        # Entries are (score, -sequence, item); the sequence keeps items from being compared
+        self._heap: List[Tuple[float, int, T]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def full(self) -> bool:
+        """Whether k items are held"""
+        return len(self._heap) >= self.k
+
+    @property
+    def min_score(self) -> Optional[float]:
+        """Score of the k-th best item, or None while fewer than k are held"""
+        return self._heap[0][0] if self.full else None
+
+    def push(self, score: float, item: T) -> bool:
+        """
+        Offers an item
+
+        Args:
+            score: Score of the item, higher is better
+            item: The item
+
+        Returns:
+            Whether the item is now among the top k
+        """
+        entry = (score, -next(self._sequence), item)
+        if not self.full:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] <= self._heap[0][:2]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def items(self) -> List[T]:
+        """Returns the items, best first"""
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+class FederatedHit(NamedTuple):
+    """A search result and the database it came from"""
+
+    database_id: str
+    record: Record
+    score: float
+
+
+def federated_search(
+    search: SearchCall,
+    database_ids: Sequence[str],
+    params: SearchRecordsParams,
+    k: int,
+    max_workers: int,
+) -> List[FederatedHit]:
+    """
+    Runs one search against several databases and merges the best k results
+
+    Every database is paged concurrently, one page at a time, and each page
+    is merged into a bounded top-k heap as it arrives. The API returns
+    results in descending ``relevance_score`` order, so a database stops
+    being paged as soon as its page ends below the current k-th best score
+    or below ``search.threshold``: none of its later results could still
+    make the top k.
+
+    Args:
+        search: Callable running one search against a database
+        database_ids: Databases to search; duplicates are searched once
+        params: Search parameters sent to every database; ``pagination.limit``
+            sets the page size (defaults to k) and any cursor is ignored
+        k: Number of results to return
+        max_workers: Maximum number of requests in flight
+
+    Returns:
+        Up to k results across all databases, highest score first
+
+    Raises:
+        ValueError: If k is less than 1
+        LightfeedError: If a search fails
+    """
+    top: TopK[FederatedHit] = TopK(k)
+    threshold = (params.get("search") or {}).get("threshold")
+    limit = (params.get("pagination") or {}).get("limit") or min(k, MAX_PAGE_LIMIT)
+    base = cast(Dict[str, Any], dict(params, pagination={"limit": limit}))
+
+    def fetch(database_id: str, cursor: Optional[str]) -> RecordsResponse:
+        page_params = dict(base, pagination=dict(base["pagination"], cursor=cursor)) if cursor else base
+        return search(database_id, cast(SearchRecordsParams, page_params))
+
+    unique = list(dict.fromkeys(database_ids))
+    if not unique:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique)))) as executor:
+        pending: Dict["Future[RecordsResponse]", str] = {
+            executor.submit(fetch, database_id, None): database_id for database_id in unique
+        }
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    database_id = pending.pop(future)
+                    page = future.result()
+                    lowest: Optional[float] = None
+                    for record in page.get("results") or []:
+                        lowest = relevance_score(record)
+                        if threshold is None or lowest >= threshold:
+                            top.push(lowest, FederatedHit(database_id, record, lowest))
+                    cursor = next_cursor(page)
+                    if cursor is not None and _may_improve(lowest, top, threshold):
+                        pending[executor.submit(fetch, database_id, cursor)] = database_id
+        finally:
+            for future in pending:
+                future.cancel()
+    return top.items()
+
+
+def top_k_search(
+    search: SearchCall,
+    database_id: str,
+    params: SearchRecordsParams,
+    k: int,
+    dedupe: bool = True,
+    min_relative_score: Optional[float] = None,
+) -> List[Record]:
+    """
+    Fetches the best k results of a search with as few requests as possible
+
+    The first page asks for exactly k results and every further page only
+    for the number still missing, capped at the API maximum. Paging stops
+    as soon as k results are held, or once a page ends below
+    ``search.threshold`` or below ``min_relative_score`` times the best
+    score seen, since results come back in descending ``relevance_score``
+    order.
+
+    Args:
+        search: Callable running one search, e.g. ``client.search_records``
+        database_id: The database ID
+        params: Search parameters; any ``pagination`` is replaced
+        k: Number of results to return
+        dedupe: Drop results whose ``id`` was already seen, e.g. from overlapping pages
+        min_relative_score: Drop results scoring below this fraction of the best score
+
+    Returns:
+        Up to k records, highest score first
+
+    Raises:
+        ValueError: If k is less than 1
+        LightfeedError: If a search fails
+    """
+    top: TopK[Record] = TopK(k)
+    threshold = (params.get("search") or {}).get("threshold")
+    seen: Set[Any] = set()
+    best: Optional[float] = None
+    cutoff: Optional[float] = threshold
+    cursor: Optional[str] = None
+    while True:
+        # Ask only for what is still missing
+        pagination: Dict[str, Any] = {"limit": min(MAX_PAGE_LIMIT, k - len(top))}
+        if cursor is not None:
+            pagination["cursor"] = cursor
+        page = search(database_id, cast(SearchRecordsParams, dict(params, pagination=pagination)))
+        lowest: Optional[float] = None
+        for record in page.get("results") or []:
+            lowest = relevance_score(record)
+            if best is None:
+                # The first result is the best one; the relative cutoff follows from it
+                best = lowest
+                if min_relative_score is not None:
+                    cutoff = max(threshold or 0.0, best * min_relative_score)
+            if cutoff is not None and lowest < cutoff:
+                continue
+            if dedupe:
+                record_id = record.get("id")
+                if record_id in seen:
+                    continue
+                seen.add(record_id)
+            top.push(lowest, record)
+        previous, cursor = cursor, next_cursor(page)
+        if cursor is None or cursor == previous or top.full or lowest is None:
+            return top.items()
+        if cutoff is not None and lowest < cutoff:
+            return top.items()
+
+
+def relevance_score(record: Record) -> float:
+    """Returns the relevance score of a search result, 0 when missing"""
+    return record.get("relevance_score") or 0.0
+
+
+def _may_improve(lowest: Optional[float], top: TopK[Any], threshold: Optional[float]) -> bool:
+    """Whether pages after one ending at ``lowest`` could still hold a top-k result"""
+    if lowest is None:
+        return False
+    if threshold is not None and lowest < threshold:
+        return False
+    min_score = top.min_score
+    return min_score is None or lowest > min_score
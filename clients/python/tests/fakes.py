@@ -0,0 +1,92 @@
+"""
+In-memory fakes shared by the test suite
+"""
+
+import threading
+
+from lightfeed.export import format_timestamp
+
+
+class FakeRecordsApi:
+    """In-memory stand-in for get_records with synced-time filtering and cursors"""
+
+    def __init__(self, timestamps):
+        self.records = [
+            {"id": i, "data": {"n": i}, "timestamps": {"synced_at": ts}}
+            for i, ts in enumerate(timestamps)
+        ]
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get_records(self, database_id, params):
+        with self.lock:
+            self.calls += 1
+        start = params.get("start_time") or ""
+        end = params.get("end_time") or "9999"
+        matching = sorted(
+            (r for r in self.records if start <= r["timestamps"]["synced_at"] <= end),
+            key=lambda r: (r["timestamps"]["synced_at"], r["id"]),
+        )
+        if params.get("cursor"):
+            ts, record_id = params["cursor"].rsplit("_", 1)
+            matching = [
+                r for r in matching
+                if (r["timestamps"]["synced_at"], r["id"]) > (ts, int(record_id))
+            ]
+        limit = params.get("limit") or 100
+        page = matching[:limit]
+        has_more = len(matching) > limit
+        last = page[-1] if page else None
+        return {
+            "results": page,
+            "pagination": {
+                "limit": limit,
+                "next_cursor": f"{last['timestamps']['synced_at']}_{last['id']}" if has_more else None,
+                "has_more": has_more,
+            },
+        }
+
+
+def timestamps(start, count, step):
+    """Builds evenly spaced synced_at timestamps"""
+    return [format_timestamp(start + step * i) for i in range(count)]
+
+
+class FakeSearchApi:
+    """In-memory stand-in for search_records over several databases, ranked by score"""
+
+    def __init__(self, scores):
+        # scores: database id -> relevance score of each record; ids are list positions
+        self.databases = {
+            database_id: sorted(
+                ({"id": i, "data": {"db": database_id}, "relevance_score": s} for i, s in enumerate(values)),
+                key=lambda r: -r["relevance_score"],
+            )
+            for database_id, values in scores.items()
+        }
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def search_records(self, database_id, params):
+        with self.lock:
+            self.calls.append((database_id, params))
+        threshold = params["search"].get("threshold")
+        if threshold is None:
+            threshold = 0.2
+        matching = [r for r in self.databases[database_id] if r["relevance_score"] >= threshold]
+        pagination = params.get("pagination") or {}
+        offset = int(pagination.get("cursor") or 0)
+        limit = pagination.get("limit") or 100
+        page = matching[offset:offset + limit]
+        has_more = offset + limit < len(matching)
+        return {
+            "results": page,
+            "pagination": {
+                "limit": limit,
+                "next_cursor": str(offset + limit) if has_more else None,
+                "has_more": has_more,
+            },
+        }
+
+    def requests_to(self, database_id):
+        return sum(1 for called, _ in self.calls if called == database_id)
@@ -0,0 +1,148 @@
+"""
+Tests for the asyncio Lightfeed API client
+"""
+
+import asyncio
+import json
+import unittest
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from lightfeed import AsyncLightfeedClient
+from lightfeed.models import Condition, Operator, LightfeedError
+
+
+def make_page(ids, next_cursor=None):
+    """Builds a records response page"""
+    return {
+        "results": [{"id": i, "data": {"n": i}} for i in ids],
+        "pagination": {
+            "limit": 100,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        },
+    }
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncLightfeedClient(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the asyncio Lightfeed API client"""
+
+    def make_client(self, handler, **config):
+        """Creates a client backed by a mock transport"""
+        return AsyncLightfeedClient(
+            dict({"apiKey": "test-api-key"}, **config),
+            transport=httpx.MockTransport(handler),
+        )
+
+    async def test_get_records(self):
+        """Test the get_records method"""
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json=make_page([1]))
+
+        async with self.make_client(handler) as client:
+            result = await client.get_records("test-db-id", {"limit": 10})
+
+        self.assertEqual(result, make_page([1]))
+        request = requests_seen[0]
+        self.assertEqual(request.method, "GET")
+        self.assertEqual(request.url.path, "/v1/databases/test-db-id/records")
+        self.assertEqual(request.url.params["limit"], "10")
+        self.assertEqual(request.headers["x-api-key"], "test-api-key")
+
+    async def test_search_and_filter_records(self):
+        """Test the search_records and filter_records methods post JSON bodies"""
+        bodies = {}
+
+        def handler(request):
+            bodies[request.url.path] = json.loads(request.content)
+            return httpx.Response(200, json=make_page([1]))
+
+        search_params = {"search": {"text": "test query", "threshold": 0.5}}
+        filter_params = {
+            "filter": {
+                "condition": Condition.AND,
+                "rules": [{"column": "category", "operator": Operator.EQUALS, "value": "Test"}],
+            }
+        }
+        async with self.make_client(handler) as client:
+            await client.search_records("test-db-id", search_params)
+            await client.filter_records("test-db-id", filter_params)
+
+        self.assertEqual(bodies["/v1/databases/test-db-id/records/search"], search_params)
+        self.assertEqual(
+            bodies["/v1/databases/test-db-id/records/filter"]["filter"]["rules"][0]["operator"],
+            "equals",
+        )
+
+    async def test_error_handling(self):
+        """Test HTTP errors are converted into LightfeedError"""
+        def handler(request):
+            return httpx.Response(401, json={"message": "Invalid API key"})
+
+        async with self.make_client(handler) as client:
+            with self.assertRaises(LightfeedError) as context:
+                await client.get_records("test-db-id")
+
+        self.assertEqual(context.exception.status, 401)
+        self.assertEqual(context.exception.message, "Invalid API key")
+
+    async def test_iter_records(self):
+        """Test async iteration follows pagination cursors"""
+        chain = {None: make_page([1, 2], "c1"), "c1": make_page([3])}
+
+        def handler(request):
+            return httpx.Response(200, json=chain[request.url.params.get("cursor")])
+
+        async with self.make_client(handler) as client:
+            ids = [record["id"] async for record in client.iter_records("test-db-id")]
+
+        self.assertEqual(ids, [1, 2, 3])
+
+    async def test_concurrency_limit(self):
+        """Test no more than maxConcurrency requests are in flight"""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=make_page([1]))
+
+        async with self.make_client(handler, maxConcurrency=3) as client:
+            await asyncio.gather(*[client.get_records(f"db-{i}") for i in range(10)])
+
+        self.assertEqual(peak, 3)
+
+    async def test_search_many(self):
+        """Test batched searches collapse duplicates and report errors per query"""
+        texts_seen = []
+
+        def handler(request):
+            text = json.loads(request.content)["search"]["text"]
+            texts_seen.append(text)
+            if text == "bad":
+                return httpx.Response(400, json={"message": "Bad request"})
+            return httpx.Response(200, json=make_page([len(text)]))
+
+        queries = [{"search": {"text": t}} for t in ["a", "bad", "a", "ccc"]]
+        async with self.make_client(handler) as client:
+            results = await client.search_many("test-db-id", queries, max_concurrency=2)
+
+        self.assertEqual(sorted(texts_seen), ["a", "bad", "ccc"])
+        self.assertEqual([r.ok for r in results], [True, False, True, True])
+        self.assertEqual(results[1].error.status, 400)
+        self.assertEqual(results[3].response, make_page([3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Tests for batched search and filter queries
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from lightfeed import LightfeedClient
+from lightfeed.batch import run_batch
+from lightfeed.models import LightfeedError
+
+
+def search(text):
+    return {"search": {"text": text}, "pagination": {"limit": 10}}
+
+
+class TestRunBatch(unittest.TestCase):
+    """Test cases for the threaded batch runner"""
+
+    def test_results_in_input_order_with_errors(self):
+        """Test results keep input order and failures do not abort the batch"""
+        def call(database_id, params):
+            text = params["search"]["text"]
+            # Finish out of order
+            time.sleep(0.02 if text == "a" else 0)
+            if text == "bad":
+                raise LightfeedError(400, "Bad request")
+            return {"results": [{"id": text}]}
+
+        results = run_batch(call, "search", "db", [search("a"), search("bad"), search("c")])
+
+        self.assertEqual([r.params["search"]["text"] for r in results], ["a", "bad", "c"])
+        self.assertEqual(results[0].response, {"results": [{"id": "a"}]})
+        self.assertTrue(results[0].ok)
+        self.assertFalse(results[1].ok)
+        self.assertEqual(results[1].error.status, 400)
+        self.assertIsNone(results[1].response)
+
+    def test_identical_queries_are_collapsed(self):
+        """Test identical params, including key order, are sent once"""
+        calls = []
+
+        def call(database_id, params):
+            calls.append(params)
+            return {"results": []}
+
+        queries = [
+            search("a"),
+            {"pagination": {"limit": 10}, "search": {"text": "a"}},
+            search("b"),
+        ]
+        results = run_batch(call, "search", "db", queries)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(results), 3)
+        self.assertIs(results[1].params, queries[1])
+
+    def test_runs_concurrently_under_limit(self):
+        """Test queries overlap but never exceed the worker limit"""
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def call(database_id, params):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return {"results": []}
+
+        started = time.monotonic()
+        run_batch(call, "search", "db", [search(str(i)) for i in range(20)], max_workers=10)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(active[1], 10)
+        self.assertLess(elapsed, 0.5)
+
+    def test_empty_batch(self):
+        self.assertEqual(run_batch(lambda *args: None, "search", "db", []), [])
+
+
+class TestClientBatch(unittest.TestCase):
+    """Test cases for search_many and filter_many"""
+
+    def setUp(self):
+        self.client = LightfeedClient({"apiKey": "test-api-key"})
+
+    def test_search_many(self):
+        with patch.object(self.client, "search_records", return_value={"results": []}) as mock_search:
+            results = self.client.search_many("test-db-id", [search("a"), search("b")])
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(mock_search.call_count, 2)
+        mock_search.assert_any_call("test-db-id", search("a"))
+
+    def test_filter_many(self):
+        query = {"filter": {"condition": "AND", "rules": []}}
+        with patch.object(self.client, "filter_records", side_effect=LightfeedError(429, "Too many requests")):
+            results = self.client.filter_many("test-db-id", [query], max_workers=2)
+
+        self.assertEqual(results[0].error.status, 429)
+
+
+if __name__ == "__main__":
+    unittest.main()
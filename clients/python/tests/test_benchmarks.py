@@ -0,0 +1,70 @@
+"""
+Smoke tests for the benchmark mock server
+"""
+
+import unittest
+
+from benchmarks.mock_server import MockLightfeedServer
+from benchmarks.run import run_scenario
+from lightfeed import LightfeedClient
+from lightfeed.models import LightfeedError, Operator
+
+
+class TestMockServer(unittest.TestCase):
+    """Test cases running the client against the mock server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockLightfeedServer(records=250, payload_size=10).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def make_client(self, **config):
+        return LightfeedClient(dict({"apiKey": "test-api-key", "baseUrl": self.server.base_url}, **config))
+
+    def test_cursor_pagination_and_time_range(self):
+        with self.make_client() as client:
+            ids = [r["id"] for r in client.iter_records("db", {"limit": 100})]
+            window = client.get_records("db", {
+                "start_time": "2024-01-01T00:00:10.000Z",
+                "end_time": "2024-01-01T00:00:19.000Z",
+            })
+
+        self.assertEqual(ids, list(range(1, 251)))
+        self.assertEqual([r["id"] for r in window["results"]], list(range(10, 20)))
+
+    def test_search_and_filter(self):
+        with self.make_client() as client:
+            search = list(client.iter_search("db", {"search": {"text": "ai", "threshold": 0.5}}))
+            matches = list(client.iter_filter("db", {
+                "filter": {"rules": [{"column": "industry", "operator": Operator.EQUALS, "value": "Finance"}]},
+            }))
+
+        scores = [r["relevance_score"] for r in search]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertTrue(all(score >= 0.5 for score in scores))
+        self.assertEqual(len(matches), 50)
+
+    def test_rate_limit_injection(self):
+        server = MockLightfeedServer(records=10, rate_limit_every=2).start()
+        try:
+            client = LightfeedClient({"apiKey": "test-api-key", "baseUrl": server.base_url})
+            client.get_records("db")
+            with self.assertRaises(LightfeedError) as context:
+                client.get_records("db")
+            self.assertEqual(context.exception.status, 429)
+        finally:
+            server.stop()
+
+    def test_run_scenario(self):
+        result = run_scenario("deep_pagination", self.server.base_url, 250, {})
+
+        self.assertEqual(result["records"], 250)
+        self.assertEqual(result["requests"], 3)
+        self.assertGreater(result["records_per_sec"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+"""
+Tests for the local response cache
+"""
+
+import json
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from lightfeed import LightfeedClient
+from lightfeed.cache import DISK_RESCAN_EVERY, DiskResponseCache, MemoryResponseCache, ResponseCache, cache_scope, canonical_key
+from lightfeed.models import Condition, Operator
+
+
+def make_response(record_id, padding=""):
+    """Builds a records response"""
+    return {
+        "results": [{"id": record_id, "data": {"padding": padding}}],
+        "pagination": {"limit": 100, "next_cursor": None, "has_more": False},
+    }
+
+
+def make_body(record_id, padding=""):
+    """Builds a serialized records response"""
+    return json.dumps(make_response(record_id, padding)).encode()
+
+
+class TestCanonicalKey(unittest.TestCase):
+    """Test cases for request keys"""
+
+    def test_enums_and_key_order(self):
+        """Test enum members and dict ordering do not change the key"""
+        with_enums = {
+            "filter": {
+                "condition": Condition.AND,
+                "rules": [{"column": "a", "operator": Operator.EQUALS, "value": 1}],
+            },
+            "pagination": {"limit": 10},
+        }
+        with_strings = {
+            "pagination": {"limit": 10},
+            "filter": {
+                "rules": [{"value": 1, "operator": "equals", "column": "a"}],
+                "condition": "AND",
+            },
+        }
+        self.assertEqual(canonical_key("filter", "db", with_enums), canonical_key("filter", "db", with_strings))
+
+    def test_distinguishes_requests(self):
+        """Test the endpoint, database and parameters are all part of the key"""
+        params = {"search": {"text": "a"}}
+        keys = {
+            canonical_key("search", "db", params),
+            canonical_key("filter", "db", params),
+            canonical_key("search", "other", params),
+            canonical_key("search", "db", {"search": {"text": "b"}}),
+            canonical_key("search", "db", params, cache_scope("other-key", "https://api.lightfeed.ai")),
+            canonical_key("search", "db", params, cache_scope("test-api-key", "http://localhost:8080")),
+        }
+        self.assertEqual(len(keys), 6)
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the cache base class"""
+
+    def test_storage_primitives_are_abstract(self):
+        """Test a backend must implement every storage primitive"""
+        with self.assertRaises(TypeError):
+            ResponseCache()
+
+        class Partial(ResponseCache):
+            def _load(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            Partial()
+
+
+class CacheTests:
+    """Behaviour shared by every cache backend"""
+
+    def make_cache(self, **kwargs):
+        raise NotImplementedError
+
+    def test_hit_and_miss_counters(self):
+        """Test hits return the stored body"""
+        cache = self.make_cache()
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", make_body(1))
+
+        self.assertEqual(cache.get("a"), make_body(1))
+        self.assertEqual(cache.get("a"), make_body(1))
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        now = [1000.0]
+        cache = self.make_cache(ttl=10, clock=lambda: now[0])
+        cache.set("a", make_body(1))
+        now[0] += 11
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when over the size budget"""
+        entry_size = len(make_body(1, "x" * 100)) + 20
+        cache = self.make_cache(max_bytes=int(entry_size * 2.5))
+        cache.set("a", make_body(1, "x" * 100))
+        cache.set("b", make_body(2, "x" * 100))
+        cache.get("a")
+        cache.set("c", make_body(3, "x" * 100))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+
+class TestMemoryResponseCache(CacheTests, unittest.TestCase):
+    """Test cases for the in-memory cache"""
+
+    def make_cache(self, **kwargs):
+        return MemoryResponseCache(**kwargs)
+
+
+class TestDiskResponseCache(CacheTests, unittest.TestCase):
+    """Test cases for the disk cache"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_cache(self, **kwargs):
+        return DiskResponseCache(self.directory.name, **kwargs)
+
+    def test_set_does_not_scan_the_directory(self):
+        """Test storing and evicting use the in-memory index"""
+        body = make_body(1, "x" * 100)
+        cache = self.make_cache(max_bytes=(len(body) + 20) * 3)
+        with patch("lightfeed.cache.os.listdir", side_effect=AssertionError("scanned")):
+            for index in range(DISK_RESCAN_EVERY - 1):
+                cache.set(str(index), body)
+                cache.get(str(index - 2))
+
+        with patch("lightfeed.cache.os.listdir", side_effect=AssertionError("scanned")):
+            self.assertIsNone(cache.get(str(DISK_RESCAN_EVERY - 5)))
+        self.assertEqual(cache.stats()["entries"], 3)
+
+    def test_entries_of_other_processes_are_picked_up(self):
+        """Test entries stored by another cache on the directory count towards the budget"""
+        first = self.make_cache()
+        second = self.make_cache()
+        second.set("a", make_body(1))
+
+        self.assertEqual(first.get("a"), make_body(1))
+        self.assertEqual(first.stats()["entries"], 1)
+        self.assertEqual(self.make_cache().stats()["bytes"], first.stats()["bytes"])
+
+
+class TestClientCache(unittest.TestCase):
+    """Test cases for caching in the client"""
+
+    @patch("requests.Session.request")
+    def test_cache_hits_skip_the_network(self, mock_request):
+        """Test identical search requests are served from the cache"""
+        mock_response = Mock()
+        mock_response.content = json.dumps(make_response(1)).encode()
+        mock_request.return_value = mock_response
+        client = LightfeedClient({"apiKey": "test-api-key", "cache": {"ttl": 30}})
+
+        first = client.search_records("test-db-id", {"search": {"text": "query", "threshold": 0.5}})
+        second = client.search_records("test-db-id", {"search": {"threshold": 0.5, "text": "query"}})
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_request.call_count, 1)
+        # Hits are decoded into a fresh copy
+        self.assertIsNot(first, second)
+        self.assertEqual(client.cache.stats()["hits"], 1)
+
+    @patch("requests.Session.request")
+    def test_clients_with_other_credentials_do_not_share_entries(self, mock_request):
+        """Test clients sharing a cache directory only hit their own entries"""
+        mock_response = Mock()
+        mock_response.content = json.dumps(make_response(1)).encode()
+        mock_request.return_value = mock_response
+        params = {"search": {"text": "query"}}
+        with tempfile.TemporaryDirectory() as directory:
+            configs = [
+                {"apiKey": "first-key"},
+                {"apiKey": "second-key"},
+                {"apiKey": "first-key", "baseUrl": "http://localhost:8080"},
+            ]
+            clients = [LightfeedClient(dict(config, cache={"directory": directory})) for config in configs]
+            for client in clients:
+                client.search_records("test-db-id", params)
+                self.assertEqual(client.cache.stats()["hits"], 0)
+            self.assertEqual(mock_request.call_count, 3)
+
+            # A client with the same credentials still reuses the entry
+            again = LightfeedClient({"apiKey": "first-key", "cache": {"directory": directory}})
+            again.search_records("test-db-id", params)
+            self.assertEqual(again.cache.stats()["hits"], 1)
+            self.assertEqual(mock_request.call_count, 3)
+
+    @patch("requests.Session.request")
+    def test_no_cache_by_default(self, mock_request):
+        """Test requests always hit the network without a cache config"""
+        mock_response = Mock()
+        mock_response.content = json.dumps(make_response(1)).encode()
+        mock_request.return_value = mock_response
+        client = LightfeedClient({"apiKey": "test-api-key"})
+
+        client.filter_records("test-db-id", {"filter": {"condition": Condition.AND, "rules": []}})
+        client.filter_records("test-db-id", {"filter": {"condition": Condition.AND, "rules": []}})
+
+        self.assertIsNone(client.cache)
+        self.assertEqual(mock_request.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
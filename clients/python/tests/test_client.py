@@ -37,7 +37,36 @@ class TestLightfeedClient(unittest.TestCase):
         self.assertEqual(custom_client.base_url, "https://custom-api.example.com")
         self.assertEqual(custom_client.timeout, 10.0)
 
-    @patch("requests.get")
+    def test_session_pool_configuration(self):
+        """Test the pooled session honours the connection pool settings"""
+        custom_adapter = requests.adapters.HTTPAdapter()
+        client = LightfeedClient({
+            "apiKey": "test-api-key",
+            "poolConnections": 4,
+            "poolMaxsize": 32,
+            "keepAlive": False,
+            "adapters": {"https://custom-api.example.com": custom_adapter}
+        })
+
+        session = client._get_session()
+        adapter = session.get_adapter("https://api.lightfeed.ai/v1")
+        self.assertEqual(adapter._pool_connections, 4)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertIs(session.get_adapter("https://custom-api.example.com/v1"), custom_adapter)
+        self.assertEqual(client.headers["Connection"], "close")
+
+        # The same session is reused across calls
+        self.assertIs(client._get_session(), session)
+
+    def test_context_manager_closes_session(self):
+        """Test the client releases its session when used as a context manager"""
+        with patch("requests.Session.close") as mock_close:
+            with LightfeedClient({"apiKey": "test-api-key"}) as client:
+                client._get_session()
+        mock_close.assert_called_once_with()
+        self.assertIsNone(client._session)
+
+    @patch("requests.Session.request")
     def test_get_records(self, mock_get):
         """Test the get_records method"""
         # Setup mock response
@@ -60,6 +89,7 @@ class TestLightfeedClient(unittest.TestCase):
                 "has_more": False
             }
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_get.return_value = mock_response
 
         # Call the method
@@ -71,10 +101,11 @@ class TestLightfeedClient(unittest.TestCase):
 
         # Verify the request
         mock_get.assert_called_once_with(
+            "GET",
             "https://api.lightfeed.ai/v1/databases/test-db-id/records",
             headers={
                 "x-api-key": "test-api-key",
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
             },
             params=params,
             timeout=30.0
@@ -83,7 +114,7 @@ class TestLightfeedClient(unittest.TestCase):
         # Verify the response
         self.assertEqual(result, mock_response.json.return_value)
 
-    @patch("requests.post")
+    @patch("requests.Session.request")
     def test_search_records(self, mock_post):
         """Test the search_records method"""
         # Setup mock response
@@ -107,6 +138,7 @@ class TestLightfeedClient(unittest.TestCase):
                 "has_more": False
             }
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_post.return_value = mock_response
 
         # Call the method
@@ -120,19 +152,20 @@ class TestLightfeedClient(unittest.TestCase):
 
         # Verify the request
         mock_post.assert_called_once_with(
+            "POST",
             "https://api.lightfeed.ai/v1/databases/test-db-id/records/search",
             headers={
                 "x-api-key": "test-api-key",
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
             },
-            json=params,
+            data=self.client.codec.dumps(params),
             timeout=30.0
         )
 
         # Verify the response
         self.assertEqual(result, mock_response.json.return_value)
 
-    @patch("requests.post")
+    @patch("requests.Session.request")
     def test_filter_records(self, mock_post):
         """Test the filter_records method"""
         # Setup mock response
@@ -155,6 +188,7 @@ class TestLightfeedClient(unittest.TestCase):
                 "has_more": False
             }
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_post.return_value = mock_response
 
         # Call the method
@@ -174,19 +208,20 @@ class TestLightfeedClient(unittest.TestCase):
 
         # Verify the request
         mock_post.assert_called_once_with(
+            "POST",
             "https://api.lightfeed.ai/v1/databases/test-db-id/records/filter",
             headers={
                 "x-api-key": "test-api-key",
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
             },
-            json=params,
+            data=self.client.codec.dumps(params),
             timeout=30.0
         )
 
         # Verify the response
         self.assertEqual(result, mock_response.json.return_value)
 
-    @patch("requests.get")
+    @patch("requests.Session.request")
     def test_error_handling(self, mock_get):
         """Test error handling"""
         # Create a RequestException with response attributes
@@ -211,7 +246,7 @@ class TestLightfeedClient(unittest.TestCase):
         self.assertEqual(context.exception.status, 401)
         self.assertEqual(context.exception.message, "Invalid API key")
         
-    @patch("requests.get")
+    @patch("requests.Session.request")
     def test_error_handling_with_unknown_status(self, mock_get):
         """Test error handling with an unknown status code"""
         # Create a RequestException with response attributes and an unexpected status code
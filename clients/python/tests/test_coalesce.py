@@ -0,0 +1,149 @@
+"""
+Tests for request coalescing
+"""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from lightfeed import LightfeedClient
+from lightfeed.coalesce import AsyncSingleFlight, SingleFlight
+from lightfeed.models import Condition, LightfeedError, Operator
+
+
+BODY = json.dumps({
+    "results": [{"id": 1, "data": {"name": "Acme"}}],
+    "pagination": {"limit": 100, "next_cursor": None, "has_more": False},
+}).encode()
+
+
+def run_concurrently(fn, count):
+    """Calls fn from count threads at once and returns the results"""
+    barrier = threading.Barrier(count)
+
+    def call(_):
+        barrier.wait()
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(call, range(count)))
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for the thread-safe single-flight group"""
+
+    def test_concurrent_calls_share_result(self):
+        """Test a stampede of identical calls runs the function once"""
+        group = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return "result"
+
+        results = run_concurrently(lambda: group.do("key", slow), 8)
+
+        self.assertEqual(results, ["result"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(group.in_flight(), 0)
+
+    def test_exception_is_shared_and_key_released(self):
+        """Test every waiter receives the exception and later calls run again"""
+        group = SingleFlight()
+
+        def failing():
+            time.sleep(0.1)
+            raise LightfeedError(429, "Too many requests")
+
+        def call():
+            try:
+                group.do("key", failing)
+            except LightfeedError as e:
+                return e.status
+
+        self.assertEqual(run_concurrently(call, 4), [429] * 4)
+        self.assertEqual(group.do("key", lambda: "fresh"), "fresh")
+
+    def test_different_keys_run_separately(self):
+        group = SingleFlight()
+        self.assertEqual(group.do("a", lambda: 1), 1)
+        self.assertEqual(group.do("b", lambda: 2), 2)
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the asyncio single-flight group"""
+
+    async def test_concurrent_calls_share_result(self):
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*[group.do("key", slow) for _ in range(5)])
+
+        self.assertEqual(results, ["result"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(group.in_flight(), 0)
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """Test cancelling one waiter leaves the shared call running"""
+        group = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.02)
+            return "result"
+
+        first = asyncio.ensure_future(group.do("key", slow))
+        second = asyncio.ensure_future(group.do("key", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, "result")
+
+
+class TestClientCoalescing(unittest.TestCase):
+    """Test cases for coalescing in the client"""
+
+    def slow_response(self, *args, **kwargs):
+        time.sleep(0.1)
+        return Mock(content=BODY)
+
+    @patch("requests.Session.request")
+    def test_identical_calls_send_one_request(self, mock_request):
+        """Test concurrent identical filters cost one API call with separate results"""
+        mock_request.side_effect = self.slow_response
+        client = LightfeedClient({"apiKey": "test-api-key"})
+        params = {
+            "filter": {
+                "condition": Condition.AND,
+                "rules": [{"column": "name", "operator": Operator.EQUALS, "value": "Acme"}],
+            }
+        }
+
+        results = run_concurrently(lambda: client.filter_records("test-db-id", params), 6)
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(results[0], json.loads(BODY))
+        # Every caller decodes its own copy
+        self.assertIsNot(results[0], results[1])
+
+    @patch("requests.Session.request")
+    def test_coalescing_can_be_disabled(self, mock_request):
+        mock_request.side_effect = self.slow_response
+        client = LightfeedClient({"apiKey": "test-api-key", "coalesceRequests": False})
+
+        run_concurrently(lambda: client.get_records("test-db-id", {"limit": 10}), 3)
+
+        self.assertEqual(mock_request.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
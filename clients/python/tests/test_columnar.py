@@ -0,0 +1,96 @@
+"""
+Tests for columnar record collection
+"""
+
+import math
+import unittest
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from lightfeed.columnar import ColumnarCollector, collect_columns
+
+
+RECORDS = [
+    {
+        "id": 1,
+        "data": {"name": "Acme", "employees": 10},
+        "timestamps": {
+            "created_at": "2024-01-01T00:00:00.000Z",
+            "changed_at": "2024-01-02T00:00:00.000Z",
+            "synced_at": "2024-01-03T00:00:00.500Z",
+        },
+        "relevance_score": 0.9,
+    },
+    {
+        "id": 2,
+        "data": {"name": "Globex", "id": "external-2"},
+        "timestamps": {
+            "created_at": "2024-02-01T00:00:00.000Z",
+            "changed_at": "2024-02-02T00:00:00.000Z",
+            "synced_at": "2024-02-03T00:00:00.000Z",
+        },
+    },
+]
+
+
+class TestColumnarCollector(unittest.TestCase):
+    """Test cases for the columnar collector"""
+
+    def test_dict_output(self):
+        """Test records become aligned plain columns"""
+        columns = collect_columns(iter(RECORDS), output="dict")
+
+        self.assertEqual(columns["id"], [1, 2])
+        self.assertEqual(columns["name"], ["Acme", "Globex"])
+        self.assertEqual(columns["employees"], [10, None])
+        # Data fields clashing with metadata columns are prefixed
+        self.assertEqual(columns["data.id"], [None, "external-2"])
+        self.assertEqual(columns["synced_at"][0], 1704240000500)
+        self.assertEqual(columns["relevance_score"][0], 0.9)
+        self.assertTrue(math.isnan(columns["relevance_score"][1]))
+
+    def test_incremental_pages(self):
+        """Test columns stay aligned across several added pages"""
+        collector = ColumnarCollector()
+        collector.add([RECORDS[1]]).add([RECORDS[0]])
+        columns = collector.to_dict()
+        self.assertEqual(columns["employees"], [None, 10])
+        self.assertEqual(columns["data.id"], ["external-2", None])
+
+    def test_invalid_output(self):
+        """Test unknown output formats are rejected"""
+        with self.assertRaises(ValueError):
+            collect_columns(RECORDS, output="csv")
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_pandas_output(self):
+        """Test the DataFrame has typed timestamp and score columns"""
+        frame = collect_columns(RECORDS, output="pandas")
+
+        self.assertEqual(list(frame["name"]), ["Acme", "Globex"])
+        self.assertEqual(str(frame["synced_at"].dtype), "datetime64[ms, UTC]")
+        self.assertEqual(frame["synced_at"][0], pandas.Timestamp("2024-01-03T00:00:00.500Z"))
+        self.assertEqual(frame["relevance_score"].dtype, "float64")
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_output(self):
+        """Test the Arrow table has typed columns and falls back to text for mixed types"""
+        records = RECORDS + [{"id": 3, "data": {"employees": "many"}, "timestamps": {}}]
+        table = collect_columns(records, output="arrow")
+
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(str(table.schema.field("created_at").type), "timestamp[ms, tz=UTC]")
+        self.assertEqual(table.column("employees").to_pylist(), ["10", None, "many"])
+        self.assertIsNone(table.column("created_at").to_pylist()[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
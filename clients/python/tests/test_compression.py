@@ -0,0 +1,161 @@
+"""
+Tests for compression negotiation and request body compression
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from benchmarks.mock_server import MockLightfeedServer
+from lightfeed import AsyncLightfeedClient, LightfeedClient
+from lightfeed import compression
+from lightfeed.compression import (
+    CompressionPolicy,
+    available_encodings,
+    compress,
+    decompress,
+    httpx_encodings,
+    requests_encodings,
+)
+from lightfeed.instrumentation import MetricsAggregator
+
+
+FILTER = {
+    "filter": {"rules": [{"column": "industry", "operator": "equals", "value": "Retail"}] * 40},
+    "pagination": {"limit": 200},
+}
+
+
+class TestCompressionPolicy(unittest.TestCase):
+    """Test cases for the compression policy"""
+
+    def test_auto_accepts_every_installed_encoding(self):
+        policy = CompressionPolicy()
+        self.assertEqual(policy.accept_encoding, ", ".join(available_encodings()))
+        self.assertIn("gzip", policy.accept_encoding)
+        self.assertIsNone(policy.request_encoding)
+
+    def test_explicit_accept_encoding(self):
+        self.assertEqual(CompressionPolicy({"acceptEncoding": ["gzip"]}).accept_encoding, "gzip")
+        self.assertEqual(CompressionPolicy({"acceptEncoding": "identity"}).accept_encoding, "identity")
+        with self.assertRaises(ValueError):
+            CompressionPolicy({"acceptEncoding": "lzma"})
+
+    def test_codings_the_transport_cannot_decode_are_not_advertised(self):
+        # As if zstandard were installed under a urllib3 without zstd support
+        with patch.dict(compression._MODULES, {"zstd": object()}):
+            self.assertIn("zstd", available_encodings())
+            policy = CompressionPolicy(None, lambda: ["gzip", "deflate"])
+            self.assertNotIn("zstd", policy.accept_encoding)
+            self.assertEqual(CompressionPolicy(None, lambda: ["zstd", "gzip"]).accept_encoding.split(", ")[0], "zstd")
+
+        explicit = CompressionPolicy({"acceptEncoding": ["deflate", "gzip"]}, lambda: ["gzip"])
+        self.assertEqual(explicit.accept_encoding, "gzip")
+        self.assertEqual(CompressionPolicy({"acceptEncoding": ["deflate"]}, lambda: []).accept_encoding, "identity")
+
+    def test_transport_encodings(self):
+        self.assertIn("gzip", requests_encodings())
+        if httpx is not None:
+            self.assertIn("gzip", httpx_encodings())
+            self.assertNotIn("identity", httpx_encodings())
+
+    def test_round_trip(self):
+        data = b'{"results": []}' * 100
+        for encoding in available_encodings():
+            with self.subTest(encoding=encoding):
+                self.assertEqual(decompress(compress(data, encoding), encoding), data)
+
+    def test_request_body_threshold(self):
+        policy = CompressionPolicy({"requestEncoding": "gzip", "minRequestBytes": 100})
+        small = b'{"a": 1}'
+        self.assertEqual(policy.compress(small), (small, None))
+
+        large = b'{"value": "aaaa"}' * 50
+        body, encoding = policy.compress(large)
+        self.assertEqual(encoding, "gzip")
+        self.assertEqual(decompress(body, "gzip"), large)
+
+    def test_incompressible_body_sent_as_is(self):
+        policy = CompressionPolicy({"requestEncoding": "gzip", "minRequestBytes": 0})
+        body = os.urandom(2000)
+        self.assertEqual(policy.compress(body), (body, None))
+
+
+class TestClientCompression(unittest.TestCase):
+    """Test cases for compressed transfers against a local server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockLightfeedServer(records=1000, compress=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def client(self, **config):
+        return LightfeedClient(dict({"apiKey": "test", "baseUrl": self.server.base_url}, **config))
+
+    def test_reports_wire_and_decoded_sizes(self):
+        metrics = MetricsAggregator()
+        with self.client(hooks=[metrics]) as client:
+            page = client.get_records("db", {"limit": 500})
+            stream = client.get_records_stream("db", {"limit": 500})
+            self.assertEqual(list(stream), page["results"])
+
+        series = metrics.snapshot()["records"]
+        self.assertLess(series["wire_bytes_in"] * 5, series["bytes_in"])
+
+    def test_session_advertises_what_urllib3_decodes(self):
+        with self.client() as client:
+            accept = client._get_session().headers["Accept-Encoding"]
+        self.assertEqual(accept, ", ".join(available_encodings(requests_encodings())))
+
+    def test_identity_disables_response_compression(self):
+        metrics = MetricsAggregator()
+        with self.client(hooks=[metrics], compression={"acceptEncoding": "identity"}) as client:
+            client.get_records("db", {"limit": 100})
+
+        series = metrics.snapshot()["records"]
+        self.assertEqual(series["wire_bytes_in"], series["bytes_in"])
+
+    def test_compressed_request_body(self):
+        metrics = MetricsAggregator()
+        with self.client(hooks=[metrics], compression={"requestEncoding": "gzip"}) as client:
+            compressed = client.filter_records("db", FILTER)
+        with self.client() as client:
+            plain = client.filter_records("db", FILTER)
+
+        self.assertEqual(compressed, plain)
+        self.assertEqual(self.server.request_encodings[-2:], ["gzip", "identity"])
+        series = metrics.snapshot()["filter"]
+        self.assertLess(series["wire_bytes_out"], series["bytes_out"])
+
+    @unittest.skipIf(httpx is None, "httpx is not installed")
+    def test_async_client(self):
+        import asyncio
+
+        async def run():
+            metrics = MetricsAggregator()
+            config = {
+                "apiKey": "test",
+                "baseUrl": self.server.base_url,
+                "hooks": [metrics],
+                "compression": {"requestEncoding": "gzip"},
+            }
+            async with AsyncLightfeedClient(config) as client:
+                page = await client.filter_records("db", FILTER)
+            return page, metrics.snapshot()["filter"]
+
+        page, series = asyncio.run(run())
+        self.assertEqual(len(page["results"]), 200)
+        self.assertEqual(self.server.request_encodings[-1], "gzip")
+        self.assertLess(series["wire_bytes_in"], series["bytes_in"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+"""
+Tests for the adaptive concurrency limit and the circuit breaker
+"""
+
+import pickle
+import threading
+import time
+import unittest
+
+from benchmarks.mock_server import MockLightfeedServer
+from lightfeed import LightfeedClient
+from lightfeed.concurrency import AdaptiveLimiter, CircuitBreaker, CircuitOpenError
+from lightfeed.models import LightfeedError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fill(limiter):
+    """Takes every slot of the limiter"""
+    return [limiter.acquire() for _ in range(limiter.limit)]
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    """Test cases for AdaptiveLimiter"""
+
+    def test_healthy_responses_raise_the_limit_additively(self):
+        limiter = AdaptiveLimiter({"initialLimit": 4})
+        tokens = fill(limiter)
+        # Keep every slot busy: each response is followed by new requests up to the limit
+        for _ in range(10):
+            limiter.release(tokens.pop(0), "search", 200, 0.01)
+            tokens += [limiter.acquire() for _ in range(limiter.limit - len(tokens))]
+
+        # About one slot per round of healthy responses: 4 + 5 responses reach 6 slots
+        self.assertEqual(limiter.limit, 6)
+        self.assertEqual(limiter.stats(), {"limit": 6, "in_flight": 6, "increases": 2, "decreases": 0})
+
+    def test_idle_client_keeps_its_limit(self):
+        limiter = AdaptiveLimiter({"initialLimit": 8})
+        for _ in range(50):
+            limiter.release(limiter.acquire(), "search", 200, 0.01)
+        self.assertEqual(limiter.limit, 8)
+
+    def test_overload_cuts_the_limit_once_per_round(self):
+        limiter = AdaptiveLimiter({"initialLimit": 16})
+        tokens = fill(limiter)
+        for token in tokens:
+            limiter.release(token, "search", 429)
+        self.assertEqual(limiter.limit, 8)
+
+        for status in (500, None):
+            with self.subTest(status=status):
+                before = limiter.limit
+                limiter.release(limiter.acquire(), "search", status)
+                self.assertEqual(limiter.limit, before // 2)
+        self.assertEqual(limiter.stats()["decreases"], 3)
+
+    def test_client_errors_do_not_cut_the_limit(self):
+        limiter = AdaptiveLimiter({"initialLimit": 4})
+        limiter.release(limiter.acquire(), "search", 404, 0.01)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_latency_spike_cuts_the_limit(self):
+        limiter = AdaptiveLimiter({"initialLimit": 4, "maxLimit": 4})
+        for _ in range(10):
+            limiter.release(limiter.acquire(), "search", 200, 0.01)
+        # Another endpoint's latencies are judged on their own
+        for _ in range(10):
+            limiter.release(limiter.acquire(), "records", 200, 0.05)
+        self.assertEqual(limiter.limit, 4)
+
+        limiter.release(limiter.acquire(), "search", 200, 0.05)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_limit_stays_within_bounds(self):
+        limiter = AdaptiveLimiter({"initialLimit": 3, "minLimit": 2, "maxLimit": 4})
+        for _ in range(5):
+            limiter.release(limiter.acquire(), "search", 500)
+        self.assertEqual(limiter.limit, 2)
+
+        for _ in range(40):
+            for token in fill(limiter):
+                limiter.release(token, "search", 200, 0.01)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_acquire_blocks_at_the_limit(self):
+        limiter = AdaptiveLimiter({"initialLimit": 1})
+        token = limiter.acquire()
+        acquired = threading.Event()
+
+        def second():
+            limiter.release(limiter.acquire(), "search", 200, 0.01)
+            acquired.set()
+
+        threading.Thread(target=second, daemon=True).start()
+        self.assertFalse(acquired.wait(0.1))
+        limiter.release(token, "search", 200, 0.01)
+        self.assertTrue(acquired.wait(1.0))
+
+    def test_abandoned_slot_keeps_the_limit(self):
+        limiter = AdaptiveLimiter({"initialLimit": 1})
+        limiter.abandon(limiter.acquire())
+        self.assertEqual(limiter.stats(), {"limit": 1, "in_flight": 0, "increases": 0, "decreases": 0})
+
+    def test_rejects_invalid_config(self):
+        for config in ({"minLimit": 5, "maxLimit": 2}, {"backoffRatio": 1.5}):
+            with self.subTest(config=config):
+                with self.assertRaises(ValueError):
+                    AdaptiveLimiter(config)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker({"failureThreshold": 3, "resetTimeout": 5.0}, clock=self.clock)
+
+    def fail(self, times, endpoint="search", database_id="db"):
+        for _ in range(times):
+            self.breaker.record(endpoint, database_id, 500)
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+        self.breaker.check("search", "db")
+
+        self.fail(1)
+        with self.assertRaises(CircuitOpenError) as context:
+            self.breaker.check("search", "db")
+        self.assertAlmostEqual(context.exception.retry_after, 5.0)
+        self.assertIsInstance(context.exception, LightfeedError)
+        self.assertEqual(self.breaker.states(), {"search/db": "open"})
+
+    def test_circuits_are_per_endpoint_and_database(self):
+        self.fail(3)
+        self.breaker.check("search", "other-db")
+        self.breaker.check("filter", "db")
+
+    def test_success_resets_the_failure_count(self):
+        self.fail(2)
+        self.breaker.record("search", "db", 200)
+        self.fail(2)
+        self.breaker.check("search", "db")
+
+    def test_client_errors_and_rate_limits_are_not_failures(self):
+        for status in (400, 404, 429):
+            self.breaker.record("search", "db", status)
+            self.breaker.record("search", "db", status)
+            self.breaker.record("search", "db", status)
+        self.breaker.check("search", "db")
+        self.fail(3, database_id="db-2")
+        self.breaker.record("search", "db-2", None)
+        self.assertEqual(self.breaker.states()["search/db-2"], "open")
+
+    def test_one_trial_request_after_the_reset_timeout(self):
+        self.fail(3)
+        self.clock.now = 5.0
+        self.breaker.check("search", "db")
+        self.assertEqual(self.breaker.states(), {"search/db": "half_open"})
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.check("search", "db")
+
+        self.breaker.record("search", "db", 200)
+        self.breaker.check("search", "db")
+        self.assertEqual(self.breaker.states(), {"search/db": "closed"})
+
+    def test_failed_trial_reopens_the_circuit(self):
+        self.fail(3)
+        self.clock.now = 5.0
+        self.breaker.check("search", "db")
+        self.fail(1)
+
+        self.clock.now = 9.0
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.check("search", "db")
+        self.clock.now = 10.0
+        self.breaker.check("search", "db")
+
+    def test_abandoned_request_is_not_an_outcome(self):
+        self.fail(2)
+        self.breaker.abandon("search", "db")
+        self.fail(1)
+        self.assertEqual(self.breaker.states(), {"search/db": "open"})
+
+        # An abandoned trial lets the next caller try instead
+        self.clock.now = 5.0
+        self.breaker.check("search", "db")
+        self.breaker.abandon("search", "db")
+        self.breaker.check("search", "db")
+        self.assertEqual(self.breaker.states(), {"search/db": "half_open"})
+
+    def test_error_pickles(self):
+        error = pickle.loads(pickle.dumps(CircuitOpenError("search", "db", 2.5)))
+        self.assertEqual((error.endpoint, error.database_id, error.retry_after), ("search", "db", 2.5))
+        self.assertEqual(error.status, 500)
+
+
+class TestClientConcurrency(unittest.TestCase):
+    """Test cases running clients with adaptive concurrency and circuit breaking"""
+
+    def test_limit_adapts_to_server_capacity(self):
+        server = MockLightfeedServer(records=200, payload_size=10, latency=0.02, capacity=3).start()
+        try:
+            client = LightfeedClient({
+                "apiKey": "test-api-key",
+                "baseUrl": server.base_url,
+                "retry": {"maxRetries": 8, "backoffFactor": 0.01},
+                "adaptiveConcurrency": {"initialLimit": 16},
+            })
+            queries = [{"search": {"text": f"query {i}"}, "pagination": {"limit": 5}} for i in range(60)]
+            results = client.search_many("db", queries, max_workers=16)
+
+            self.assertTrue(all(result.error is None for result in results))
+            stats = client.concurrency.stats()
+            self.assertGreater(stats["decreases"], 0)
+            self.assertLessEqual(stats["limit"], 8)
+            self.assertEqual(stats["in_flight"], 0)
+            client.close()
+        finally:
+            server.stop()
+
+    def test_open_circuit_fails_fast(self):
+        # Nothing listens on port 1, so every request fails to connect
+        client = LightfeedClient({
+            "apiKey": "test-api-key",
+            "baseUrl": "http://127.0.0.1:1",
+            "circuitBreaker": {"failureThreshold": 2, "resetTimeout": 60},
+        })
+        params = {"filter": {"condition": "AND", "rules": []}}
+        for _ in range(2):
+            with self.assertRaises(LightfeedError) as context:
+                client.filter_records("db", params)
+            self.assertNotIsInstance(context.exception, CircuitOpenError)
+
+        started = time.perf_counter()
+        with self.assertRaises(CircuitOpenError):
+            client.filter_records("db", params)
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual(client.circuit_breaker.states(), {"filter/db": "open"})
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
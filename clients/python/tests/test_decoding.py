@@ -0,0 +1,101 @@
+"""
+Tests for the pluggable JSON codecs
+"""
+
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+from lightfeed import LightfeedClient
+from lightfeed.decoding import TypedRecord, available_backends, get_codec
+from lightfeed.models import Condition, LightfeedError, Operator
+
+
+BODY = json.dumps({
+    "results": [
+        {
+            "id": 1,
+            "data": {"name": "Acme", "tags": ["ai"]},
+            "timestamps": {
+                "created_at": "2024-01-01T00:00:00.000Z",
+                "changed_at": "2024-01-02T00:00:00.000Z",
+                "synced_at": "2024-01-03T00:00:00.000Z",
+            },
+            "relevance_score": 0.75,
+        }
+    ],
+    "pagination": {"limit": 100, "next_cursor": "2024-01-03T00:00:00.000Z_1", "has_more": True},
+}).encode()
+
+
+class TestCodecs(unittest.TestCase):
+    """Test cases run against every installed backend"""
+
+    def test_round_trip(self):
+        """Test every backend decodes to the same dicts and encodes enums by value"""
+        params = {
+            "filter": {
+                "condition": Condition.OR,
+                "rules": [{"column": "name", "operator": Operator.STARTS_WITH, "value": "Ac"}],
+            }
+        }
+        for backend in available_backends():
+            with self.subTest(backend=backend):
+                codec = get_codec(backend)
+                self.assertEqual(codec.decode_response(BODY), json.loads(BODY))
+                self.assertEqual(
+                    json.loads(codec.dumps(params)),
+                    {"filter": {"condition": "OR", "rules": [{"column": "name", "operator": "starts_with", "value": "Ac"}]}},
+                )
+
+    def test_typed_decoding(self):
+        """Test typed responses expose attributes and dict-style reads"""
+        for backend in available_backends(typed=True):
+            with self.subTest(backend=backend):
+                page = get_codec(backend, typed=True).decode_response(BODY)
+                record = page.results[0]
+
+                self.assertIsInstance(record, TypedRecord)
+                self.assertFalse(hasattr(record, "__dict__"))
+                self.assertEqual(record.timestamps.synced_at, "2024-01-03T00:00:00.000Z")
+                self.assertEqual(record["data"]["name"], "Acme")
+                self.assertEqual(page["pagination"].get("next_cursor"), "2024-01-03T00:00:00.000Z_1")
+                self.assertIsNone(page.results[0].get("missing"))
+
+    def test_auto_prefers_installed_backend(self):
+        """Test auto selection returns an installed backend"""
+        self.assertIn(get_codec("auto").name, available_backends())
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
+
+
+class TestClientDecoding(unittest.TestCase):
+    """Test cases for decoding in the client"""
+
+    @patch("requests.Session.request")
+    def test_invalid_body(self, mock_request):
+        """Test malformed bodies surface as LightfeedError"""
+        mock_request.return_value = Mock(content=b"<html>bad gateway</html>")
+        client = LightfeedClient({"apiKey": "test-api-key", "jsonBackend": "json"})
+
+        with self.assertRaises(LightfeedError) as context:
+            client.get_records("test-db-id")
+
+        self.assertEqual(context.exception.status, 500)
+
+    @patch("requests.Session.request")
+    def test_typed_responses_with_iterators(self, mock_request):
+        """Test typed responses work with the pagination helpers"""
+        last_page = json.loads(BODY)
+        last_page["pagination"] = {"limit": 100, "next_cursor": None, "has_more": False}
+        mock_request.side_effect = [Mock(content=BODY), Mock(content=json.dumps(last_page).encode())]
+        client = LightfeedClient({"apiKey": "test-api-key", "typedResponses": True})
+
+        records = list(client.iter_records("test-db-id", prefetch=0))
+
+        self.assertEqual([r.id for r in records], [1, 1])
+        self.assertEqual(mock_request.call_args_list[1][1]["params"]["cursor"], "2024-01-03T00:00:00.000Z_1")
+
+
+if __name__ == "__main__":
+    unittest.main()
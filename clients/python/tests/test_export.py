@@ -0,0 +1,128 @@
+"""
+Tests for the time-sliced parallel exporter
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from lightfeed import LightfeedClient
+from lightfeed.export import TimeSlicedExporter, _BoundaryDedupe, _order_key, _Task, format_timestamp, parse_timestamp, split_range
+
+from fakes import FakeRecordsApi, timestamps
+
+
+class TestTimeHelpers(unittest.TestCase):
+    """Test cases for timestamp helpers"""
+
+    def test_round_trip(self):
+        """Test API timestamps round trip through parse and format"""
+        self.assertEqual(format_timestamp(parse_timestamp("2025-03-11T19:59:49.150Z")), "2025-03-11T19:59:49.150Z")
+
+    def test_split_range(self):
+        """Test ranges are split into contiguous slices"""
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        slices = split_range(start, start + timedelta(hours=4), 4)
+        self.assertEqual(len(slices), 4)
+        self.assertEqual(slices[0][0], start)
+        self.assertEqual(slices[-1][1], start + timedelta(hours=4))
+        for (_, end), (next_start, _) in zip(slices, slices[1:]):
+            self.assertEqual(end, next_start)
+
+
+class TestTimeSlicedExporter(unittest.TestCase):
+    """Test cases for the exporter"""
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def test_exports_every_record_once(self):
+        """Test all records are returned exactly once, including slice boundaries"""
+        api = FakeRecordsApi(timestamps(self.start, 200, timedelta(minutes=1)))
+        exporter = TimeSlicedExporter(api, "db", slices=5, max_workers=4, limit=7)
+
+        records = list(exporter.export("2024-01-01T00:00:00.000Z", "2024-01-02T00:00:00.000Z"))
+
+        self.assertEqual(sorted(r["id"] for r in records), list(range(200)))
+
+    def test_ordered_export(self):
+        """Test ordered exports come back in synced_at order"""
+        api = FakeRecordsApi(timestamps(self.start, 120, timedelta(seconds=30)))
+        exporter = TimeSlicedExporter(api, "db", slices=3, limit=10)
+
+        records = list(exporter.export("2024-01-01T00:00:00.000Z", "2024-01-01T01:00:00.000Z", ordered=True))
+
+        self.assertEqual([r["id"] for r in records], list(range(120)))
+
+    def test_dense_slice_is_resplit(self):
+        """Test a slice holding most of the data is re-split into more slices"""
+        # Nearly all records sit in the last hour of a one-day range
+        sparse = timestamps(self.start, 4, timedelta(hours=5))
+        dense = timestamps(self.start + timedelta(hours=23), 300, timedelta(seconds=10))
+        api = FakeRecordsApi(sparse + dense)
+        exporter = TimeSlicedExporter(api, "db", slices=4, limit=10, pages_per_task=2)
+        tasks_run = []
+        original_run_task = exporter._run_task
+
+        def run_task(task):
+            tasks_run.append(task)
+            return original_run_task(task)
+
+        exporter._run_task = run_task
+        records = list(exporter.export("2024-01-01T00:00:00.000Z", "2024-01-02T00:00:00.000Z"))
+
+        self.assertEqual(sorted(r["id"] for r in records), list(range(304)))
+        # The initial four slices plus re-split children
+        self.assertGreater(len([t for t in tasks_run if t.cursor is None]), 4)
+
+    def test_records_sharing_a_timestamp_across_resplits(self):
+        """Test records synced at the instant a remainder starts from are returned once"""
+        # Five records per timestamp, so every page ends inside a group
+        shared = [ts for ts in timestamps(self.start, 60, timedelta(seconds=7)) for _ in range(5)]
+        api = FakeRecordsApi(shared)
+        exporter = TimeSlicedExporter(api, "db", slices=2, limit=3, pages_per_task=1, min_slice=timedelta(0))
+
+        for ordered in (False, True):
+            with self.subTest(ordered=ordered):
+                records = list(exporter.export("2024-01-01T00:00:00.000Z", "2024-01-01T00:10:00.000Z", ordered=ordered))
+                self.assertEqual(sorted(r["id"] for r in records), list(range(300)))
+
+    def test_only_boundary_records_are_remembered(self):
+        """Test deduplication keeps the ids of boundary records only"""
+        dedupe = _BoundaryDedupe([_Task(self.start, self.start + timedelta(hours=1))])
+        inside = {"id": 1, "timestamps": {"synced_at": "2024-01-01T00:30:00.000Z"}}
+        boundary = {"id": 2, "timestamps": {"synced_at": "2024-01-01T01:00:00.000Z"}}
+
+        self.assertFalse(dedupe.is_repeat(inside))
+        self.assertFalse(dedupe.is_repeat(inside))
+        self.assertFalse(dedupe.is_repeat(boundary))
+        self.assertTrue(dedupe.is_repeat(boundary))
+        self.assertEqual(dedupe.seen, {2})
+
+    def test_remaining_range_is_after_the_last_record(self):
+        """Test the unfetched part of a slice follows the ascending page order"""
+        exporter = TimeSlicedExporter(FakeRecordsApi([]), "db")
+        task = _Task(self.start, self.start + timedelta(hours=1))
+        records = [{"id": i, "timestamps": {"synced_at": ts}} for i, ts in enumerate(timestamps(self.start, 3, timedelta(minutes=5)))]
+
+        self.assertEqual(exporter._remaining_range(task, records), (self.start + timedelta(minutes=10), task.end))
+        self.assertIsNone(exporter._remaining_range(task, records[:1]))
+        self.assertIsNone(exporter._remaining_range(task, []))
+
+    def test_records_without_an_id_sort_first(self):
+        """Test the sort key accepts records without an id"""
+        synced = {"synced_at": "2024-01-01T00:00:00.000Z"}
+        records = [{"id": 3, "timestamps": synced}, {"id": None, "timestamps": synced}, {"timestamps": synced}]
+        self.assertEqual([r.get("id") for r in sorted(records, key=_order_key)], [None, None, 3])
+
+    def test_client_export_records(self):
+        """Test the client entry point delegates to the exporter"""
+        api = FakeRecordsApi(timestamps(self.start, 50, timedelta(minutes=1)))
+        client = LightfeedClient({"apiKey": "test-api-key"})
+        client.get_records = api.get_records
+
+        records = list(client.export_records("db", "2024-01-01T00:00:00.000Z", "2024-01-01T02:00:00.000Z", slices=2, limit=20))
+
+        self.assertEqual(len(records), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
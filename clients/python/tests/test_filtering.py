@@ -0,0 +1,167 @@
+"""
+Conformance tests for the client-side filter evaluator
+"""
+
+import unittest
+
+from lightfeed.filtering import apply_filter, compile_filter
+from lightfeed.models import Condition, Operator
+
+
+def rule(column, operator, value=None):
+    return {"column": column, "operator": operator, "value": value}
+
+
+def record(**data):
+    return {"id": 1, "data": data}
+
+
+# (operator, rule value, record value, expected); None as record value means null
+CONFORMANCE_CASES = [
+    # equals / not_equals
+    (Operator.EQUALS, "Technology", "Technology", True),
+    (Operator.EQUALS, "Technology", "technology", False),
+    (Operator.EQUALS, 2021, 2021, True),
+    (Operator.EQUALS, 2021, "2021", True),
+    (Operator.EQUALS, "2021", 2021.0, True),
+    (Operator.EQUALS, 2021, 2022, False),
+    (Operator.EQUALS, True, True, True),
+    (Operator.EQUALS, "x", None, False),
+    (Operator.NOT_EQUALS, "Technology", "Finance", True),
+    (Operator.NOT_EQUALS, "Technology", "Technology", False),
+    (Operator.NOT_EQUALS, 5, "5", False),
+    (Operator.NOT_EQUALS, "x", None, False),
+    # ordering
+    (Operator.GREATER_THAN, 10, 11, True),
+    (Operator.GREATER_THAN, 10, 10, False),
+    (Operator.GREATER_THAN, 10, "11.5", True),
+    (Operator.GREATER_THAN, 10, "abc", False),
+    (Operator.GREATER_THAN, "2024-01-01", "2024-06-01", True),
+    (Operator.GREATER_THAN, 10, None, False),
+    (Operator.LESS_THAN, 10, 9, True),
+    (Operator.LESS_THAN, 10, 10, False),
+    (Operator.LESS_THAN, "2024-01-01", "2023-12-31", True),
+    (Operator.GREATER_THAN_OR_EQUALS, 10, 10, True),
+    (Operator.GREATER_THAN_OR_EQUALS, 10, 9.99, False),
+    (Operator.LESS_THAN_OR_EQUALS, 10, 10, True),
+    (Operator.LESS_THAN_OR_EQUALS, 10, 10.01, False),
+    # substring operators (case insensitive)
+    (Operator.CONTAINS, "ai", "Applied AI Labs", True),
+    (Operator.CONTAINS, "ml", "Applied AI Labs", False),
+    (Operator.CONTAINS, "python", ["Python", "Go"], True),
+    (Operator.CONTAINS, "pyth", ["Python", "Go"], False),
+    (Operator.CONTAINS, "ai", None, False),
+    (Operator.NOT_CONTAINS, "ml", "Applied AI Labs", True),
+    (Operator.NOT_CONTAINS, "AI", "Applied ai Labs", False),
+    (Operator.NOT_CONTAINS, "rust", ["Python", "Go"], True),
+    (Operator.NOT_CONTAINS, "ai", None, False),
+    (Operator.STARTS_WITH, "app", "Applied AI", True),
+    (Operator.STARTS_WITH, "ai", "Applied AI", False),
+    (Operator.ENDS_WITH, "labs", "Applied AI Labs", True),
+    (Operator.ENDS_WITH, "applied", "Applied AI Labs", False),
+    (Operator.STARTS_WITH, "1", 123, True),
+    # emptiness
+    (Operator.IS_EMPTY, None, None, True),
+    (Operator.IS_EMPTY, None, "", True),
+    (Operator.IS_EMPTY, None, "  ", True),
+    (Operator.IS_EMPTY, None, [], True),
+    (Operator.IS_EMPTY, None, {}, True),
+    (Operator.IS_EMPTY, None, 0, False),
+    (Operator.IS_EMPTY, None, "x", False),
+    (Operator.IS_NOT_EMPTY, None, "x", True),
+    (Operator.IS_NOT_EMPTY, None, 0, True),
+    (Operator.IS_NOT_EMPTY, None, None, False),
+    (Operator.IS_NOT_EMPTY, None, [], False),
+]
+
+
+class TestOperatorConformance(unittest.TestCase):
+    """Every operator is checked against the documented semantics"""
+
+    def test_cases(self):
+        for operator, value, actual, expected in CONFORMANCE_CASES:
+            with self.subTest(operator=operator.value, value=value, actual=actual):
+                predicate = compile_filter({"condition": Condition.AND, "rules": [rule("col", operator, value)]})
+                self.assertEqual(predicate(record(col=actual)), expected)
+
+    def test_every_operator_is_covered(self):
+        covered = {case[0] for case in CONFORMANCE_CASES}
+        self.assertEqual(covered, set(Operator))
+
+    def test_missing_column(self):
+        """Test a missing column behaves like null"""
+        for operator in Operator:
+            with self.subTest(operator=operator.value):
+                predicate = compile_filter({"condition": Condition.AND, "rules": [rule("col", operator, "x")]})
+                self.assertEqual(predicate(record()), operator == Operator.IS_EMPTY)
+
+    def test_string_operators_accept_plain_strings(self):
+        """Test operators and conditions given as plain strings"""
+        predicate = compile_filter({"condition": "OR", "rules": [rule("col", "equals", "a")]})
+        self.assertTrue(predicate(record(col="a")))
+
+    def test_case_sensitive_option(self):
+        predicate = compile_filter(
+            {"condition": Condition.AND, "rules": [rule("col", Operator.CONTAINS, "AI")]},
+            case_sensitive=True,
+        )
+        self.assertTrue(predicate(record(col="Applied AI")))
+        self.assertFalse(predicate(record(col="applied ai")))
+
+
+class TestGroups(unittest.TestCase):
+    """Test cases for nested rule groups"""
+
+    def test_nested_groups(self):
+        """Test AND/OR nesting"""
+        expression = {
+            "condition": Condition.AND,
+            "rules": [
+                rule("industry", Operator.EQUALS, "Technology"),
+                {
+                    "condition": Condition.OR,
+                    "rules": [
+                        rule("employees", Operator.GREATER_THAN, 100),
+                        rule("name", Operator.CONTAINS, "ai"),
+                    ],
+                },
+            ],
+        }
+        records = [
+            record(industry="Technology", employees=500, name="Globex"),
+            record(industry="Technology", employees=5, name="OpenAI"),
+            record(industry="Technology", employees=5, name="Initech"),
+            record(industry="Finance", employees=500, name="Acme AI"),
+        ]
+        matches = list(apply_filter(records, expression))
+        self.assertEqual([r["data"]["name"] for r in matches], ["Globex", "OpenAI"])
+
+    def test_short_circuit(self):
+        """Test groups stop evaluating once the outcome is known"""
+        class Exploding(dict):
+            def get(self, key, default=None):
+                if key == "boom":
+                    raise AssertionError("evaluated after short-circuit")
+                return super().get(key, default)
+
+        and_group = {"condition": Condition.AND, "rules": [rule("a", Operator.EQUALS, 1), rule("boom", Operator.EQUALS, 1)]}
+        or_group = {"condition": Condition.OR, "rules": [rule("a", Operator.EQUALS, 2), rule("boom", Operator.EQUALS, 1)]}
+        data = Exploding(a=2)
+        self.assertFalse(compile_filter(and_group)({"data": data}))
+        self.assertTrue(compile_filter(or_group)({"data": data}))
+
+    def test_empty_and_default_groups(self):
+        """Test empty groups match everything and groups default to AND"""
+        self.assertTrue(compile_filter({"condition": Condition.OR, "rules": []})(record()))
+        default_and = compile_filter({"rules": [rule("a", Operator.EQUALS, 1), rule("b", Operator.EQUALS, 2)]})
+        self.assertFalse(default_and(record(a=1, b=3)))
+
+    def test_invalid_expressions(self):
+        with self.assertRaises(ValueError):
+            compile_filter({"condition": "XOR", "rules": []})
+        with self.assertRaises(ValueError):
+            compile_filter({"condition": Condition.AND, "rules": [rule("a", "matches", "x")]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+"""
+Tests for request hedging
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from benchmarks.mock_server import MockLightfeedServer
+from lightfeed import LightfeedClient
+from lightfeed.hedging import CancelToken, HedgeCancelled, HedgingPolicy
+from lightfeed.instrumentation import MetricsAggregator, RequestEvent, RequestHooks
+from lightfeed.models import LightfeedError
+
+
+def warmed_policy(**config):
+    policy = HedgingPolicy(dict({"minSamples": 5, "maxRatio": 1.0, "minDelay": 0.0}, **config))
+    for _ in range(10):
+        policy.observe("search", 0.02)
+    return policy
+
+
+def sleeper(primary_seconds, hedge_seconds, calls=None):
+    """An attempt taking a different time for the original and the duplicate"""
+    def attempt(hedge, token):
+        if calls is not None:
+            calls.append((hedge, token))
+        deadline = time.perf_counter() + (hedge_seconds if hedge else primary_seconds)
+        while time.perf_counter() < deadline:
+            if token.cancelled:
+                raise HedgeCancelled()
+            time.sleep(0.005)
+        return "hedge" if hedge else "primary"
+    return attempt
+
+
+class TestHedgingPolicy(unittest.TestCase):
+    """Test cases for HedgingPolicy"""
+
+    def test_delay_follows_the_latency_percentile(self):
+        policy = HedgingPolicy({"minSamples": 10, "percentile": 90, "minDelay": 0.0})
+        for i in range(9):
+            policy.observe("search", i / 100)
+        self.assertIsNone(policy.delay("search"))
+
+        policy.observe("search", 0.09)
+        self.assertAlmostEqual(policy.delay("search"), 0.09)
+        self.assertIsNone(policy.delay("filter"))
+
+    def test_min_delay_is_a_floor(self):
+        policy = warmed_policy(minDelay=0.5)
+        self.assertEqual(policy.delay("search"), 0.5)
+
+    def test_without_latencies_the_caller_runs_the_attempt(self):
+        policy = HedgingPolicy({})
+        threads = []
+
+        def attempt(hedge, token):
+            threads.append(threading.current_thread())
+            return hedge
+
+        self.assertFalse(policy.run("search", attempt))
+        self.assertEqual(threads, [threading.current_thread()])
+        self.assertEqual(policy.stats()["hedges"], 0)
+
+    def test_fast_requests_are_not_hedged(self):
+        policy = warmed_policy()
+        calls = []
+
+        self.assertEqual(policy.run("search", sleeper(0.0, 0.0, calls)), "primary")
+        self.assertEqual([hedge for hedge, _ in calls], [False])
+
+    def test_slow_request_is_hedged_and_the_loser_cancelled(self):
+        policy = warmed_policy()
+        calls = []
+
+        started = time.perf_counter()
+        result = policy.run("search", sleeper(2.0, 0.0, calls))
+
+        self.assertEqual(result, "hedge")
+        self.assertLess(time.perf_counter() - started, 1.0)
+        primary_token = calls[0][1]
+        self.assertTrue(primary_token.cancelled)
+        stats = policy.stats()
+        self.assertEqual((stats["requests"], stats["hedges"], stats["hedges_won"]), (1, 1, 1))
+
+    def test_original_runs_on_the_callers_thread(self):
+        policy = warmed_policy()
+        threads = {}
+
+        def attempt(hedge, token):
+            threads[hedge] = threading.current_thread()
+            return sleeper(2.0, 0.0)(hedge, token)
+
+        self.assertEqual(policy.run("search", attempt), "hedge")
+        self.assertIs(threads[False], threading.current_thread())
+        self.assertIsNot(threads[True], threading.current_thread())
+
+    def test_busy_pool_does_not_delay_the_original(self):
+        policy = warmed_policy(maxRatio=0.0)
+        policy.max_workers = 2
+        release = threading.Event()
+        for _ in range(2):
+            policy._get_executor().submit(release.wait)
+        try:
+            started = time.perf_counter()
+            self.assertEqual(policy.run("search", sleeper(0.0, 0.0)), "primary")
+            self.assertLess(time.perf_counter() - started, 0.5)
+        finally:
+            release.set()
+            policy.close()
+
+    def test_requests_that_are_not_hedged_take_no_pool_thread(self):
+        policy = warmed_policy(minDelay=0.05)
+        threads = [threading.Thread(target=policy.run, args=("search", sleeper(0.0, 0.0))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIsNone(policy._executor)
+        self.assertEqual(policy.stats()["hedges"], 0)
+        policy.close()
+
+    def test_budget_caps_hedges(self):
+        policy = warmed_policy(maxRatio=0.0)
+        calls = []
+
+        self.assertEqual(policy.run("search", sleeper(0.1, 0.0, calls)), "primary")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(policy.stats()["hedges"], 0)
+
+    def test_failed_attempt_falls_back_to_the_other(self):
+        policy = warmed_policy()
+
+        def attempt(hedge, token):
+            if not hedge:
+                time.sleep(0.1)
+                raise LightfeedError(500, "primary failed")
+            time.sleep(0.15)
+            return "hedge"
+
+        self.assertEqual(policy.run("search", attempt), "hedge")
+
+    def test_primary_error_when_both_fail(self):
+        policy = warmed_policy()
+
+        def attempt(hedge, token):
+            time.sleep(0.1)
+            raise LightfeedError(500 if not hedge else 429, "failed")
+
+        with self.assertRaises(LightfeedError) as context:
+            policy.run("search", attempt)
+        self.assertEqual(context.exception.status, 500)
+
+
+class TestClientHedging(unittest.TestCase):
+    """Test cases running a hedging client against the mock server"""
+
+    def test_slow_search_is_answered_by_the_duplicate(self):
+        metrics = MetricsAggregator()
+        server = MockLightfeedServer(records=50, payload_size=10, slow_every=25, slow_latency=1.0).start()
+        try:
+            client = LightfeedClient({
+                "apiKey": "test-api-key",
+                "baseUrl": server.base_url,
+                "hedging": {"minSamples": 5, "maxRatio": 1.0},
+                "hooks": [metrics],
+            })
+            params = {"search": {"text": "ai", "threshold": 0.0}}
+            expected = [client.search_records("db", params) for _ in range(24)][-1]
+
+            started = time.perf_counter()
+            response = client.search_records("db", params)
+            elapsed = time.perf_counter() - started
+
+            self.assertLess(elapsed, 0.8)
+            self.assertEqual(response, expected)
+            stats = client.hedging.stats()
+            self.assertEqual((stats["hedges"], stats["hedges_won"]), (1, 1))
+
+            # The abandoned attempt was interrupted while waiting for its headers
+            series = metrics.snapshot()["search"]
+            self.assertEqual(series["hedges"], 1)
+            self.assertEqual(series["cancelled"], 1)
+            self.assertEqual(series["errors"], 0)
+            client.close()
+        finally:
+            server.stop()
+
+    def test_cancelled_attempt_sends_no_retry(self):
+        class CancelOnError(RequestHooks):
+            def __init__(self):
+                self.starts = 0
+
+            def on_request_start(self, event):
+                self.starts += 1
+
+            def on_error(self, event):
+                token.cancel()
+
+        # Nothing listens on port 1, so every attempt fails to connect
+        hooks = CancelOnError()
+        client = LightfeedClient({
+            "apiKey": "test-api-key",
+            "baseUrl": "http://127.0.0.1:1",
+            "retry": {"maxRetries": 5, "backoffFactor": 30, "maxBackoff": 30},
+            "hedging": {},
+            "hooks": [hooks],
+        })
+        token = CancelToken()
+        event = RequestEvent("search", "db", "POST", "http://127.0.0.1:1/v1/databases/db/records/search")
+        with patch.object(client.retry_policy._rng, "uniform", return_value=30.0):
+            started = time.perf_counter()
+            with self.assertRaises(HedgeCancelled):
+                client._open(event, stream=True, token=token, data=b"{}")
+        # The backoff sleep is cut short and no retry is sent
+        self.assertLess(time.perf_counter() - started, 5.0)
+        self.assertEqual(hooks.starts, 1)
+
+        with self.assertRaises(HedgeCancelled):
+            client._open(event.retry(), stream=True, token=token, data=b"{}")
+        self.assertEqual(hooks.starts, 1)
+        client.close()
+
+    def test_cancelled_attempt_does_not_count_towards_health(self):
+        from requests.exceptions import ConnectionError
+
+        client = LightfeedClient({
+            "apiKey": "test-api-key",
+            "hedging": {},
+            "adaptiveConcurrency": {"initialLimit": 1},
+            "circuitBreaker": {"failureThreshold": 3},
+        })
+        for _ in range(2):
+            client.circuit_breaker.record("search", "db", 503)
+        token = CancelToken()
+
+        def cancelled_request(*args, **kwargs):
+            token.cancel()
+            raise ConnectionError("aborted")
+
+        event = RequestEvent("search", "db", "POST", "https://api.lightfeed.ai/v1/databases/db/records/search")
+        with patch("requests.Session.request", side_effect=cancelled_request):
+            with self.assertRaises(HedgeCancelled):
+                client._open(event, token=token, data=b"{}")
+
+        self.assertEqual(client.concurrency.stats(), {"limit": 1, "in_flight": 0, "increases": 0, "decreases": 0})
+        # Two failures are still counted: one more opens the circuit
+        client.circuit_breaker.record("search", "db", 503)
+        self.assertEqual(client.circuit_breaker.states(), {"search/db": "open"})
+        client.close()
+
+    def test_get_records_is_not_hedged_by_default(self):
+        client = LightfeedClient({"apiKey": "test-api-key", "hedging": {}})
+        self.assertTrue(client.hedging.applies_to("search"))
+        self.assertTrue(client.hedging.applies_to("filter"))
+        self.assertFalse(client.hedging.applies_to("records"))
+
+
+if __name__ == "__main__":
+    unittest.main()
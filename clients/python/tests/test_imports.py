@@ -0,0 +1,50 @@
+"""
+Tests for the lazy package exports and the slim import path
+"""
+
+import unittest
+
+import lightfeed
+from benchmarks.import_time import STATEMENTS, measure
+
+
+class TestLazyExports(unittest.TestCase):
+    """Test cases for the names exported by the package"""
+
+    def test_every_export_resolves(self):
+        from lightfeed import client, models
+
+        for name in lightfeed.__all__:
+            with self.subTest(name=name):
+                self.assertIsNotNone(getattr(lightfeed, name))
+        self.assertIs(lightfeed.LightfeedClient, client.LightfeedClient)
+        self.assertIs(lightfeed.Record, models.Record)
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            lightfeed.NotAThing
+
+    def test_dir_lists_exports(self):
+        self.assertTrue(set(lightfeed.__all__) <= set(dir(lightfeed)))
+
+
+class TestImportPath(unittest.TestCase):
+    """Test cases checking which dependencies a fresh interpreter loads"""
+
+    def test_package_and_models_load_no_dependencies(self):
+        for name in ("package", "models"):
+            with self.subTest(statement=name):
+                self.assertEqual(measure(STATEMENTS[name], runs=1)["loaded"], [])
+
+    def test_transport_is_loaded_on_first_request(self):
+        client = measure(STATEMENTS["client"], runs=1)["loaded"]
+        first_request = measure(STATEMENTS["first_request"], runs=1)["loaded"]
+
+        for module in ("requests", "httpx", "asyncio", "multiprocessing", "msgspec", "orjson", "sqlite3"):
+            self.assertNotIn(module, client)
+        self.assertIn("requests", first_request)
+        self.assertNotIn("httpx", first_request)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+Tests for request instrumentation
+"""
+
+import json
+import sys
+import unittest
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from lightfeed import LightfeedClient
+from lightfeed.instrumentation import (
+    Histogram,
+    MetricsAggregator,
+    OpenTelemetryHooks,
+    PrometheusHooks,
+    RequestEvent,
+    RequestHooks,
+)
+from lightfeed.models import LightfeedError
+from test_retry import http_error
+
+
+def page_body(ids, next_cursor=None):
+    return json.dumps({
+        "results": [{"id": i, "data": {}} for i in ids],
+        "pagination": {"limit": 100, "next_cursor": next_cursor, "has_more": next_cursor is not None},
+    }).encode()
+
+
+def ok_response(body):
+    return Mock(content=body, status_code=200, elapsed=timedelta(milliseconds=5))
+
+
+class Recorder(RequestHooks):
+    """Collects the events passed to each callback"""
+
+    def __init__(self):
+        self.calls = []
+
+    def on_request_start(self, event):
+        self.calls.append(("start", event))
+
+    def on_response(self, event):
+        self.calls.append(("response", event))
+
+    def on_error(self, event):
+        self.calls.append(("error", event))
+
+
+class TestHistogram(unittest.TestCase):
+    """Test cases for the histogram"""
+
+    def test_quantiles(self):
+        histogram = Histogram((0.1, 0.2, 0.5, 1.0))
+        for value in [0.05] * 50 + [0.15] * 40 + [0.8] * 10:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertLessEqual(histogram.quantile(0.5), 0.1)
+        self.assertTrue(0.1 <= histogram.quantile(0.9) <= 0.2)
+        self.assertTrue(0.5 <= histogram.quantile(0.99) <= 0.8)
+        self.assertAlmostEqual(histogram.summary()["mean"], 0.165)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().quantile(0.5), 0.0)
+
+
+class TestClientHooks(unittest.TestCase):
+    """Test cases for hooks in the synchronous client"""
+
+    @patch("requests.Session.request")
+    def test_response_event(self, mock_request):
+        """Test a successful request reports status, sizes, phases and records"""
+        body = page_body([1, 2, 3])
+        mock_request.return_value = ok_response(body)
+        recorder = Recorder()
+        client = LightfeedClient({"apiKey": "test-api-key", "hooks": [recorder]})
+
+        client.search_records("test-db-id", {"search": {"text": "ai"}})
+
+        self.assertEqual([name for name, _ in recorder.calls], ["start", "response"])
+        event = recorder.calls[1][1]
+        self.assertEqual((event.endpoint, event.database_id, event.method), ("search", "test-db-id", "POST"))
+        self.assertEqual(event.status, 200)
+        self.assertEqual(event.bytes_in, len(body))
+        self.assertEqual(event.bytes_out, len(client.codec.dumps({"search": {"text": "ai"}})))
+        self.assertEqual(event.records, 3)
+        self.assertIsNone(event.page)
+        self.assertEqual(set(event.phases), {"wait", "headers", "download", "decode"})
+        self.assertGreaterEqual(event.duration, 0)
+
+    @patch("time.sleep")
+    @patch("requests.Session.request")
+    def test_retries_report_each_attempt(self, mock_request, mock_sleep):
+        """Test every failed attempt is reported with its retry decision"""
+        mock_request.side_effect = [http_error(429), http_error(500)]
+        recorder = Recorder()
+        client = LightfeedClient({"apiKey": "test-api-key", "retry": {"maxRetries": 1}, "hooks": [recorder]})
+
+        with self.assertRaises(LightfeedError):
+            client.get_records("test-db-id")
+
+        errors = [event for name, event in recorder.calls if name == "error"]
+        self.assertEqual([(e.attempt, e.status, e.will_retry) for e in errors], [(0, 429, True), (1, 500, False)])
+        self.assertIsInstance(errors[1].error, LightfeedError)
+
+    @patch("requests.Session.request")
+    def test_page_numbers(self, mock_request):
+        """Test pagination helpers tag requests with their page number"""
+        mock_request.side_effect = [ok_response(page_body([1], "c1")), ok_response(page_body([2]))]
+        recorder = Recorder()
+        client = LightfeedClient({"apiKey": "test-api-key"})
+        client.add_hooks(recorder)
+
+        list(client.iter_records("test-db-id", prefetch=1))
+
+        pages = [event.page for name, event in recorder.calls if name == "response"]
+        self.assertEqual(pages, [1, 2])
+
+    @patch("requests.Session.request")
+    def test_failing_hook_does_not_break_requests(self, mock_request):
+        mock_request.return_value = ok_response(page_body([1]))
+        hooks = Mock(spec=RequestHooks)
+        hooks.on_response.side_effect = RuntimeError("broken exporter")
+        client = LightfeedClient({"apiKey": "test-api-key", "hooks": [hooks]})
+
+        with self.assertLogs("lightfeed", level="ERROR"):
+            result = client.get_records("test-db-id")
+
+        self.assertEqual(result["results"][0]["id"], 1)
+
+    @patch("requests.Session.request")
+    def test_metrics_aggregator(self, mock_request):
+        mock_request.side_effect = [ok_response(page_body([1, 2])), http_error(404)]
+        metrics = MetricsAggregator(per_database=True)
+        client = LightfeedClient({"apiKey": "test-api-key", "hooks": [metrics]})
+
+        client.get_records("test-db-id")
+        with self.assertRaises(LightfeedError):
+            client.get_records("test-db-id", {"limit": 1})
+
+        snapshot = metrics.snapshot()["records/test-db-id"]
+        self.assertEqual(snapshot["requests"], 2)
+        self.assertEqual(snapshot["errors"], 1)
+        self.assertEqual(snapshot["records"], 2)
+        self.assertEqual(snapshot["statuses"], {"200": 1, "404": 1})
+        self.assertEqual(snapshot["duration"]["count"], 2)
+        self.assertEqual(snapshot["phases"]["decode"]["count"], 1)
+
+
+class TestOptionalAdapters(unittest.TestCase):
+    """Test cases for the OpenTelemetry and Prometheus adapters"""
+
+    def test_no_op_without_dependencies(self):
+        """Test adapters do nothing when their library is missing"""
+        modules = {"opentelemetry": None, "prometheus_client": None}
+        with patch.dict(sys.modules, modules):
+            adapters = [OpenTelemetryHooks(), PrometheusHooks()]
+
+        event = RequestEvent("search", "test-db-id", "POST", "https://example.com")
+        event.finish()
+        for adapter in adapters:
+            self.assertFalse(adapter.enabled)
+            adapter.on_response(event)
+            adapter.on_error(event)
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncClientHooks(unittest.IsolatedAsyncioTestCase):
+    """Test cases for hooks in the asyncio client"""
+
+    async def test_events(self):
+        from lightfeed import AsyncLightfeedClient
+
+        def handler(request):
+            cursor = request.url.params.get("cursor")
+            if cursor is None:
+                return httpx.Response(200, content=page_body([1], "c1"))
+            return httpx.Response(200, content=page_body([2, 3]))
+
+        recorder = Recorder()
+        client = AsyncLightfeedClient(
+            {"apiKey": "test-api-key", "hooks": [recorder]}, transport=httpx.MockTransport(handler)
+        )
+        async with client:
+            ids = [record["id"] async for record in client.iter_records("test-db-id")]
+
+        self.assertEqual(ids, [1, 2, 3])
+        responses = [event for name, event in recorder.calls if name == "response"]
+        self.assertEqual([(e.page, e.records, e.status) for e in responses], [(1, 1, 200), (2, 2, 200)])
+        self.assertIn("decode", responses[0].phases)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+"""
+Tests for the local SQLite mirror
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+
+from benchmarks.mock_server import MockLightfeedServer
+from lightfeed import LightfeedClient
+from lightfeed.filtering import apply_filter
+from lightfeed.mirror import SQLiteMirror
+from lightfeed.models import Condition, Operator
+
+from test_filtering import CONFORMANCE_CASES, rule
+
+
+def make_record(record_id, changed_at="2024-01-01T00:00:00.000Z", synced_at=None, **data):
+    synced_at = synced_at or changed_at
+    return {
+        "id": record_id,
+        "data": data,
+        "timestamps": {"created_at": "2024-01-01T00:00:00.000Z", "changed_at": changed_at, "synced_at": synced_at},
+    }
+
+
+def matching_ids(response):
+    return [record["id"] for record in response["results"]]
+
+
+class MirrorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.mirror = SQLiteMirror(os.path.join(self.directory, "mirror.db"))
+
+    def tearDown(self):
+        self.mirror.close()
+        shutil.rmtree(self.directory)
+
+
+class TestUpsert(MirrorTestCase):
+    """Test cases for storing records"""
+
+    def test_newer_versions_replace_older(self):
+        self.mirror.upsert("db", [make_record(1, "2024-01-02T00:00:00.000Z", name="v2")])
+        written = self.mirror.upsert("db", [
+            make_record(1, "2024-01-01T00:00:00.000Z", name="v1"),
+            make_record(2, "2024-01-01T00:00:00.000Z", name="other"),
+        ])
+        self.assertEqual(written, 1)
+        self.mirror.upsert("db", [make_record(1, "2024-01-03T00:00:00.000Z", name="v3")])
+
+        records = self.mirror.get_records("db")["results"]
+        self.assertEqual([(r["id"], r["data"]["name"]) for r in records], [(2, "other"), (1, "v3")])
+        self.assertEqual(records[1]["timestamps"]["changed_at"], "2024-01-03T00:00:00.000Z")
+
+    def test_index_built_in_sql_matches_maintained_index(self):
+        values = [
+            "Text", " 42 ", "ÄRGER", "\u00a0", "", "nan", 7, 0.3333333333333333, 1e20, True, False, None,
+            [], ["A", 1, None, True, ["x"], {"k": "V"}], {}, {"Nested": [1]},
+        ]
+        records = [make_record(i, col=value, other=i) for i, value in enumerate(values)]
+        records.append(make_record(len(values), other="no col"))
+        maintained = SQLiteMirror(os.path.join(self.directory, "maintained.db"))
+        self.addCleanup(maintained.close)
+        maintained.create_index("db", "col")
+        maintained.upsert("db", records)
+        self.mirror.upsert("db", records)
+        self.mirror.create_index("db", "col")
+
+        query = "SELECT record_id, column_name, item, kind, num, txt, folded, empty FROM lightfeed_values"
+        built = sorted(self.mirror._connect().execute(query).fetchall(), key=repr)
+        self.assertEqual(built, sorted(maintained._connect().execute(query).fetchall(), key=repr))
+        self.assertEqual(len([row for row in built if row[2] == 0]), len(values) - 1)
+
+    def test_databases_are_separate(self):
+        self.mirror.upsert("a", [make_record(1, name="a")])
+        self.mirror.upsert("b", [make_record(1, name="b")])
+        self.assertEqual(self.mirror.count("a"), 1)
+        self.assertEqual(self.mirror.delete("a"), 1)
+        self.assertEqual(self.mirror.count("a"), 0)
+        self.assertEqual(self.mirror.get_records("b")["results"][0]["data"], {"name": "b"})
+
+    def test_index_follows_updates_and_deletes(self):
+        self.mirror.create_index("db", "name")
+        self.mirror.upsert("db", [make_record(1, "2024-01-01T00:00:00.000Z", name="old")])
+        self.mirror.upsert("db", [make_record(1, "2024-01-02T00:00:00.000Z", name="new")])
+        query = {"filter": {"rules": [rule("name", Operator.EQUALS, "old")]}}
+        self.assertEqual(matching_ids(self.mirror.filter_records("db", query)), [])
+
+        query = {"filter": {"rules": [rule("name", Operator.EQUALS, "new")]}}
+        self.assertEqual(matching_ids(self.mirror.filter_records("db", query)), [1])
+        self.mirror.delete("db", [1])
+        self.assertEqual(matching_ids(self.mirror.filter_records("db", query)), [])
+
+
+class TestFilterConformance(MirrorTestCase):
+    """The mirror answers filters exactly like the Python evaluator"""
+
+    def assert_conforms(self, records, filter, case_sensitive=False):
+        expected = [r["id"] for r in apply_filter(records, filter, case_sensitive)]
+        query = {"filter": filter, "pagination": {"limit": 10000}}
+        self.assertEqual(matching_ids(self.mirror.filter_records("db", query, case_sensitive)), expected)
+
+    def test_operator_cases(self):
+        for indexed in (False, True):
+            for operator, value, actual, expected in CONFORMANCE_CASES:
+                with self.subTest(indexed=indexed, operator=operator.value, value=value, actual=actual):
+                    self.mirror.delete("db")
+                    if indexed:
+                        self.mirror.create_index("db", "col")
+                    self.mirror.upsert("db", [make_record(1, col=actual), make_record(2)])
+                    query = {"filter": {"condition": Condition.AND, "rules": [rule("col", operator, value)]}}
+                    ids = matching_ids(self.mirror.filter_records("db", query))
+                    self.assertEqual(1 in ids, expected)
+                    self.assertEqual(2 in ids, operator == Operator.IS_EMPTY)
+
+    def test_random_filters(self):
+        """Test random nested filters over mixed values with and without indexes"""
+        rng = random.Random(3)
+        pool = [None, "", " ", "AI Labs", "ai", "Fintech", "10", "2.5", 0, 7, 10, 12.5, True, False,
+                ["Python", "Go"], [], {"k": 1}, {}, "Zürich", "nan"]
+        records = []
+        for i in range(1, 301):
+            data = {}
+            for column in ("a", "b", "c"):
+                value = rng.choice(pool + ["<missing>"])
+                if value != "<missing>":
+                    data[column] = value
+            records.append(make_record(i, synced_at=f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}.000Z", **data))
+        self.mirror.upsert("db", records)
+
+        def random_node(depth):
+            if depth < 2 and rng.random() < 0.3:
+                condition = rng.choice([Condition.AND, Condition.OR])
+                return {"condition": condition, "rules": [random_node(depth + 1) for _ in range(rng.randint(0, 3))]}
+            value = rng.choice([v for v in pool if not isinstance(v, (list, dict))] + ["ai", "pyth", "python", 5])
+            return rule(rng.choice("abc"), rng.choice(list(Operator)), value)
+
+        filters = [{"condition": Condition.AND, "rules": [random_node(0)]} for _ in range(150)]
+        for indexed in ((), ("a",), ("a", "b", "c")):
+            for column in indexed:
+                self.mirror.create_index("db", column)
+            for number, filter in enumerate(filters):
+                with self.subTest(indexed=indexed, filter=number):
+                    self.assert_conforms(records, filter)
+                    self.assert_conforms(records, filter, case_sensitive=True)
+
+    def test_list_and_object_values_in_rules(self):
+        self.mirror.create_index("db", "tags")
+        records = [make_record(1, tags=["a", "b"]), make_record(2, tags=["b", "a"]), make_record(3, tags="a")]
+        self.mirror.upsert("db", records)
+        self.assert_conforms(records, {"rules": [rule("tags", Operator.EQUALS, ["a", "b"])]})
+        self.assert_conforms(records, {"rules": [rule("tags", Operator.NOT_EQUALS, ["a", "b"])]})
+
+    def test_invalid_filters(self):
+        with self.assertRaises(ValueError):
+            self.mirror.filter_records("db", {"filter": {"condition": "XOR", "rules": []}})
+        self.mirror.create_index("db", "a")
+        with self.assertRaises(ValueError):
+            self.mirror.filter_records("db", {"filter": {"rules": [rule("a", "matches", "x")]}})
+
+
+class TestQueries(MirrorTestCase):
+    """Test cases for pagination, time ranges and index use"""
+
+    def setUp(self):
+        super().setUp()
+        self.records = [
+            make_record(i, synced_at=f"2024-01-{i:02d}T00:00:00.000Z", industry=["Retail", "Energy"][i % 2], rank=i)
+            for i in range(1, 21)
+        ]
+        self.mirror.upsert("db", self.records)
+        self.mirror.create_index("db", "industry")
+
+    def test_pagination(self):
+        query = {"filter": {"rules": [rule("industry", Operator.EQUALS, "Retail")]}, "pagination": {"limit": 4}}
+        ids = []
+        while True:
+            page = self.mirror.filter_records("db", query)
+            ids.extend(matching_ids(page))
+            if not page["pagination"]["has_more"]:
+                break
+            query["pagination"]["cursor"] = page["pagination"]["next_cursor"]
+        self.assertEqual(ids, list(range(2, 21, 2)))
+
+    def test_time_range(self):
+        page = self.mirror.get_records("db", {"start_time": "2024-01-05T00:00:00Z", "end_time": "2024-01-07T00:00:00+00:00"})
+        self.assertEqual(matching_ids(page), [5, 6, 7])
+
+        query = {
+            "filter": {"rules": [rule("rank", Operator.GREATER_THAN, 15)]},
+            "time_range": {"end_time": "2024-01-17T00:00:00.000Z"},
+        }
+        self.assertEqual(matching_ids(self.mirror.filter_records("db", query)), [16, 17])
+
+    def test_indexed_rules_use_the_index(self):
+        plan = " ".join(self.mirror.explain("db", {"filter": {"rules": [rule("industry", Operator.EQUALS, "Retail")]}}))
+        self.assertIn("lightfeed_values_txt", plan)
+
+    def test_threads(self):
+        errors = []
+
+        def query():
+            try:
+                for _ in range(20):
+                    page = self.mirror.filter_records("db", {"filter": {"rules": [rule("industry", Operator.EQUALS, "Energy")]}})
+                    assert matching_ids(page) == list(range(1, 21, 2))
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+class TestPull(MirrorTestCase):
+    """Test cases for syncing from the API"""
+
+    def test_pull_is_incremental(self):
+        with MockLightfeedServer(records=250) as server:
+            with LightfeedClient({"apiKey": "test", "baseUrl": server.base_url}) as client:
+                self.assertEqual(self.mirror.pull(client, "db", limit=100), 250)
+                requests = server.requests
+                self.assertEqual(self.mirror.pull(client, "db", limit=100), 0)
+                self.assertEqual(server.requests, requests + 1)
+
+        self.assertEqual(self.mirror.count("db"), 250)
+        query = {"filter": {"rules": [rule("industry", Operator.EQUALS, "Retail")]}, "pagination": {"limit": 500}}
+        self.assertEqual(len(self.mirror.filter_records("db", query)["results"]), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
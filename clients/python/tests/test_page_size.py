@@ -0,0 +1,124 @@
+"""
+Tests for adaptive page sizing
+"""
+
+import unittest
+
+from benchmarks.mock_server import MockLightfeedServer
+from lightfeed import LightfeedClient
+from lightfeed.instrumentation import Instrumentation, RequestEvent
+from lightfeed.models import LightfeedError
+from lightfeed.page_size import AdaptivePageSize, adaptive_fetcher
+
+
+def page(count):
+    return {"results": [{"id": i} for i in range(count)], "pagination": {"has_more": True}}
+
+
+class TestAdaptivePageSize(unittest.TestCase):
+    """Test cases for the page size controller"""
+
+    def test_grows_geometrically_to_max(self):
+        """Test small, fast records grow the limit up to 500"""
+        page_size = AdaptivePageSize(initial=50)
+        limits = []
+        for _ in range(6):
+            limits.append(page_size.limit)
+            page_size.observe(page_size.limit, page_size.limit, 0.001 * page_size.limit, bytes_in=100 * page_size.limit)
+
+        self.assertEqual(limits, [50, 100, 200, 400, 500, 500])
+
+    def test_byte_budget(self):
+        """Test wide records keep pages under the byte budget"""
+        page_size = AdaptivePageSize(initial=100, max_page_bytes=1_000_000)
+        for _ in range(5):
+            page_size.observe(page_size.limit, page_size.limit, 0.1, bytes_in=10_000 * page_size.limit)
+
+        self.assertEqual(page_size.limit, 100)
+
+    def test_time_budget(self):
+        """Test slow records keep pages under the time budget"""
+        page_size = AdaptivePageSize(initial=100, max_page_seconds=2.0)
+        for _ in range(5):
+            page_size.observe(page_size.limit, page_size.limit, 0.05 * page_size.limit)
+
+        self.assertEqual(page_size.limit, 40)
+
+    def test_rate_limit_pauses_growth(self):
+        page_size = AdaptivePageSize(initial=100)
+        page_size.observe(100, 100, 0.1, rate_limited=True)
+
+        self.assertEqual(page_size.limit, 100)
+
+    def test_timeout_halves(self):
+        page_size = AdaptivePageSize(initial=400)
+        page_size.timed_out()
+
+        self.assertEqual(page_size.limit, 200)
+
+    def test_settles_when_larger_pages_are_slower(self):
+        """Test the limit stops growing once a larger page lowers throughput"""
+        page_size = AdaptivePageSize(initial=100)
+        page_size.observe(100, 100, 0.1)  # 1000 records/s
+        page_size.observe(200, 200, 0.4)  # 500 records/s
+
+        self.assertEqual(page_size.limit, 100)
+
+    def test_limit_bounds(self):
+        self.assertEqual(AdaptivePageSize(initial=0).limit, 1)
+        self.assertEqual(AdaptivePageSize(initial=9000).limit, 500)
+
+
+class TestAdaptiveFetcher(unittest.TestCase):
+    """Test cases for the adaptive page fetcher"""
+
+    def test_timeout_retries_smaller_page(self):
+        """Test a timed out page is retried at the same cursor with half the limit"""
+        instrumentation = Instrumentation()
+        calls = []
+
+        def fetch(cursor, limit):
+            calls.append((cursor, limit))
+            if limit > 100:
+                event = RequestEvent("records", "db", "GET", "url")
+                event.timed_out = True
+                error = LightfeedError(500, "Read timed out")
+                instrumentation.error(event, error)
+                raise error
+            return page(limit)
+
+        fetch_page = adaptive_fetcher(fetch, AdaptivePageSize(initial=400))
+
+        self.assertEqual(len(fetch_page("c1")["results"]), 100)
+        self.assertEqual(calls, [("c1", 400), ("c1", 200), ("c1", 100)])
+
+    def test_other_errors_are_raised(self):
+        def fetch(cursor, limit):
+            raise LightfeedError(404, "Not found")
+
+        with self.assertRaises(LightfeedError):
+            adaptive_fetcher(fetch, AdaptivePageSize())(None)
+
+
+class TestClientAdaptivePaging(unittest.TestCase):
+    """Test cases for adaptive iteration in the client"""
+
+    def test_fewer_round_trips(self):
+        """Test adaptive iteration returns every record with fewer requests"""
+        with MockLightfeedServer(records=2000, payload_size=10) as server:
+            client = LightfeedClient({"apiKey": "test-api-key", "baseUrl": server.base_url})
+            page_size = AdaptivePageSize(initial=100)
+            ids = [r["id"] for r in client.iter_records("db", adaptive=page_size)]
+            requests = server.requests
+
+            query = {"search": {"text": "ai"}}
+            fixed = [r["id"] for r in client.iter_search("db", query)]
+            adaptive = [r["id"] for r in client.iter_search("db", query, adaptive=True)]
+
+        self.assertEqual(ids, list(range(1, 2001)))
+        # A fixed limit of 100 would take 20 requests
+        self.assertLess(requests, 10)
+        self.assertEqual(adaptive, fixed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Tests for the streaming record iterators
+"""
+
+import threading
+import unittest
+from unittest.mock import patch
+
+from lightfeed import LightfeedClient
+from lightfeed.models import Condition, LightfeedError, Operator
+from lightfeed.pagination import iter_pages
+
+
+def make_page(ids, next_cursor=None):
+    """Builds a records response page"""
+    return {
+        "results": [{"id": i, "data": {"n": i}} for i in ids],
+        "pagination": {
+            "limit": len(ids),
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        },
+    }
+
+
+class TestIterPages(unittest.TestCase):
+    """Test cases for the page iterator"""
+
+    def setUp(self):
+        """Set up a three page cursor chain"""
+        self.chain = {
+            None: make_page([1, 2], "c1"),
+            "c1": make_page([3, 4], "c2"),
+            "c2": make_page([5]),
+        }
+        self.requested = []
+
+    def fetch(self, cursor):
+        self.requested.append(cursor)
+        return self.chain[cursor]
+
+    def test_serial(self):
+        """Test pages are walked in order without prefetching"""
+        pages = list(iter_pages(self.fetch, prefetch=0))
+        self.assertEqual(pages, [self.chain[None], self.chain["c1"], self.chain["c2"]])
+        self.assertEqual(self.requested, [None, "c1", "c2"])
+
+    def test_prefetch(self):
+        """Test pages are walked in order with a background prefetcher"""
+        pages = list(iter_pages(self.fetch, prefetch=2))
+        self.assertEqual(pages, [self.chain[None], self.chain["c1"], self.chain["c2"]])
+
+    def test_prefetch_overlaps_consumer(self):
+        """Test the next page is requested while the consumer holds the current one"""
+        fetched_second = threading.Event()
+
+        def fetch(cursor):
+            if cursor == "c1":
+                fetched_second.set()
+            return self.chain[cursor]
+
+        pages = iter_pages(fetch, prefetch=1)
+        next(pages)
+        self.assertTrue(fetched_second.wait(2))
+        pages.close()
+
+    def test_prefetch_propagates_errors(self):
+        """Test errors raised by the prefetcher surface to the consumer"""
+        def fetch(cursor):
+            if cursor == "c1":
+                raise LightfeedError(429, "Rate limit exceeded")
+            return self.chain[cursor]
+
+        pages = iter_pages(fetch, prefetch=1)
+        next(pages)
+        with self.assertRaises(LightfeedError) as context:
+            next(pages)
+        self.assertEqual(context.exception.status, 429)
+
+    def test_stops_on_has_more_false(self):
+        """Test iteration stops when has_more is false even with a cursor"""
+        page = make_page([1], "c1")
+        page["pagination"]["has_more"] = False
+        self.assertEqual(list(iter_pages(lambda cursor: page, prefetch=1)), [page])
+
+
+class TestClientIterators(unittest.TestCase):
+    """Test cases for the client record iterators"""
+
+    def setUp(self):
+        """Set up the test client"""
+        self.client = LightfeedClient({"apiKey": "test-api-key"})
+
+    @patch.object(LightfeedClient, "get_records")
+    def test_iter_records(self, mock_get_records):
+        """Test iter_records yields records across pages and forwards cursors"""
+        mock_get_records.side_effect = [make_page([1, 2], "c1"), make_page([3])]
+
+        records = list(self.client.iter_records("test-db-id", {"limit": 2}))
+
+        self.assertEqual([r["id"] for r in records], [1, 2, 3])
+        mock_get_records.assert_any_call("test-db-id", {"limit": 2})
+        mock_get_records.assert_any_call("test-db-id", {"limit": 2, "cursor": "c1"})
+
+    @patch.object(LightfeedClient, "search_records")
+    def test_iter_search(self, mock_search_records):
+        """Test iter_search forwards cursors in the pagination body"""
+        mock_search_records.side_effect = [make_page([1], "c1"), make_page([2])]
+        params = {"search": {"text": "query"}, "pagination": {"limit": 1}}
+
+        records = list(self.client.iter_search("test-db-id", params, prefetch=0))
+
+        self.assertEqual([r["id"] for r in records], [1, 2])
+        second_params = mock_search_records.call_args_list[1][0][1]
+        self.assertEqual(second_params["pagination"], {"limit": 1, "cursor": "c1"})
+        # The caller's parameters are left untouched
+        self.assertEqual(params["pagination"], {"limit": 1})
+
+    @patch.object(LightfeedClient, "filter_records")
+    def test_iter_filter(self, mock_filter_records):
+        """Test iter_filter walks the cursor chain"""
+        mock_filter_records.side_effect = [make_page([1], "c1"), make_page([2], "c2"), make_page([])]
+        params = {
+            "filter": {
+                "condition": Condition.AND,
+                "rules": [{"column": "category", "operator": Operator.EQUALS, "value": "Test"}],
+            }
+        }
+
+        records = list(self.client.iter_filter("test-db-id", params))
+
+        self.assertEqual([r["id"] for r in records], [1, 2])
+        self.assertEqual(mock_filter_records.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
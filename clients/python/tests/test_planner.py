@@ -0,0 +1,256 @@
+"""
+Tests for filter normalization and OR splitting
+"""
+
+import copy
+import json
+import random
+import threading
+import unittest
+from unittest.mock import patch
+
+from benchmarks.mock_server import MockLightfeedServer
+from lightfeed import LightfeedClient
+from lightfeed.filtering import compile_filter
+from lightfeed.models import Condition, Operator
+from lightfeed.planner import normalize_filter, planned_filter, split_filter
+
+
+def rule(column, operator, value=None):
+    return {"column": column, "operator": operator, "value": value}
+
+
+def group(condition, *rules):
+    return {"condition": condition, "rules": list(rules)}
+
+
+TECH = rule("industry", Operator.EQUALS, "Technology")
+FINANCE = rule("industry", Operator.EQUALS, "Finance")
+LARGE = rule("employees", Operator.GREATER_THAN, 4000)
+OLD = rule("founded", Operator.LESS_THAN, 1995)
+
+ALL = {"condition": Condition.AND, "rules": []}
+
+
+def random_filter(rng, depth=0):
+    columns = ["industry", "employees", "founded", "missing"]
+    if depth >= 3 or rng.random() < 0.35:
+        operator = rng.choice(list(Operator))
+        value = rng.choice(["Technology", "Finance", "tech", 1000, 4000, 1995, "", None])
+        return rule(rng.choice(columns), operator, value)
+    rules = [random_filter(rng, depth + 1) for _ in range(rng.randrange(0, 4))]
+    condition = rng.choice([Condition.AND, Condition.OR, "AND", "OR"])
+    return {"condition": condition, "rules": rules}
+
+
+class FakeFilterApi:
+    """filter_records answered by the mock server's query engine, without HTTP"""
+
+    def __init__(self, records=300):
+        # Started only so that stop() can shut it down cleanly
+        self.server = MockLightfeedServer(records=records, payload_size=10).start()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def filter_records(self, database_id, params):
+        with self.lock:
+            self.calls.append(params)
+        return json.loads(self.server.filter_records(json.loads(json.dumps(params))))
+
+    def close(self):
+        self.server.stop()
+
+
+class TestNormalizeFilter(unittest.TestCase):
+    """Test cases for normalize_filter"""
+
+    def test_flattens_nested_groups_with_the_same_condition(self):
+        nested = group(Condition.OR, TECH, group("OR", FINANCE, group(Condition.OR, LARGE)), group(Condition.AND, OLD, LARGE))
+        self.assertEqual(normalize_filter(nested), group(Condition.OR, TECH, FINANCE, LARGE, group(Condition.AND, OLD, LARGE)))
+
+    def test_unwraps_single_rule_groups(self):
+        self.assertEqual(normalize_filter(group(Condition.AND, group(Condition.OR, TECH))), group(Condition.AND, TECH))
+        self.assertEqual(
+            normalize_filter(group(Condition.AND, LARGE, group(Condition.OR, group(Condition.AND, TECH)))),
+            group(Condition.AND, LARGE, TECH),
+        )
+
+    def test_drops_duplicate_rules(self):
+        duplicate = {"value": "Technology", "operator": "equals", "column": "industry"}
+        self.assertEqual(
+            normalize_filter(group(Condition.OR, TECH, FINANCE, duplicate, group(Condition.OR, FINANCE))),
+            group(Condition.OR, TECH, FINANCE),
+        )
+
+    def test_folds_trivially_true_branches(self):
+        self.assertEqual(normalize_filter(group(Condition.AND, TECH, group(Condition.OR), ALL)), group(Condition.AND, TECH))
+        self.assertEqual(normalize_filter(group(Condition.OR, TECH, group(Condition.AND))), ALL)
+        empty_or_full = group(Condition.OR, rule("industry", Operator.IS_EMPTY), rule("industry", Operator.IS_NOT_EMPTY))
+        self.assertEqual(normalize_filter(group(Condition.AND, TECH, empty_or_full)), group(Condition.AND, TECH))
+
+    def test_folds_trivially_false_branches(self):
+        never = group(Condition.AND, TECH, rule("industry", Operator.NOT_EQUALS, "Technology"))
+        self.assertIsNone(normalize_filter(never))
+        self.assertEqual(normalize_filter(group(Condition.OR, FINANCE, never)), group(Condition.AND, FINANCE))
+        self.assertIsNone(normalize_filter(group(Condition.AND, LARGE, group(Condition.OR, never, never))))
+
+    def test_only_empty_checks_cover_every_record_under_or(self):
+        either = group(Condition.OR, TECH, rule("industry", Operator.NOT_EQUALS, "Technology"))
+        self.assertEqual(normalize_filter(either), either)
+
+    def test_input_is_not_modified(self):
+        nested = group(Condition.OR, TECH, group(Condition.OR, FINANCE, TECH))
+        original = copy.deepcopy(nested)
+        normalize_filter(nested)
+        self.assertEqual(nested, original)
+
+    def test_unknown_condition(self):
+        with self.assertRaises(ValueError):
+            normalize_filter({"condition": "XOR", "rules": [TECH]})
+
+    def test_matches_the_same_records(self):
+        with MockLightfeedServer(records=200, payload_size=10) as server:
+            records = server.records
+        for record in records[::7]:
+            record["data"]["industry"] = ""
+        rng = random.Random(11)
+        for index in range(300):
+            original = random_filter(rng)
+            original = original if "rules" in original else group(Condition.AND, original)
+            with self.subTest(index=index, filter=original):
+                normalized = normalize_filter(original)
+                expected = [r["id"] for r in records if compile_filter(original)(r)]
+                actual = [] if normalized is None else [r["id"] for r in records if compile_filter(normalized)(r)]
+                self.assertEqual(actual, expected)
+
+
+class TestSplitFilter(unittest.TestCase):
+    """Test cases for split_filter"""
+
+    def test_one_filter_per_branch(self):
+        branches = split_filter(group(Condition.OR, TECH, group(Condition.AND, LARGE, OLD)), 4)
+        self.assertEqual(branches, [group(Condition.AND, TECH), group(Condition.AND, LARGE, OLD)])
+
+    def test_branches_are_grouped_up_to_the_maximum(self):
+        branches = split_filter(group(Condition.OR, TECH, FINANCE, LARGE, OLD, ALL), 2)
+        self.assertEqual(branches, [group(Condition.OR, TECH, FINANCE, LARGE), group(Condition.OR, OLD, ALL)])
+
+    def test_other_filters_are_not_split(self):
+        for filter in (group(Condition.AND, TECH, FINANCE), group(Condition.OR, TECH), ALL):
+            with self.subTest(filter=filter):
+                self.assertEqual(split_filter(filter, 4), [filter])
+        self.assertEqual(len(split_filter(group(Condition.OR, TECH, FINANCE), 1)), 1)
+
+
+class TestPlannedFilter(unittest.TestCase):
+    """Test cases for planned_filter"""
+
+    def setUp(self):
+        self.api = FakeFilterApi()
+
+    def tearDown(self):
+        self.api.close()
+
+    def ids(self, response):
+        return [record["id"] for record in response["results"]]
+
+    def all_ids(self, call, params):
+        """Pages through a query, returning the ids of every page"""
+        pages = []
+        while True:
+            response = call("db", params)
+            pages.append(self.ids(response))
+            cursor = response["pagination"]["next_cursor"]
+            if not response["pagination"]["has_more"]:
+                return pages
+            params = dict(params, pagination=dict(params["pagination"], cursor=cursor))
+
+    def test_split_matches_the_single_query(self):
+        overlapping = group(Condition.OR, TECH, group(Condition.AND, LARGE, OLD), group(Condition.AND, TECH, LARGE), FINANCE)
+        for limit in (1, 10, 100, 500):
+            with self.subTest(limit=limit):
+                params = {"filter": overlapping, "pagination": {"limit": limit}}
+                expected = self.api.filter_records("db", params)
+                self.api.calls.clear()
+                response = planned_filter(self.api.filter_records, "db", params, 4)
+
+                self.assertEqual(self.ids(response), self.ids(expected))
+                self.assertEqual(response["pagination"]["has_more"], expected["pagination"]["has_more"])
+                self.assertEqual(response["pagination"]["next_cursor"] is None, not expected["pagination"]["has_more"])
+                self.assertEqual(len(self.api.calls), 4)
+
+    def test_split_pages_match_the_single_query(self):
+        overlapping = group(Condition.OR, TECH, group(Condition.AND, LARGE, OLD), group(Condition.AND, TECH, LARGE), FINANCE)
+        for limit in (1, 7, 40, 500):
+            with self.subTest(limit=limit):
+                params = {"filter": overlapping, "pagination": {"limit": limit}}
+                expected = self.all_ids(self.api.filter_records, params)
+                planned = self.all_ids(lambda db, p: planned_filter(self.api.filter_records, db, p, 4), params)
+
+                self.assertEqual(planned, expected)
+                self.assertEqual(len(planned[0]), min(limit, sum(map(len, expected))))
+
+    def test_cursor_of_another_filter_is_rejected(self):
+        params = {"filter": group(Condition.OR, TECH, FINANCE, OLD), "pagination": {"limit": 5}}
+        cursor = planned_filter(self.api.filter_records, "db", params, 4)["pagination"]["next_cursor"]
+        for changed, max_branches in ((group(Condition.OR, TECH, FINANCE), 4), (params["filter"], 2)):
+            with self.subTest(filter=changed, max_branches=max_branches):
+                resumed = {"filter": changed, "pagination": {"limit": 5, "cursor": cursor}}
+                with self.assertRaises(ValueError):
+                    planned_filter(self.api.filter_records, "db", resumed, 4, max_branches)
+
+    def test_unordered_branches_fall_back_to_the_single_query(self):
+        def reversed_pages(database_id, params):
+            response = self.api.filter_records(database_id, params)
+            return dict(response, results=response["results"][::-1])
+
+        params = {"filter": group(Condition.OR, TECH, FINANCE), "pagination": {"limit": 10}}
+        response = planned_filter(reversed_pages, "db", params, 4)
+
+        self.assertEqual(self.api.calls[-1]["filter"], params["filter"])
+        self.assertEqual(self.ids(response), self.ids(self.api.filter_records("db", params))[::-1])
+
+    def test_time_range_is_kept_and_limit_defaults(self):
+        params = {
+            "filter": group(Condition.OR, TECH, FINANCE),
+            "time_range": {"start_time": "2024-01-01T00:01:00.000Z"},
+        }
+        response = planned_filter(self.api.filter_records, "db", params, 4)
+
+        self.assertEqual(self.ids(response), self.ids(self.api.filter_records("db", params)))
+        self.assertTrue(all(call["pagination"] == {"limit": 100} for call in self.api.calls[:2]))
+        self.assertTrue(all(call["time_range"] == params["time_range"] for call in self.api.calls))
+
+    def test_unsplit_queries_keep_their_cursor(self):
+        params = {"filter": group(Condition.OR, TECH, FINANCE), "pagination": {"limit": 5, "cursor": "5"}}
+        response = planned_filter(self.api.filter_records, "db", params, 4)
+
+        self.assertEqual(len(self.api.calls), 1)
+        self.assertEqual(response["pagination"]["next_cursor"], "10")
+        self.assertEqual(len(planned_filter(self.api.filter_records, "db", dict(params, pagination={"limit": 5}), 4, split=False)["results"]), 5)
+        self.assertEqual(len(self.api.calls), 2)
+
+    def test_normalized_filter_is_sent(self):
+        params = {"filter": group(Condition.AND, group(Condition.AND, TECH, TECH), ALL)}
+        planned_filter(self.api.filter_records, "db", params, 4)
+        self.assertEqual(json.dumps(self.api.calls[0]["filter"]), json.dumps(group(Condition.AND, TECH)))
+
+    def test_filter_that_never_matches_sends_nothing(self):
+        never = group(Condition.AND, rule("industry", Operator.IS_EMPTY), rule("industry", Operator.IS_NOT_EMPTY))
+        response = planned_filter(self.api.filter_records, "db", {"filter": never, "pagination": {"limit": 20}}, 4)
+
+        self.assertEqual(response, {"results": [], "pagination": {"limit": 20, "next_cursor": None, "has_more": False}})
+        self.assertEqual(self.api.calls, [])
+
+    def test_client_method(self):
+        client = LightfeedClient({"apiKey": "test-api-key"})
+        params = {"filter": group(Condition.OR, TECH, FINANCE, OLD), "pagination": {"limit": 50}}
+        with patch.object(client, "filter_records", self.api.filter_records):
+            response = client.filter_records_planned("db", params, max_branches=2)
+
+        self.assertEqual(len(self.api.calls), 2)
+        self.assertEqual(self.ids(response), self.ids(self.api.filter_records("db", params)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Tests for the multiprocess export
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.mock_server import MockLightfeedServer
+from lightfeed import LightfeedClient
+from lightfeed.models import LightfeedError, Operator
+from lightfeed.process_export import MANIFEST_NAME, ProcessPoolExporter, _ParquetWriter
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+START = "2024-01-01T00:00:00.000Z"
+END = "2024-01-01T00:25:00.000Z"
+
+
+def keep_retail(record):
+    """Transform used by the tests: projects retail records, drops the rest"""
+    if record["data"]["industry"] != "Retail":
+        return None
+    return {"id": record["id"], "name": record["data"]["name"].upper()}
+
+
+def read_jsonl(directory, manifest):
+    records = []
+    for part in manifest["parts"]:
+        with open(os.path.join(directory, part["path"])) as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+class TestProcessPoolExporter(unittest.TestCase):
+    """Test cases for exporting to part files with worker processes"""
+
+    @classmethod
+    def setUpClass(cls):
+        # One record per second, so records fall exactly on many slice boundaries
+        cls.server = MockLightfeedServer(records=1200).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = {"apiKey": "test", "baseUrl": self.server.base_url}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_exports_every_record_once(self):
+        exporter = ProcessPoolExporter(self.config, "db", processes=2, slices_per_process=3, limit=100)
+        manifest = exporter.run(self.directory, START, END)
+
+        records = read_jsonl(self.directory, manifest)
+        self.assertEqual(sorted(r["id"] for r in records), list(range(1, 1201)))
+        self.assertEqual(manifest["records"], 1200)
+        self.assertEqual(len(manifest["parts"]), 6)
+        self.assertEqual(manifest["parts"][0]["start_time"], START)
+        self.assertEqual(manifest["parts"][-1]["end_time"], END)
+        for part in manifest["parts"]:
+            self.assertEqual(part["bytes"], os.path.getsize(os.path.join(self.directory, part["path"])))
+
+        with open(os.path.join(self.directory, MANIFEST_NAME)) as f:
+            self.assertEqual(json.load(f), manifest)
+
+    def test_transform_and_filter(self):
+        with LightfeedClient(self.config) as client:
+            manifest = client.export_files(
+                "db",
+                self.directory,
+                START,
+                END,
+                processes=2,
+                transform=keep_retail,
+                filter_params={"filter": {"rules": [{"column": "employees", "operator": Operator.GREATER_THAN, "value": 1000}]}},
+            )
+
+        records = read_jsonl(self.directory, manifest)
+        expected = [
+            r for r in self.server.records
+            if r["data"]["industry"] == "Retail" and r["data"]["employees"] > 1000
+        ]
+        self.assertEqual(sorted(r["id"] for r in records), [r["id"] for r in expected])
+        self.assertEqual(records[0]["name"], records[0]["name"].upper())
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet(self):
+        exporter = ProcessPoolExporter(self.config, "db", processes=2, slices_per_process=2, format="parquet")
+        manifest = exporter.run(self.directory, START, END)
+
+        tables = [pq.read_table(os.path.join(self.directory, part["path"])) for part in manifest["parts"]]
+        self.assertEqual(sum(t.num_rows for t in tables), 1200)
+        self.assertIn("industry", tables[0].column_names)
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_row_groups(self):
+        exporter = ProcessPoolExporter(self.config, "db", processes=1, slices_per_process=1, format="parquet", row_group_size=100)
+        manifest = exporter.run(self.directory, START, END)
+
+        part = pq.ParquetFile(os.path.join(self.directory, manifest["parts"][0]["path"]))
+        self.assertEqual(part.metadata.num_rows, 1200)
+        self.assertEqual(part.num_row_groups, 12)
+
+    def test_errors_propagate(self):
+        exporter = ProcessPoolExporter({"apiKey": "", "baseUrl": self.server.base_url}, "db", processes=1)
+        with self.assertRaises(LightfeedError):
+            exporter.run(self.directory, START, END)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            ProcessPoolExporter(self.config, "db", format="csv")
+
+
+def record(record_id, **data):
+    return {"id": record_id, "timestamps": {"synced_at": START}, "data": data}
+
+
+@unittest.skipIf(pq is None, "pyarrow is not installed")
+class TestParquetWriter(unittest.TestCase):
+    """Test cases for streaming Parquet parts"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "part.parquet")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_writes_a_row_group_per_batch_of_records(self):
+        writer = _ParquetWriter(self.path, row_group_size=10)
+        for start in range(0, 35, 7):
+            writer.write([record(i, n=i) for i in range(start, start + 7)])
+            self.assertLess(writer._collector.rows, 10)
+        writer.close()
+
+        part = pq.ParquetFile(self.path)
+        self.assertEqual(part.num_row_groups, 4)
+        self.assertEqual(part.read().column("n").to_pylist(), list(range(35)))
+
+    def test_later_row_groups_widen_the_schema(self):
+        writer = _ParquetWriter(self.path, row_group_size=2)
+        writer.write([record(1, n=1, empty=None), record(2, n=2)])
+        writer.write([record(3, n=2.5, empty="x", extra=True), record(4, n=4)])
+        writer.write([record(5, n="five"), record(6, n=[6])])
+        writer.close()
+
+        table = pq.read_table(self.path)
+        self.assertEqual(table.column("id").to_pylist(), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(table.column("n").to_pylist(), ["1.0", "2.0", "2.5", "4.0", "five", "[6]"])
+        self.assertEqual(table.column("empty").to_pylist(), [None, None, "x", None, None, None])
+        self.assertEqual(table.column("extra").to_pylist(), [None, None, True, None, None, None])
+        self.assertEqual(pq.ParquetFile(self.path).num_row_groups, 3)
+
+    def test_strings_of_widened_columns_are_stored_as_they_are(self):
+        writer = _ParquetWriter(self.path, row_group_size=2)
+        writer.write([record(1, n=1), record(2, n=2)])
+        writer.write([record(3, n="abc"), record(4, n="def")])
+        writer.write([record(5, n="ghi"), record(6, n=7)])
+        writer.close()
+
+        table = pq.read_table(self.path)
+        self.assertEqual(table.column("n").to_pylist(), ["1", "2", "abc", "def", "ghi", "7"])
+
+    def test_empty_part_has_the_metadata_columns(self):
+        writer = _ParquetWriter(self.path)
+        writer.close()
+        self.assertEqual(pq.read_table(self.path).num_rows, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
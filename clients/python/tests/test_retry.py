@@ -0,0 +1,147 @@
+"""
+Tests for retry, backoff and rate limiting
+"""
+
+import random
+import unittest
+from unittest.mock import Mock, patch
+
+from requests.exceptions import ConnectionError, RequestException
+
+from lightfeed import LightfeedClient
+from lightfeed.models import LightfeedError
+from lightfeed.retry import RetryPolicy, TokenBucket, parse_retry_after
+
+
+def http_error(status, headers=None):
+    """Builds a requests exception carrying an error response"""
+    response = Mock()
+    response.status_code = status
+    response.headers = headers or {}
+    response.json.return_value = {"message": f"status {status}"}
+    error = RequestException("API Error")
+    error.response = response
+    return error
+
+
+def ok_response():
+    """Builds a successful response"""
+    response = Mock()
+    response.content = b'{"results": [], "pagination": {"limit": 100, "next_cursor": null, "has_more": false}}'
+    return response
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    """Test cases for rate-limit header parsing"""
+
+    def test_seconds(self):
+        """Test Retry-After given in seconds"""
+        self.assertEqual(parse_retry_after({"Retry-After": "3"}), 3.0)
+
+    def test_http_date(self):
+        """Test Retry-After given as an HTTP date"""
+        delay = parse_retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:05 GMT"}, now=1445412480.0)
+        self.assertAlmostEqual(delay, 5.0)
+
+    def test_reset_headers(self):
+        """Test rate-limit reset headers as deltas and absolute timestamps"""
+        self.assertEqual(parse_retry_after({"RateLimit-Reset": "7"}), 7.0)
+        self.assertEqual(parse_retry_after({"X-RateLimit-Reset": "1700000010"}, now=1700000000.0), 10.0)
+
+    def test_missing(self):
+        """Test no delay is returned without headers"""
+        self.assertIsNone(parse_retry_after({}))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for the token bucket"""
+
+    def test_burst_then_wait(self):
+        """Test the bucket allows a burst and then spaces out requests"""
+        now = [0.0]
+        bucket = TokenBucket(rate=10, burst=2, clock=lambda: now[0])
+
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1)
+        self.assertAlmostEqual(bucket.reserve(), 0.2)
+
+        # Tokens refill over time
+        now[0] = 1.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test cases for the retry policy"""
+
+    def test_per_class_limits(self):
+        """Test each error class has its own retry limit"""
+        policy = RetryPolicy({"maxRetries": 2, "serverErrorRetries": 0}, rng=random.Random(0))
+
+        self.assertIsNotNone(policy.delay_for(1, 429))
+        self.assertIsNone(policy.delay_for(2, 429))
+        self.assertIsNone(policy.delay_for(0, 500))
+        self.assertIsNotNone(policy.delay_for(0, None))
+        self.assertIsNone(policy.delay_for(0, 404))
+
+    def test_exponential_backoff_with_jitter(self):
+        """Test backoff grows exponentially and stays under the cap"""
+        policy = RetryPolicy({"maxRetries": 10, "backoffFactor": 1.0, "maxBackoff": 4.0}, rng=random.Random(1))
+
+        for attempt in range(10):
+            delay = policy.delay_for(attempt, 500)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(4.0, 2 ** attempt))
+
+    def test_retry_after_is_shared(self):
+        """Test a server-requested delay pauses every caller of the policy"""
+        policy = RetryPolicy({})
+
+        self.assertEqual(policy.delay_for(0, 429, {"Retry-After": "2"}), 2.0)
+        self.assertGreater(policy.pause_remaining(), 1.5)
+
+
+class TestClientRetries(unittest.TestCase):
+    """Test cases for retries in the client"""
+
+    @patch("time.sleep")
+    @patch("requests.Session.request")
+    def test_retries_rate_limited_request(self, mock_request, mock_sleep):
+        """Test a 429 is retried after the Retry-After delay"""
+        mock_request.side_effect = [http_error(429, {"Retry-After": "1"}), ok_response()]
+        client = LightfeedClient({"apiKey": "test-api-key", "retry": {"maxRetries": 2}})
+
+        result = client.get_records("test-db-id")
+
+        self.assertEqual(result["results"], [])
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertAlmostEqual(mock_sleep.call_args_list[0][0][0], 1.0)
+
+    @patch("time.sleep")
+    @patch("requests.Session.request")
+    def test_gives_up_after_max_retries(self, mock_request, mock_sleep):
+        """Test the last error is raised once retries are exhausted"""
+        mock_request.side_effect = ConnectionError("connection refused")
+        client = LightfeedClient({"apiKey": "test-api-key", "retry": {"maxRetries": 2}})
+
+        with self.assertRaises(LightfeedError) as context:
+            client.get_records("test-db-id")
+
+        self.assertEqual(context.exception.status, 500)
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch("requests.Session.request")
+    def test_no_retries_by_default(self, mock_request):
+        """Test errors are surfaced immediately when retries are not configured"""
+        mock_request.side_effect = http_error(500)
+        client = LightfeedClient({"apiKey": "test-api-key"})
+
+        with self.assertRaises(LightfeedError):
+            client.get_records("test-db-id")
+
+        self.assertEqual(mock_request.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+Tests for streaming, incremental parsing of records responses
+"""
+
+import json
+import random
+import unittest
+
+from benchmarks.mock_server import MockLightfeedServer
+from lightfeed import LightfeedClient
+from lightfeed.decoding import TypedRecord, available_backends, get_codec
+from lightfeed.instrumentation import MetricsAggregator
+from lightfeed.models import LightfeedError
+from lightfeed.streaming import RecordStream, RecordStreamParser
+
+
+RECORDS = [
+    {"id": 1, "data": {"name": "Acme {Inc}", "tags": ["a", "b"], "note": "say \"hi\" \\ ]["}},
+    {"id": 2, "data": {"name": "Café ☃", "nested": {"x": [1, {"y": None}]}}},
+    {"id": 3, "data": {}, "relevance_score": 0.5},
+]
+PAGINATION = {"limit": 3, "next_cursor": "c_3", "has_more": True}
+
+
+def parse(body, chunk_size):
+    parser = RecordStreamParser()
+    elements = []
+    for i in range(0, len(body), chunk_size):
+        elements.extend(parser.feed(body[i:i + chunk_size]))
+    parser.close()
+    return [json.loads(e) for e in elements], parser.members
+
+
+class TestRecordStreamParser(unittest.TestCase):
+    """Test cases for the incremental parser"""
+
+    def test_any_chunking(self):
+        """Test every chunk size yields the same records and pagination"""
+        body = json.dumps({"results": RECORDS, "pagination": PAGINATION}, indent=2).encode()
+        for chunk_size in (1, 2, 7, 64, len(body)):
+            with self.subTest(chunk_size=chunk_size):
+                records, members = parse(body, chunk_size)
+                self.assertEqual(records, RECORDS)
+                self.assertEqual(members["pagination"], PAGINATION)
+
+    def test_random_chunks(self):
+        body = json.dumps({"results": RECORDS * 20, "pagination": PAGINATION}).encode()
+        rng = random.Random(7)
+        parser = RecordStreamParser()
+        elements, pos = [], 0
+        while pos < len(body):
+            step = rng.randint(1, 50)
+            elements.extend(parser.feed(body[pos:pos + step]))
+            pos += step
+        parser.close()
+        self.assertEqual([json.loads(e) for e in elements], RECORDS * 20)
+
+    def test_pagination_first(self):
+        body = json.dumps({"pagination": PAGINATION, "results": RECORDS}).encode()
+        records, members = parse(body, 5)
+        self.assertEqual(records, RECORDS)
+        self.assertEqual(members["pagination"], PAGINATION)
+
+    def test_empty_and_null_results(self):
+        for results in ([], None):
+            with self.subTest(results=results):
+                body = json.dumps({"results": results, "pagination": PAGINATION}).encode()
+                records, members = parse(body, 3)
+                self.assertEqual(records, [])
+                self.assertEqual(members["pagination"], PAGINATION)
+
+    def test_buffer_stays_small(self):
+        """Test completed records are dropped from the buffer"""
+        body = json.dumps({"results": RECORDS * 1000, "pagination": PAGINATION}).encode()
+        parser = RecordStreamParser()
+        for i in range(0, len(body), 1024):
+            parser.feed(body[i:i + 1024])
+            self.assertLess(len(parser._buffer), 2048)
+        parser.close()
+
+    def test_incomplete_body(self):
+        body = json.dumps({"results": RECORDS, "pagination": PAGINATION}).encode()
+        parser = RecordStreamParser()
+        parser.feed(body[:-10])
+        with self.assertRaises(ValueError):
+            parser.close()
+
+    def test_not_an_object(self):
+        with self.assertRaises(ValueError):
+            RecordStreamParser().feed(b"[1, 2]")
+
+
+class TestRecordStream(unittest.TestCase):
+    """Test cases for the record stream"""
+
+    def test_decodes_with_every_backend(self):
+        body = json.dumps({"results": RECORDS, "pagination": PAGINATION}).encode()
+        for backend in available_backends():
+            with self.subTest(backend=backend):
+                codec = get_codec(backend)
+                stream = RecordStream([body[:20], body[20:]], codec.decode_record)
+                self.assertIsNone(stream.pagination)
+                self.assertEqual(list(stream), RECORDS)
+                self.assertEqual(stream.pagination, PAGINATION)
+                self.assertEqual(stream.records, 3)
+                self.assertEqual(stream.bytes_in, len(body))
+
+    def test_typed_records(self):
+        timestamps = {"created_at": "t1", "changed_at": "t2", "synced_at": "t3"}
+        records = [dict(r, timestamps=timestamps) for r in RECORDS]
+        body = json.dumps({"results": records, "pagination": PAGINATION}).encode()
+        for backend in available_backends():
+            with self.subTest(backend=backend):
+                stream = RecordStream([body], get_codec(backend, typed=True).decode_record)
+                records = list(stream)
+                self.assertIsInstance(records[0], TypedRecord)
+                self.assertEqual(records[2].relevance_score, 0.5)
+
+    def test_truncated_body_raises(self):
+        body = json.dumps({"results": RECORDS, "pagination": PAGINATION}).encode()
+        closed = []
+        stream = RecordStream([body[:40]], json.loads, on_close=lambda s, e: closed.append(e))
+        with self.assertRaises(LightfeedError) as ctx:
+            list(stream)
+        self.assertEqual(ctx.exception.status, 500)
+        self.assertIs(closed[0], ctx.exception)
+
+    def test_close_early_releases(self):
+        body = json.dumps({"results": RECORDS, "pagination": PAGINATION}).encode()
+        released = []
+        with RecordStream([body], json.loads, release=lambda: released.append(True)) as stream:
+            next(stream)
+        self.assertEqual(released, [True])
+        self.assertEqual(list(stream), [])
+
+
+class TestClientStreaming(unittest.TestCase):
+    """Test cases for the streaming client methods against a local server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockLightfeedServer(records=1200, payload_size=500).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def client(self, **config):
+        return LightfeedClient(dict({"apiKey": "test", "baseUrl": self.server.base_url}, **config))
+
+    def test_get_records_stream_matches_get_records(self):
+        metrics = MetricsAggregator()
+        with self.client(hooks=[metrics]) as client:
+            expected = client.get_records("db", {"limit": 500})
+            with client.get_records_stream("db", {"limit": 500}, chunk_size=4096) as stream:
+                records = list(stream)
+
+        self.assertEqual(records, expected["results"])
+        self.assertEqual(stream.pagination, expected["pagination"])
+        snapshot = metrics.snapshot()["records"]
+        self.assertEqual(snapshot["requests"], 2)
+        self.assertEqual(snapshot["records"], 1000)
+        self.assertIn("decode", snapshot["phases"])
+
+    def test_search_and_filter_streams(self):
+        search = {"search": {"text": "acme"}, "pagination": {"limit": 50}}
+        filter_params = {
+            "filter": {"rules": [{"column": "industry", "operator": "equals", "value": "Retail"}]},
+            "pagination": {"limit": 50},
+        }
+        with self.client() as client:
+            self.assertEqual(list(client.search_records_stream("db", search)), client.search_records("db", search)["results"])
+            stream = client.filter_records_stream("db", filter_params)
+            self.assertEqual(list(stream), client.filter_records("db", filter_params)["results"])
+            self.assertEqual(stream.pagination["next_cursor"], "50")
+
+    def test_error_status_raises_before_streaming(self):
+        with LightfeedClient({"apiKey": "", "baseUrl": self.server.base_url}) as client:
+            with self.assertRaises(LightfeedError) as ctx:
+                client.get_records_stream("db")
+        self.assertEqual(ctx.exception.status, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
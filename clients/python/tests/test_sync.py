@@ -0,0 +1,130 @@
+"""
+Tests for incremental sync and checkpoint stores
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from lightfeed import LightfeedClient
+from lightfeed.sync import CheckpointStore, FileCheckpointStore, IncrementalSync, SQLiteCheckpointStore
+
+from fakes import FakeRecordsApi, timestamps
+
+
+class TestCheckpointStore(unittest.TestCase):
+    """Test cases for the checkpoint store base class"""
+
+    def test_load_and_save_are_abstract(self):
+        """Test a store must implement both load and save"""
+        with self.assertRaises(TypeError):
+            CheckpointStore()
+
+        class LoadOnly(CheckpointStore):
+            def load(self, database_id):
+                return None
+
+        with self.assertRaises(TypeError):
+            LoadOnly()
+
+
+class StoreTests:
+    """Behaviour shared by every checkpoint store"""
+
+    def make_store(self, directory):
+        raise NotImplementedError
+
+    def test_round_trip(self):
+        """Test checkpoints are saved and loaded per database"""
+        with tempfile.TemporaryDirectory() as directory:
+            store = self.make_store(directory)
+            self.assertIsNone(store.load("db-1"))
+
+            store.save("db-1", {"synced_at": "2024-01-01T00:00:00.000Z", "record_id": 7})
+            store.save("db-2", {"synced_at": "2024-02-01T00:00:00.000Z", "record_id": 9})
+            store.save("db-1", {"synced_at": "2024-01-02T00:00:00.000Z", "record_id": 8})
+
+            reopened = self.make_store(directory)
+            self.assertEqual(reopened.load("db-1"), {"synced_at": "2024-01-02T00:00:00.000Z", "record_id": 8})
+            self.assertEqual(reopened.load("db-2")["record_id"], 9)
+
+
+class TestFileCheckpointStore(StoreTests, unittest.TestCase):
+    """Test cases for the JSON file store"""
+
+    def make_store(self, directory):
+        return FileCheckpointStore(os.path.join(directory, "checkpoints.json"))
+
+
+class TestSQLiteCheckpointStore(StoreTests, unittest.TestCase):
+    """Test cases for the SQLite store"""
+
+    def make_store(self, directory):
+        return SQLiteCheckpointStore(os.path.join(directory, "checkpoints.db"))
+
+
+class TestIncrementalSync(unittest.TestCase):
+    """Test cases for incremental sync runs"""
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def setUp(self):
+        """Set up a fake database and an isolated checkpoint store"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = FileCheckpointStore(os.path.join(self.directory.name, "checkpoints.json"))
+        # Several records share a synced_at to exercise the boundary dedupe
+        stamps = timestamps(self.start, 10, timedelta(minutes=1))
+        self.api = FakeRecordsApi(stamps + [stamps[-1]] * 3)
+        self.sync = IncrementalSync(self.api, "db", store=self.store, limit=4)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def collect(self):
+        received = []
+        self.sync.run(received.extend)
+        return [r["id"] for r in received]
+
+    def test_first_run_fetches_everything(self):
+        """Test the first run delivers every record and stores a checkpoint"""
+        self.assertEqual(self.collect(), list(range(13)))
+        self.assertEqual(self.sync.checkpoint["record_id"], 12)
+
+    def test_second_run_fetches_only_the_delta(self):
+        """Test later runs skip records at or before the checkpoint"""
+        self.collect()
+        self.assertEqual(self.collect(), [])
+
+        # One new record and one changed record
+        later = (self.start + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        self.api.records.append({"id": 13, "data": {}, "timestamps": {"synced_at": later}})
+        self.api.records[2]["timestamps"]["synced_at"] = later
+
+        self.assertEqual(self.collect(), [2, 13])
+
+    def test_unacknowledged_batch_is_redelivered(self):
+        """Test a batch whose handler fails is delivered again on the next run"""
+        batches = []
+
+        def failing_handler(batch):
+            batches.append([r["id"] for r in batch])
+            if len(batches) == 2:
+                raise RuntimeError("consumer crashed")
+
+        with self.assertRaises(RuntimeError):
+            self.sync.run(failing_handler)
+
+        self.assertEqual(self.sync.checkpoint["record_id"], batches[0][-1])
+        self.assertEqual(self.collect()[:len(batches[1])], batches[1])
+
+    def test_client_incremental_sync(self):
+        """Test the client entry point builds a sync bound to the client"""
+        client = LightfeedClient({"apiKey": "test-api-key"})
+        sync = client.incremental_sync("db", store=self.store, limit=100)
+        self.assertIs(sync.client, client)
+        self.assertEqual(sync.limit, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
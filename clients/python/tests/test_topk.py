@@ -0,0 +1,208 @@
+"""
+Tests for top-k selection and federated search
+"""
+
+import random
+import unittest
+from unittest.mock import patch
+
+from fakes import FakeSearchApi
+from lightfeed import LightfeedClient
+from lightfeed.models import LightfeedError
+from lightfeed.topk import FederatedHit, TopK, federated_search, top_k_search
+
+
+def brute_force(api, k, threshold=0.2):
+    hits = [
+        (record["relevance_score"], database_id, record["id"])
+        for database_id, records in api.databases.items()
+        for record in records
+        if record["relevance_score"] >= threshold
+    ]
+    return sorted(hits, reverse=True)[:k]
+
+
+def summary(hits):
+    return [(hit.score, hit.database_id, hit.record["id"]) for hit in hits]
+
+
+class TestTopK(unittest.TestCase):
+    """Test cases for the bounded top-k heap"""
+
+    def test_keeps_the_best_items(self):
+        top = TopK(3)
+        for score in [0.5, 0.1, 0.9, 0.7, 0.3, 0.8]:
+            top.push(score, score)
+
+        self.assertEqual(top.items(), [0.9, 0.8, 0.7])
+        self.assertEqual(top.min_score, 0.7)
+
+    def test_min_score_is_none_until_full(self):
+        top = TopK(2)
+        self.assertTrue(top.push(0.4, "a"))
+        self.assertIsNone(top.min_score)
+        self.assertFalse(top.full)
+        top.push(0.6, "b")
+        self.assertEqual(top.min_score, 0.4)
+
+    def test_ties_keep_the_first_item(self):
+        top = TopK(2)
+        top.push(0.5, "first")
+        top.push(0.5, "second")
+
+        self.assertFalse(top.push(0.5, "third"))
+        self.assertEqual(top.items(), ["first", "second"])
+
+    def test_rejects_k_below_one(self):
+        with self.assertRaises(ValueError):
+            TopK(0)
+
+
+class TestFederatedSearch(unittest.TestCase):
+    """Test cases for federated_search"""
+
+    def setUp(self):
+        # Distinct scores, so the expected ranking has no ties
+        scores = [value / 10000 for value in random.Random(7).sample(range(10000), 1200)]
+        self.api = FakeSearchApi({f"db-{n}": scores[n * 300:(n + 1) * 300] for n in range(4)})
+
+    def search(self, k, threshold=None, limit=None, database_ids=None):
+        params = {"search": {"text": "ai"}}
+        if threshold is not None:
+            params["search"]["threshold"] = threshold
+        if limit is not None:
+            params["pagination"] = {"limit": limit}
+        return federated_search(self.api.search_records, database_ids or list(self.api.databases), params, k, 4)
+
+    def test_matches_brute_force_merge(self):
+        for k, limit in [(1, None), (20, None), (50, 10), (2000, 500)]:
+            with self.subTest(k=k, limit=limit):
+                hits = self.search(k, limit=limit)
+                self.assertEqual(summary(hits), brute_force(self.api, k))
+
+    def test_stops_paging_once_scores_fall_below_the_kth_best(self):
+        hits = self.search(10, limit=10)
+
+        self.assertEqual(len(hits), 10)
+        # Each database holds ~240 results above the threshold, i.e. 24 pages of 10
+        for database_id in self.api.databases:
+            self.assertLessEqual(self.api.requests_to(database_id), 3)
+
+    def test_threshold_limits_results_and_pages(self):
+        hits = self.search(1000, threshold=0.9, limit=20)
+
+        self.assertEqual(summary(hits), brute_force(self.api, 1000, threshold=0.9))
+        self.assertTrue(all(hit.score >= 0.9 for hit in hits))
+        for database_id in self.api.databases:
+            self.assertLessEqual(self.api.requests_to(database_id), 3)
+
+    def test_page_size_defaults_to_k_and_cursor_is_ignored(self):
+        params = {"search": {"text": "ai"}, "pagination": {"cursor": "40"}}
+        federated_search(self.api.search_records, ["db-0"], params, 5, 1)
+
+        first = self.api.calls[0][1]
+        self.assertEqual(first["pagination"], {"limit": 5})
+
+    def test_duplicate_databases_are_searched_once(self):
+        self.search(5, database_ids=["db-1", "db-1"])
+        self.assertEqual({database_id for database_id, _ in self.api.calls}, {"db-1"})
+
+    def test_errors_propagate(self):
+        def failing(database_id, params):
+            if database_id == "db-2":
+                raise LightfeedError(500, "boom")
+            return self.api.search_records(database_id, params)
+
+        with self.assertRaises(LightfeedError):
+            federated_search(failing, list(self.api.databases), {"search": {"text": "ai"}}, 5, 4)
+
+    def test_client_method(self):
+        client = LightfeedClient({"apiKey": "test-api-key"})
+        with patch.object(client, "search_records", self.api.search_records):
+            hits = client.federated_search(["db-0", "db-3"], {"search": {"text": "ai"}}, k=3)
+
+        self.assertTrue(all(isinstance(hit, FederatedHit) for hit in hits))
+        self.assertEqual(summary(hits), [
+            hit for hit in brute_force(self.api, 2000) if hit[1] in ("db-0", "db-3")
+        ][:3])
+
+
+class TestTopKSearch(unittest.TestCase):
+    """Test cases for top_k_search"""
+
+    def setUp(self):
+        scores = [value / 1000 for value in random.Random(3).sample(range(1000), 600)]
+        self.api = FakeSearchApi({"db": scores})
+        self.ranked = [r for r in self.api.databases["db"] if r["relevance_score"] >= 0.2]
+
+    def ids(self, records):
+        return [record["id"] for record in records]
+
+    def test_one_request_of_k_results(self):
+        records = top_k_search(self.api.search_records, "db", {"search": {"text": "ai"}}, 20)
+
+        self.assertEqual(self.ids(records), self.ids(self.ranked[:20]))
+        self.assertEqual(len(self.api.calls), 1)
+        self.assertEqual(self.api.calls[0][1]["pagination"], {"limit": 20})
+
+    def test_large_k_is_paged_at_the_api_maximum(self):
+        params = {"search": {"text": "ai", "threshold": 0.0}}
+        records = top_k_search(self.api.search_records, "db", params, 700)
+
+        self.assertEqual(self.ids(records), self.ids(self.api.databases["db"]))
+        self.assertEqual([params["pagination"]["limit"] for _, params in self.api.calls], [500, 200])
+
+    def test_threshold_stops_paging(self):
+        records = top_k_search(self.api.search_records, "db", {"search": {"text": "ai", "threshold": 0.9}}, 400)
+
+        self.assertEqual(self.ids(records), self.ids(r for r in self.ranked if r["relevance_score"] >= 0.9))
+        self.assertEqual(len(self.api.calls), 1)
+
+    def test_min_relative_score_cuts_the_tail(self):
+        params = {"search": {"text": "ai"}}
+        records = top_k_search(self.api.search_records, "db", params, 100, min_relative_score=0.95)
+
+        best = self.ranked[0]["relevance_score"]
+        self.assertTrue(records)
+        self.assertTrue(all(r["relevance_score"] >= best * 0.95 for r in records))
+        self.assertEqual(self.ids(records), self.ids(r for r in self.ranked if r["relevance_score"] >= best * 0.95))
+
+    def test_dedupe_covers_overlapping_pages(self):
+        def overlapping(database_id, params):
+            # Pages of at most four results; each repeats the last result of the page before it
+            params = dict(params, pagination=dict(params["pagination"], limit=min(4, params["pagination"]["limit"])))
+            page = self.api.search_records(database_id, params)
+            cursor = params["pagination"].get("cursor")
+            if cursor is not None:
+                page["results"] = [self.ranked[int(cursor) - 1]] + page["results"]
+            return page
+
+        params = {"search": {"text": "ai"}}
+        deduped = top_k_search(overlapping, "db", params, 10)
+        duplicated = top_k_search(overlapping, "db", params, 10, dedupe=False)
+
+        self.assertEqual(self.ids(deduped), self.ids(self.ranked[:10]))
+        self.assertEqual(len(self.ids(duplicated)), 10)
+        self.assertLess(len(set(self.ids(duplicated))), 10)
+
+    def test_stops_when_the_cursor_does_not_move(self):
+        def stuck(database_id, params):
+            page = self.api.search_records(database_id, dict(params, pagination={"limit": 3}))
+            page["pagination"]["next_cursor"] = "0"
+            return page
+
+        records = top_k_search(stuck, "db", {"search": {"text": "ai"}}, 10)
+
+        self.assertEqual(self.ids(records), self.ids(self.ranked[:3]))
+        self.assertEqual(len(self.api.calls), 2)
+
+    def test_client_method(self):
+        client = LightfeedClient({"apiKey": "test-api-key"})
+        with patch.object(client, "search_records", self.api.search_records):
+            records = client.search_top_k("db", {"search": {"text": "ai"}}, k=5)
+
+        self.assertEqual(self.ids(records), self.ids(self.ranked[:5]))
+
+
+if __name__ == "__main__":
+    unittest.main()